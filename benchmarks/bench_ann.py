@@ -0,0 +1,96 @@
+"""Recall@k and latency of the IVF index against exact search.
+
+Usage:
+    python -m benchmarks.bench_ann [--n 50000] [--dim 768] [--queries 200] [--k 3]
+        [--n-lists 0] [--nprobe 1 2 4 8 16 32] [--json]
+
+Vectors are drawn around random cluster centres so the corpus has the kind of
+topical structure real chunk embeddings have; uniformly random vectors would
+understate IVF recall.
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.core.ann_index import IVFIndex
+from src.core.vector_index import VectorIndex
+
+def synthetic_embeddings(n: int, dim: int, n_topics: int, spread: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(n_topics, dim)).astype(np.float32)
+    noise = rng.normal(size=(n, dim)).astype(np.float32)
+    return centres[rng.integers(0, n_topics, n)] + spread * noise
+
+def timed_search(index: VectorIndex, queries: np.ndarray, k: int) -> Dict[str, Any]:
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        ids, _ = index.search(query, k)
+        latencies.append(time.perf_counter() - started)
+        results.append(ids)
+    latencies_ms = 1000.0 * np.asarray(latencies)
+    return {
+        "ids": results,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99))
+    }
+
+def recall_at_k(approximate: List[np.ndarray], exact: List[np.ndarray]) -> float:
+    hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approximate, exact))
+    return hits / sum(len(e) for e in exact)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--spread", type=float, default=2.0, help="within-topic noise relative to topic separation")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--n-lists", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.n + args.queries, args.dim, args.topics, args.spread, seed=0)
+    corpus, queries = vectors[:args.n], vectors[args.n:]
+    chunk_ids = list(range(args.n))
+
+    exact = VectorIndex()
+    exact.add(chunk_ids, corpus)
+    baseline = timed_search(exact, queries, args.k)
+
+    ivf = IVFIndex(n_lists=args.n_lists, min_train_size=1)
+    started = time.perf_counter()
+    ivf.add(chunk_ids, corpus)
+    build_seconds = time.perf_counter() - started
+
+    rows = [{"backend": "exact", "nprobe": None, "recall": 1.0,
+             "p50_ms": baseline["p50_ms"], "p99_ms": baseline["p99_ms"]}]
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        result = timed_search(ivf, queries, args.k)
+        rows.append({"backend": "ivf", "nprobe": nprobe,
+                     "recall": recall_at_k(result["ids"], baseline["ids"]),
+                     "p50_ms": result["p50_ms"], "p99_ms": result["p99_ms"]})
+
+    report = {
+        "n": args.n, "dim": args.dim, "k": args.k, "queries": args.queries,
+        "n_lists": len(ivf._lists), "build_seconds": round(build_seconds, 3), "results": rows
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.n} vectors x {args.dim} dims, {len(ivf._lists)} lists, "
+          f"built in {build_seconds:.2f}s, {args.queries} queries, recall@{args.k}")
+    print(f"{'backend':<8}{'nprobe':>8}{'recall':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for row in rows:
+        nprobe = "-" if row["nprobe"] is None else row["nprobe"]
+        print(f"{row['backend']:<8}{nprobe:>8}{row['recall']:>10.3f}{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
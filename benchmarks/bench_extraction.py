@@ -0,0 +1,62 @@
+"""Compare serial and multi-process PDF extraction, cleaning and chunking.
+
+The serial baseline is the ingest path used below PDF_PARALLEL_MIN_PAGES or with one
+worker: DocumentProcessor extracting one page at a time with pypdf in this process.
+
+Usage:
+    python -m benchmarks.bench_extraction [path/to/file.pdf] [--workers 4] [--repeat 3]
+"""
+import argparse
+import time
+from typing import Any, Dict, List
+
+from src.core.extraction import clean_bengali_text, iter_pdf_chunks_parallel
+from src.core.processors import DocumentProcessor
+
+DEFAULT_PDF = "data/HSC26-Bangla1st-Paper.pdf"
+
+def run_serial(file_path: str) -> List[List[Dict[str, Any]]]:
+    return list(DocumentProcessor().iter_pdf_chunks(file_path, workers=1))
+
+def run_parallel(file_path: str, total_pages: int, workers: int) -> List[List[Dict[str, Any]]]:
+    return list(iter_pdf_chunks_parallel(file_path, total_pages, workers))
+
+def best_of(repeat: int, fn, *args) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from pypdf import PdfReader
+    reader = PdfReader(args.pdf)
+    total_pages = len(reader.pages)
+
+    # Extraction and cleaning timed separately to show where the time goes
+    started = time.perf_counter()
+    raw_pages = [page.extract_text() for page in reader.pages]
+    extract_seconds = time.perf_counter() - started
+    clean_seconds, _ = best_of(args.repeat, lambda: [clean_bengali_text(text) for text in raw_pages])
+
+    serial_seconds, serial = best_of(args.repeat, run_serial, args.pdf)
+    parallel_seconds, parallel = best_of(args.repeat, run_parallel, args.pdf, total_pages, args.workers)
+
+    chunks = sum(len(page) for page in serial)
+    print(f"{args.pdf}: {total_pages} pages, {sum(len(t) for t in raw_pages)} chars, {chunks} chunks")
+    print(f"  text extraction only : {extract_seconds:8.3f}s")
+    print(f"  cleaning only        : {clean_seconds * 1000:8.1f}ms")
+    print(f"  serial pipeline      : {serial_seconds:8.3f}s  ({total_pages / serial_seconds:7.1f} pages/s)")
+    print(f"  {f'{args.workers} workers pipeline':<21}: {parallel_seconds:8.3f}s  ({total_pages / parallel_seconds:7.1f} pages/s)")
+    print(f"  speedup              : {serial_seconds / parallel_seconds:8.2f}x")
+    print(f"  identical output     : {serial == parallel}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Memory and recall of int8 quantized search against exact float32 search.
+
+Usage:
+    python -m benchmarks.bench_quantization [path/to/file.pdf] [--embedder labse|hash]
+        [--queries 200] [--k 3] [--rerank 0 25 50 100 200] [--replicate 1] [--json]
+
+The corpus is the chunked PDF (the bundled textbook by default) and the queries are
+sentences sampled from it. `--embedder hash` is the model-free stand-in backend (character n-grams
+hashed into 2^16 features and projected to 768 dimensions) for machines without the LaBSE weights.
+`--replicate N` tiles the corpus with small perturbations to see how memory scales.
+"""
+import argparse
+import json
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from src.core.embedders import HashEmbedder
+from src.core.extraction import extract_page_range
+from src.core.quantization import QuantizedVectorIndex
+from src.core.sentence_index import split_sentences
+from src.core.vector_index import VectorIndex
+
+DEFAULT_PDF = "data/HSC26-Bangla1st-Paper.pdf"
+
+def embed(texts: List[str], embedder: str) -> np.ndarray:
+    if embedder == "hash":
+        return HashEmbedder().encode(texts)
+    from src.core.processors import EmbeddingManager
+    return EmbeddingManager().get_embeddings(texts)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF)
+    parser.add_argument("--embedder", choices=["labse", "hash"], default="labse")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--rerank", type=int, nargs="+", default=[0, 25, 50, 100, 200])
+    parser.add_argument("--replicate", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    from pypdf import PdfReader
+    pages = extract_page_range(args.pdf, 0, len(PdfReader(args.pdf).pages))
+    texts = [chunk["content"] for page in pages for chunk in page]
+    sentences = [s for text in texts for s in split_sentences(text) if len(s) > 20]
+    rng = np.random.default_rng(0)
+    query_texts = [sentences[i] for i in rng.choice(len(sentences), min(args.queries, len(sentences)), replace=False)]
+
+    corpus = embed(texts, args.embedder)
+    queries = embed(query_texts, args.embedder)
+    if args.replicate > 1:
+        noise = 0.05 * corpus.std()
+        corpus = np.concatenate([corpus] + [corpus + noise * rng.normal(size=corpus.shape).astype(np.float32)
+                                            for _ in range(args.replicate - 1)])
+    chunk_ids = list(range(len(corpus)))
+
+    exact = VectorIndex()
+    exact.add(chunk_ids, corpus)
+    exact_ids = [exact.search(query, args.k)[0] for query in queries]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        index = QuantizedVectorIndex(f"{directory}/vectors")
+        index.add(chunk_ids, corpus)
+        memory = index.memory_stats()
+        for rerank in args.rerank:
+            index.rerank_candidates = max(rerank, args.k)
+            hits, latencies = 0, []
+            for query, expected in zip(queries, exact_ids):
+                started = time.perf_counter()
+                if rerank == 0:
+                    # int8 scores alone, no full-precision pass
+                    approximate = index.quantizer.scores(index._codes[:len(index)], query / np.linalg.norm(query))
+                    ids = np.asarray(index._ids)[np.argsort(-approximate)[:args.k]]
+                else:
+                    ids, _ = index.search(query, args.k)
+                latencies.append(time.perf_counter() - started)
+                hits += len(np.intersect1d(ids, expected))
+            rows.append({
+                "rerank_candidates": rerank,
+                "recall": hits / (len(queries) * args.k),
+                "p50_ms": float(np.percentile(1000.0 * np.asarray(latencies), 50))
+            })
+
+    report = {"pdf": args.pdf, "embedder": args.embedder, "chunks": len(corpus), "dim": corpus.shape[1],
+              "queries": len(queries), "k": args.k, "memory": memory, "results": rows}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    saved = memory["float32_bytes"] - memory["int8_bytes"]
+    print(f"{len(corpus)} chunks x {corpus.shape[1]} dims ({args.embedder} embeddings), "
+          f"{len(queries)} sentence queries, recall@{args.k}")
+    print(f"search matrix: float32 {memory['float32_bytes'] / 2**20:.2f} MiB -> int8 "
+          f"{memory['int8_bytes'] / 2**20:.2f} MiB ({saved / 2**20:.2f} MiB saved)")
+    print(f"{'rerank':>8}{'recall':>10}{'p50 ms':>10}")
+    for row in rows:
+        print(f"{row['rerank_candidates']:>8}{row['recall']:>10.3f}{row['p50_ms']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
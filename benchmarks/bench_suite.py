@@ -0,0 +1,247 @@
+"""Offline benchmark suite: ingest throughput, retrieval latency, end-to-end /api/query
+latency under concurrent load and peak memory, on a synthetic Bengali corpus.
+
+Usage:
+    python -m benchmarks.bench_suite [--sizes 1000 10000 100000] [--queries 200]
+        [--requests 500] [--concurrency 16] [--output bench_results.json]
+        [--compare previous.json]
+
+Nothing is downloaded: embeddings come from the deterministic hash backend
+(EMBEDDING_BACKEND=hash, same 768 dimensions as LaBSE) and the corpus from
+benchmarks/corpus.py. Each size runs in a fresh process against a throwaway database
+and vector store, so peak memory is measured per size. Other settings (for example
+VECTOR_INDEX_BACKEND or VECTOR_QUANTIZATION) are taken from the environment as usual;
+the answer cache is off unless ANSWER_CACHE_SIZE is set, so every query is retrieved.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.corpus import SyntheticCorpus
+
+# Metrics shown by --compare: (section, key, True if higher is better)
+COMPARED_METRICS = [
+    ("ingest", "chunks_per_second", True),
+    ("retrieval", "p50_ms", False),
+    ("retrieval", "p99_ms", False),
+    ("end_to_end", "p50_ms", False),
+    ("end_to_end", "p99_ms", False),
+    ("end_to_end", "requests_per_second", True),
+    ("memory", "peak_rss_mb", False),
+]
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    milliseconds = 1000.0 * np.asarray(seconds)
+    return {
+        "count": len(seconds),
+        "mean_ms": round(float(milliseconds.mean()), 3),
+        "p50_ms": round(float(np.percentile(milliseconds, 50)), 3),
+        "p99_ms": round(float(np.percentile(milliseconds, 99)), 3),
+        "max_ms": round(float(milliseconds.max()), 3)
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+async def run_size(size: int, queries: int, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Benchmark one corpus size; expects the environment set up by `main`."""
+    from src.core.ingest import IngestPipeline
+    from src.core.processors import EmbeddingManager
+    from src.core.rag import RAGSystem
+    from src.database.models import Document, async_session, init_db
+
+    await init_db()
+    started = time.perf_counter()
+    corpus = SyntheticCorpus(size)
+    questions = corpus.questions(queries + requests)
+    generate_seconds = time.perf_counter() - started
+    embedding_manager = EmbeddingManager()
+
+    # Ingest: the full pipeline (embedding, bulk inserts, sentence rows, in-memory indexes)
+    async with async_session() as session:
+        document = Document(content="synthetic.pdf", filename="synthetic.pdf", doc_metadata=json.dumps({"type": "synthetic"}))
+        session.add(document)
+        await session.commit()
+        stats = await IngestPipeline(session, embedding_manager).run_stream(document.id, iter(corpus.pages()))
+    ingest = {
+        "chunks": stats["chunks_processed"],
+        "pages": stats["pages_processed"],
+        "seconds": stats["elapsed_seconds"],
+        "chunks_per_second": stats["chunks_per_second"],
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+    # Retrieval: RAGSystem._get_relevant_chunks one query at a time
+    latencies, hits = [], 0
+    async with async_session() as session:
+        rag_system = RAGSystem(session, embedding_manager=embedding_manager)
+        await rag_system._get_relevant_chunks(questions[0][0])  # Warm-up
+        for question, index, _ in questions[:queries]:
+            started = time.perf_counter()
+            chunks = await rag_system._get_relevant_chunks(question, n_results=3)
+            latencies.append(time.perf_counter() - started)
+            hits += any(chunk.content == corpus.texts[index] for chunk in chunks)
+    retrieval = {**latency_summary(latencies), "hit_rate_at_3": round(hits / max(queries, 1), 4)}
+
+    end_to_end = await run_end_to_end([question for question, _, _ in questions[queries:]], concurrency)
+
+    return {
+        "size": size,
+        "corpus_seconds": round(generate_seconds, 3),
+        "ingest": ingest,
+        "retrieval": retrieval,
+        "end_to_end": end_to_end,
+        "memory": {"peak_rss_mb": peak_rss_mb()}
+    }
+
+async def run_end_to_end(questions: List[str], concurrency: int) -> Dict[str, Any]:
+    """POST /api/query through the ASGI app in-process, `concurrency` requests at a time."""
+    import httpx
+    from src.api.main import app
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(client: "httpx.AsyncClient", question: str) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/api/query", json={"query": question})
+            latencies.append(time.perf_counter() - started)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    # The app's startup hook is not run: the indexes were filled by the ingest above
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await one(client, questions[0])  # Warm-up
+        latencies.clear()
+        statuses.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, question) for question in questions))
+        wall = time.perf_counter() - started
+    return {
+        **latency_summary(latencies),
+        "concurrency": concurrency,
+        "requests_per_second": round(len(questions) / wall, 2),
+        "status_codes": statuses
+    }
+
+def benchmark_in_subprocess(size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one size in a fresh interpreter with a throwaway database and vector store."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite+aiosqlite:///{directory}/bench.db"
+        if env.get("VECTOR_STORE_PATH", "data/vector_store"):
+            env["VECTOR_STORE_PATH"] = f"{directory}/vector_store"
+        env["ANN_INDEX_PATH"] = f"{directory}/ivf_index.npz"
+        part = f"{directory}/result.json"
+        command = [
+            sys.executable, "-m", "benchmarks.bench_suite", "--run-size", str(size), "--part", part,
+            "--queries", str(args.queries), "--requests", str(args.requests), "--concurrency", str(args.concurrency)
+        ]
+        subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL if args.quiet else None)
+        with open(part) as f:
+            return json.load(f)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print each compared metric next to the previous run's, flagging regressions over 10%."""
+    before = {result["size"]: result for result in previous["results"]}
+    print(f"\ncompared with {previous.get('git_commit') or 'previous run'} ({previous.get('created_at')})")
+    print(f"{'size':>8}  {'metric':<32}{'before':>12}{'after':>12}{'change':>9}")
+    for result in current["results"]:
+        old = before.get(result["size"])
+        if old is None:
+            continue
+        for section, key, higher_is_better in COMPARED_METRICS:
+            a, b = old.get(section, {}).get(key), result.get(section, {}).get(key)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            regressed = change < -0.1 if higher_is_better else change > 0.1
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{result['size']:>8}  {section + '.' + key:<32}{a:>12.2f}{b:>12.2f}{change:>+9.1%}{flag}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=200, help="sequential retrieval queries per size")
+    parser.add_argument("--requests", type=int, default=500, help="end-to-end /api/query requests per size")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--quiet", action="store_true", help="hide the application's own output")
+    # Internal: run a single size in this process and write its result to --part
+    parser.add_argument("--run-size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--part", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_size is not None:
+        result = asyncio.run(run_size(args.run_size, args.queries, args.requests, args.concurrency))
+        with open(args.part, "w") as f:
+            json.dump(result, f)
+        return
+
+    # Offline defaults, inherited by every size's process and recorded in the report
+    os.environ.setdefault("EMBEDDING_BACKEND", "hash")
+    os.environ.setdefault("EMBEDDING_WARMUP", "false")
+    os.environ.setdefault("ANSWER_CACHE_SIZE", "0")
+
+    results = []
+    for size in args.sizes:
+        result = benchmark_in_subprocess(size, args)
+        results.append(result)
+        ingest, retrieval, end_to_end = result["ingest"], result["retrieval"], result["end_to_end"]
+        print(
+            f"{size:>8} chunks | ingest {ingest['chunks_per_second']:>8.1f} chunks/s | "
+            f"retrieval p50 {retrieval['p50_ms']:.2f} p99 {retrieval['p99_ms']:.2f} ms "
+            f"hit@3 {retrieval['hit_rate_at_3']:.2f} | /api/query x{end_to_end['concurrency']} "
+            f"p50 {end_to_end['p50_ms']:.1f} p99 {end_to_end['p99_ms']:.1f} ms "
+            f"{end_to_end['requests_per_second']:.0f} req/s | peak RSS {result['memory']['peak_rss_mb']:.0f} MB"
+        )
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            name: os.environ.get(name)
+            for name in (
+                "EMBEDDING_BACKEND", "ANSWER_CACHE_SIZE", "VECTOR_INDEX_BACKEND", "VECTOR_STORE_PATH",
+                "VECTOR_QUANTIZATION", "HYBRID_RETRIEVAL"
+            )
+        },
+        "queries": args.queries,
+        "requests": args.requests,
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
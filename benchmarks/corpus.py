@@ -0,0 +1,94 @@
+"""Deterministic synthetic Bengali corpus for offline benchmarks.
+
+Words are drawn from a Zipf distribution over a vocabulary of real Bengali words
+(names and common words from the bundled textbook) padded with generated
+pseudo-words, so term statistics look like natural text at any corpus size.
+Chunks are ~300 characters of danda-terminated sentences, like the PDF chunker's output.
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+SEED_WORDS = [
+    "অনুপম", "কল্যাণী", "শম্ভুনাথ", "মামা", "হরিশ", "বিনুদা", "মা", "বাবা", "বিয়ে", "গহনা",
+    "কলকাতা", "কানপুর", "স্টেশন", "ট্রেন", "গল্প", "লেখক", "রবীন্দ্রনাথ", "ঠাকুর", "অপরিচিতা",
+    "বয়স", "বছর", "মেয়ে", "ছেলে", "পরিবার", "সমাজ", "যৌতুক", "প্রথা", "শিক্ষা", "দেশ",
+    "মানুষ", "সময়", "কথা", "দিন", "রাত", "বাড়ি", "পথ", "মন", "জীবন", "ভাগ্য", "দেবতা",
+    "সুপুরুষ", "পণ্ডিত", "ঘটনা", "চরিত্র", "আমি", "তিনি", "সে", "তারা", "এবং", "কিন্তু",
+    "যে", "না", "করে", "ছিল", "হয়", "বলে", "দিয়ে", "থেকে", "জন্য", "সঙ্গে"
+]
+CONSONANTS = list("কখগঘচছজঝটঠডঢণতথদধনপফবভমযরলশষসহ")
+VOWEL_SIGNS = ["", "া", "ি", "ী", "ু", "ূ", "ে", "ো"]
+QUESTION_WORDS = ["কে", "কী", "কোথায়", "কখন", "কেন", "কত"]
+
+class SyntheticCorpus:
+    """Pages of chunks plus questions whose answer chunk is known, all from one seed."""
+
+    def __init__(self, n_chunks: int, chunks_per_page: int = 4, vocabulary_size: int = 20000, seed: int = 0):
+        self.n_chunks = n_chunks
+        self.chunks_per_page = chunks_per_page
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self.vocabulary = SEED_WORDS + _pseudo_words(rng, vocabulary_size - len(SEED_WORDS))
+        ranks = np.arange(1, len(self.vocabulary) + 1)
+        self._word_cdf = np.cumsum(1.0 / ranks ** 1.1)
+        self._word_cdf /= self._word_cdf[-1]
+        self.texts = [self._chunk_text(rng) for _ in range(n_chunks)]
+
+    def pages(self, source: str = "synthetic.pdf") -> List[List[Dict[str, Any]]]:
+        """Chunks grouped into pages, in the format DocumentProcessor.iter_pdf_chunks yields."""
+        pages = []
+        for page, start in enumerate(range(0, self.n_chunks, self.chunks_per_page)):
+            texts = self.texts[start:start + self.chunks_per_page]
+            pages.append([
+                {
+                    "content": text,
+                    "metadata": {"page": page, "chunk_id": i, "source": source, "total_chunks": len(texts)}
+                }
+                for i, text in enumerate(texts)
+            ])
+        return pages
+
+    def questions(self, n: int, seed: int = 1) -> List[Tuple[str, int, str]]:
+        """(question, index of the chunk it was drawn from, sentence it was drawn from) triples."""
+        rng = np.random.default_rng(seed)
+        questions = []
+        for index in rng.integers(0, self.n_chunks, size=n):
+            sentences = [s.strip() for s in self.texts[index].split("।") if s.strip()]
+            sentence = sentences[int(rng.integers(len(sentences)))]
+            words = sentence.split()
+            # Keep most of the sentence's words, in order, and ask about it
+            keep = np.sort(rng.choice(len(words), max(3, int(0.7 * len(words))), replace=False))
+            question = " ".join(words[i] for i in keep) + " " + QUESTION_WORDS[int(rng.integers(len(QUESTION_WORDS)))] + "?"
+            questions.append((question, int(index), sentence))
+        return questions
+
+    def _chunk_text(self, rng: np.random.Generator, target_chars: int = 300) -> str:
+        # Draw more words than a chunk needs in one call; inverse-CDF sampling keeps it cheap
+        words = [self.vocabulary[i] for i in np.searchsorted(self._word_cdf, rng.random(80))]
+        lengths = rng.integers(6, 15, size=len(words))
+        sentences = []
+        position = length = 0
+        for sentence_length in lengths:
+            if length >= target_chars or position >= len(words):
+                break
+            sentence = " ".join(words[position:position + sentence_length])
+            sentences.append(sentence)
+            position += sentence_length
+            length += len(sentence) + 2
+        return "। ".join(sentences) + "।"
+
+def _pseudo_words(rng: np.random.Generator, count: int) -> List[str]:
+    """Unique pronounceable-looking Bengali words of two to four syllables."""
+    words: List[str] = []
+    seen = set(SEED_WORDS)
+    while len(words) < count:
+        syllables = int(rng.integers(2, 5))
+        word = "".join(
+            CONSONANTS[int(rng.integers(len(CONSONANTS)))] + VOWEL_SIGNS[int(rng.integers(len(VOWEL_SIGNS)))]
+            for _ in range(syllables)
+        )
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
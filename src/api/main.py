@@ -1,21 +1,80 @@
-from fastapi import FastAPI, File, UploadFile, Depends, HTTPException
+from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, BackgroundTasks
+from fastapi import Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-import json
+import os
+import random
+import tempfile
+import time
 
-from src.database.models import get_session, Document, DocumentChunk, init_db
-from src.core.rag import RAGSystem
-from src.core.processors import DocumentProcessor, EmbeddingManager
+from src.database.models import get_session, async_session, init_db
+from src.database.migrations import add_missing_columns, run_data_migrations
+from src.core.rag import RAGSystem, RetrievalFilter, PageFilterUnavailable
+from src.core.processors import EmbeddingManager
+from src.core.vector_index import get_vector_index
+from src.core.ingest import ingest_file, run_ingest_job
+from src.core.jobs import get_job_registry
+from src.core.sentence_index import get_sentence_index
+from src.core.lexical_index import get_lexical_index
+from src.core.executor import ExecutorOverloaded, get_query_executor, get_ingest_executor
+from src.core.batcher import EmbeddingBatcher
+from src.core.model_registry import warmup_embedding_model, get_model_stats
+from src.core.cache import get_embedding_cache, get_answer_cache
+from src.core.history import get_chat_history_writer
+from src.core.metrics import get_metrics, collect_request_timings, server_timing_header
+from src.core import config
 
 app = FastAPI(title="Bengali RAG System API")
 
+# Uploads are copied to disk in pieces of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+_embedding_manager: Optional[EmbeddingManager] = None
+_embedding_batcher: Optional[EmbeddingBatcher] = None
+
+def get_embedding_manager() -> EmbeddingManager:
+    """Return the embedding manager shared by all requests."""
+    global _embedding_manager
+    if _embedding_manager is None:
+        _embedding_manager = EmbeddingManager()
+    return _embedding_manager
+
+def get_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    """Return the query embedding micro-batcher, or None when batching is disabled."""
+    global _embedding_batcher
+    if _embedding_batcher is None and config.EMBED_BATCH_MAX_WAIT_MS > 0:
+        _embedding_batcher = EmbeddingBatcher(
+            get_embedding_manager(),
+            max_batch_size=config.EMBED_BATCH_MAX_SIZE,
+            max_wait_ms=config.EMBED_BATCH_MAX_WAIT_MS
+        )
+    return _embedding_batcher
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize the database on startup"""
+    """Initialize the database and load the vector index on startup"""
     await init_db()
+    async with async_session() as session:
+        # Data now survives restarts, so bring older databases up to the current schema
+        added = await add_missing_columns(session)
+        if added:
+            print(f"Added columns: {', '.join(added)}")
+        # Full-table data migrations run once per database, not on every restart
+        await run_data_migrations(session)
+        indexed = await get_vector_index().load(session, EmbeddingManager.deserialize_embedding)
+        sentences = await get_sentence_index().load(session)
+        await get_lexical_index().load(session)
+    print(f"Vector index loaded with {indexed} chunks, sentence index with {sentences} sentences")
+    if config.EMBEDDING_WARMUP:
+        warmup_embedding_model()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write any chat history still queued before the process exits"""
+    await get_chat_history_writer().close()
 
 # Add CORS middleware
 app.add_middleware(
@@ -26,9 +85,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Time every request, count it per route and optionally report stage timings to the client."""
+    metrics = get_metrics()
+    start = time.perf_counter()
+    with collect_request_timings() as timings:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    
+    # Route templates keep ids (e.g. ingest job ids) out of the metric labels
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    metrics.observe(path, elapsed, family="request")
+    metrics.increment("requests", path=path)
+    if response.status_code >= 500:
+        metrics.increment("request_errors", path=path)
+    
+    if config.SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing_header({**timings, "total": elapsed})
+    return response
+
 class QueryRequest(BaseModel):
     query: str
     chat_history: Optional[List[Dict[str, str]]] = None
+    # Optional retrieval filters; pages are 1-based and inclusive
+    document_ids: Optional[List[int]] = None
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    # Score the answer inline; None leaves it to EVALUATION_SAMPLE_RATE
+    evaluate: Optional[bool] = None
 
 class QueryResponse(BaseModel):
     answer: str
@@ -36,15 +122,33 @@ class QueryResponse(BaseModel):
     source_contexts: Optional[List[Dict[str, Any]]] = None
     language: str = "en"  # "en" for English, "bn" for Bengali
 
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    n_results: int = 3
+
+class BatchQueryResult(BaseModel):
+    query: str
+    answer: str
+    source_chunk_ids: List[int]
+    scores: List[float]
+    cached: bool
+    timing_ms: Dict[str, float]
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchQueryResult]
+    elapsed_ms: float
+
 @app.post("/api/query", response_model=QueryResponse)
 async def process_query(
     request: QueryRequest,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    embedding_manager: EmbeddingManager = Depends(get_embedding_manager),
+    batcher: Optional[EmbeddingBatcher] = Depends(get_embedding_batcher)
 ):
     """Process a user query in Bengali or English and return the response with evaluation metrics."""
     try:
         # Initialize RAG system
-        rag_system = RAGSystem(session)
+        rag_system = RAGSystem(session, embedding_manager=embedding_manager, batcher=batcher)
         
         # Detect language and validate query
         is_bengali = any('\u0980' <= c <= '\u09FF' for c in request.query)
@@ -53,34 +157,43 @@ async def process_query(
                 status_code=400, 
                 detail="Query too short. Please provide a more detailed question."
             )
-            
-        # Process query and get response
-        response = await rag_system.process_query(request.query, request.chat_history)
+        if (request.page_from is not None and request.page_from < 1) or (
+            request.page_from is not None and request.page_to is not None and request.page_to < request.page_from
+        ):
+            raise HTTPException(status_code=400, detail="Invalid page range.")
         
-        # Get relevant chunks for context and evaluation
-        relevant_chunks = await rag_system._get_relevant_chunks(
+        filters = None
+        if request.document_ids is not None or request.page_from is not None or request.page_to is not None:
+            filters = RetrievalFilter(request.document_ids, request.page_from, request.page_to)
+            
+        # Process query and get response, retrieving once at the largest k any stage needs
+        response, retrieval = await rag_system.answer_query(
             request.query,
-            n_results=5 if is_bengali else 3  # More context for Bengali queries
+            request.chat_history,
+            n_results=5 if is_bengali else 3,  # More context for Bengali queries
+            filters=filters
         )
         
-        # Evaluate response quality
-        evaluation = await rag_system.evaluate_response(
-            request.query,
-            response,
-            relevant_chunks
-        )
+        # Evaluate response quality only when asked or sampled; question banks are scored offline
+        evaluation = None
+        if request.evaluate or (request.evaluate is None and random.random() < config.EVALUATION_SAMPLE_RATE):
+            evaluation = await rag_system.evaluate_response(
+                request.query,
+                response,
+                retrieval.chunks,
+                query_embedding=retrieval.query_embedding
+            )
+            get_metrics().increment("live_evaluations")
         
-        # Get source context for response
+        # Get source context for response; documents were joined in with the chunks
         source_contexts = []
-        for chunk in relevant_chunks:
-            doc_id = chunk.document_id
-            stmt = select(Document).where(Document.id == doc_id)
-            result = await session.execute(stmt)
-            document = result.scalar_one_or_none()
-            if document:
+        for chunk, score in zip(retrieval.chunks, retrieval.scores):
+            if chunk.document is not None:
                 source_contexts.append({
-                    "document": document.doc_metadata,
-                    "relevance_score": evaluation.get("relevance", 0)
+                    "document": chunk.document.doc_metadata,
+                    "document_id": chunk.document_id,
+                    "page": chunk.page + 1 if chunk.page is not None else None,
+                    "relevance_score": float(score)
                 })
         
         return QueryResponse(
@@ -90,83 +203,162 @@ async def process_query(
             language="bn" if is_bengali else "en"
         )
         
+    except HTTPException:
+        raise
+    except PageFilterUnavailable as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         await session.close()
 
-@app.post("/api/ingest")
-async def ingest_document(
-    file: UploadFile = File(...),
-    session: AsyncSession = Depends(get_session)
+@app.post("/api/query/batch", response_model=BatchQueryResponse)
+async def process_query_batch(
+    request: BatchQueryRequest,
+    session: AsyncSession = Depends(get_session),
+    embedding_manager: EmbeddingManager = Depends(get_embedding_manager)
 ):
-    """Ingest a PDF document into the system."""
+    """Answer a list of queries in one pass; results are returned in input order."""
     try:
-        # Save uploaded file
-        file_location = f"data/{file.filename}"
-        with open(file_location, "wb+") as file_object:
-            file_object.write(await file.read())
-        
-        # Process document
-        doc_processor = DocumentProcessor()
-        embedding_manager = EmbeddingManager()
+        if len(request.queries) > config.QUERY_BATCH_MAX_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many queries. At most {config.QUERY_BATCH_MAX_SIZE} are allowed per batch."
+            )
+        if not 1 <= request.n_results <= config.QUERY_BATCH_MAX_RESULTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"n_results must be between 1 and {config.QUERY_BATCH_MAX_RESULTS}."
+            )
         
-        # Process the PDF into chunks
-        chunks = await doc_processor.process_pdf(file_location)
+        start = time.perf_counter()
+        rag_system = RAGSystem(session, embedding_manager=embedding_manager)
+        results = await rag_system.process_queries(request.queries, n_results=request.n_results)
         
-        # Create document entry
-        document = Document(
-            content=file_location,
-            doc_metadata=json.dumps({"filename": file.filename, "type": "pdf"})
+        return BatchQueryResponse(
+            results=results,
+            elapsed_ms=round((time.perf_counter() - start) * 1000, 3)
         )
-        session.add(document)
-        await session.flush()  # Get the document ID
+    except HTTPException:
+        raise
+    except ExecutorOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await session.close()
+
+@app.post("/api/ingest")
+async def ingest_document(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    background: bool = False,
+    replace: bool = False,
+    embedding_manager: EmbeddingManager = Depends(get_embedding_manager)
+):
+    """Ingest a PDF document into the system; with background=true, return a job id immediately.
+
+    With replace=true the upload is a new edition of the document last ingested under the
+    same filename; otherwise it is stored as a new document.
+    """
+    try:
+        # Save the upload in fixed-size pieces to a file of its own, so concurrent uploads of the
+        # same name never share one; the ingest moves it to data/<filename> when it finishes
+        filename = os.path.basename(file.filename)
+        destination = os.path.join("data", filename)
+        fd, upload_path = tempfile.mkstemp(dir="data", prefix=".upload-", suffix=".pdf")
+        with os.fdopen(fd, "wb") as file_object:
+            while piece := await file.read(UPLOAD_CHUNK_SIZE):
+                file_object.write(piece)
         
-        # Process and store chunks with embeddings
-        for chunk in chunks:
-            # Generate embedding
-            embedding = embedding_manager.get_embeddings([chunk['content']])[0]
-            embedding_str = embedding_manager.serialize_embedding(embedding)
-            
-            # Create chunk entry
-            doc_chunk = DocumentChunk(
-                document_id=document.id,
-                content=chunk['content'],
-                embedding=embedding_str
+        job = get_job_registry().create(filename)
+        if background:
+            background_tasks.add_task(
+                run_ingest_job, job, upload_path, filename, embedding_manager, destination, replace
+            )
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "message": "Document ingestion started",
+                    "job_id": job.id,
+                    "status_url": f"/api/ingest/{job.id}"
+                }
             )
-            session.add(doc_chunk)
         
-        await session.commit()
+        # Stream pages -> chunks -> embedding batches -> DB writes
+        try:
+            stats = await ingest_file(
+                job, upload_path, filename, embedding_manager, destination=destination, replace=replace
+            )
+        except Exception as e:
+            job.fail(e)
+            raise
         
         return {
             "message": "Document ingested successfully",
             "details": {
-                "document_id": document.id,
-                "chunks_processed": len(chunks),
-                "filename": file.filename
+                "job_id": job.id,
+                "document_id": job.document_id,
+                "pages_processed": stats["pages_processed"],
+                "chunks_processed": stats["chunks_processed"],
+                "chunks_added": stats["chunks_added"],
+                "chunks_reused": stats["chunks_reused"],
+                "chunks_removed": stats["chunks_removed"],
+                "unchanged": stats["unchanged"],
+                "chunks_per_second": stats["chunks_per_second"],
+                "filename": filename
             }
         }
+    except ExecutorOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        await session.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        await session.close()
+
+@app.get("/api/ingest/{job_id}")
+async def get_ingest_status(job_id: str):
+    """Report progress of an ingest job."""
+    job = get_job_registry().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job.to_dict()
 
 @app.get("/api/evaluate")
 async def get_system_metrics(session: AsyncSession = Depends(get_session)):
     """Get system-wide evaluation metrics."""
     try:
-        # Implement system-wide evaluation logic here
-        # This could include:
-        # - Average response time
-        # - Average evaluation scores
-        # - Number of successful queries
-        # - etc.
         return {
             "message": "System evaluation metrics retrieved successfully",
             "metrics": {
-                "status": "operational"
+                "status": "operational",
+                # Request and per-stage latency percentiles, request and cache-hit counters
+                **get_metrics().snapshot(),
+                "embedding_model": get_model_stats(),
+                "embedding_cache": get_embedding_cache().stats(),
+                "answer_cache": get_answer_cache().stats(),
+                "embedding_batcher": _embedding_batcher.stats() if _embedding_batcher else None,
+                "chat_history_writer": get_chat_history_writer().stats(),
+                "executors": {
+                    "query": get_query_executor().stats(),
+                    "ingest": get_ingest_executor().stats()
+                }
             }
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Expose latency histograms and counters in the Prometheus text format."""
+    embedding_cache = get_embedding_cache().stats()
+    answer_cache = get_answer_cache().stats()
+    gauges = {
+        "embedding_cache_hits": embedding_cache["hits"],
+        "embedding_cache_misses": embedding_cache["misses"],
+        "answer_cache_size": answer_cache["size"],
+        "answer_cache_near_duplicate_hits": answer_cache["near_duplicate_hits"],
+        "chat_history_queued": get_chat_history_writer().stats()["queued"],
+        "query_executor_pending": get_query_executor().stats()["pending"]
+    }
+    return PlainTextResponse(get_metrics().prometheus(gauges), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,309 @@
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import os
+import threading
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from src.database.models import DocumentChunk
+from src.core.vector_index import VectorIndex, _normalize, _top_k
+
+# Rows scored per matrix product while assigning vectors to centroids
+ASSIGN_BATCH_SIZE = 65536
+# Append-only side files next to `path` holding the persisted rows: (suffix, dtype)
+ROW_FILES = [(".f32", np.float32), (".ids", np.int64), (".docs", np.int64)]
+
+
+class IVFIndex(VectorIndex):
+    """IVF-flat index: vectors are bucketed by their nearest k-means centroid and a
+    query scans only the `nprobe` closest buckets instead of the whole matrix."""
+
+    def __init__(
+        self,
+        n_lists: int = 0,
+        nprobe: int = 8,
+        min_train_size: int = 10000,
+        path: Optional[str] = None,
+        initial_capacity: int = 1024,
+        seed: int = 0
+    ):
+        super().__init__(initial_capacity)
+        self.n_lists = n_lists  # 0 = sqrt(number of vectors) at training time
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.path = path
+        self.seed = seed
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[np.ndarray]] = []  # matrix rows per centroid, in appended pieces
+        self._trained_size = 0
+        self._training = False  # k-means is running outside the lock
+        self._layout = 0  # Bumped whenever existing rows move (remove, clear, restore)
+        self._persist_lock = threading.Lock()
+        self._persisted_rows = 0  # Rows already in the side files
+        self._persisted_layout: Optional[int] = None  # Layout the side files were written with
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self._centroids = None
+            self._lists = []
+            self._trained_size = 0
+            self._layout += 1
+
+    def add(
+        self,
+        chunk_ids: Sequence[int],
+        embeddings: Sequence[np.ndarray],
+        document_ids: Optional[Sequence[int]] = None
+    ) -> None:
+        """Append embeddings and file them under their nearest centroid, (re)training as the index grows."""
+        with self._lock:
+            start = self._size
+            super().add(chunk_ids, embeddings, document_ids)
+            if self.trained:
+                self._assign(start, self._size)
+            # Retrain once the corpus has grown well past what the centroids were fitted on
+            if self._size < self.min_train_size or self._training:
+                return
+            if self.trained and self._size <= 4 * self._trained_size:
+                return
+            self._training = True
+        self.train()
+
+    def remove(self, chunk_ids: Sequence[int]) -> int:
+        """Compact out the given chunks and renumber the inverted lists to match."""
+        with self._lock:
+            keep = self._keep_mask(chunk_ids)
+            if keep is None:
+                return 0
+            new_rows = np.cumsum(keep) - 1
+            self._layout += 1
+            if self.trained:
+                for index in range(len(self._lists)):
+                    rows = self._list_rows(index)
+                    self._lists[index] = [new_rows[rows[keep[rows]]]]
+            return super().remove(chunk_ids)
+
+    def train(self) -> None:
+        """Fit centroids on the current vectors and rebuild every inverted list.
+
+        k-means and the assignment run on a snapshot outside the lock, so searches keep using
+        the old lists meanwhile; the new ones are swapped in unless rows were removed since.
+        """
+        with self._lock:
+            self._training = True
+            size, layout = self._size, self._layout
+            # Rows below `size` only change in place on remove (which bumps the layout); a growing
+            # matrix is reallocated, leaving this view intact
+            matrix = self._matrix[:size] if self._matrix is not None else None
+        try:
+            if size == 0:
+                return
+            n_lists = self.n_lists or int(np.sqrt(size))
+            n_lists = max(1, min(n_lists, size))
+            centroids = train_kmeans(matrix, n_lists, seed=self.seed)
+            lists: List[List[np.ndarray]] = [[] for _ in range(n_lists)]
+            _assign_rows(matrix, 0, centroids, lists)
+            with self._lock:
+                if self._layout != layout:
+                    return  # Stale snapshot; the next add retrains
+                self._centroids = centroids
+                self._lists = lists
+                self._trained_size = size
+                # Rows added while training
+                self._assign(size, self._size)
+        finally:
+            with self._lock:
+                self._training = False
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 3,
+        document_ids: Optional[Sequence[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the approximate top-k chunks from the `nprobe` closest inverted lists."""
+        with self._lock:
+            if not self.trained or k <= 0 or document_ids is not None:
+                # A document partition is small enough to scan exactly
+                return super().search(query_embedding, k, document_ids)
+            query = _normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+            rows = self._probe(query)
+            if len(rows) < k:
+                # Too few candidates in the probed lists; an exact scan is the only way to fill k
+                return super().search(query_embedding, k)
+            scores = self._matrix[rows] @ query
+            ids = self._ids[rows]
+
+        return _top_k(ids, scores, k)
+
+    def search_many(self, query_embeddings: np.ndarray, k: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """Probe each query's lists separately and stack the results."""
+        if not self.trained or k <= 0 or len(query_embeddings) == 0:
+            return super().search_many(query_embeddings, k)
+        results = [self.search(query, k) for query in query_embeddings]
+        return np.stack([ids for ids, _ in results]), np.stack([scores for _, scores in results])
+
+    async def load(self, session: AsyncSession, deserialize: Callable[[Any], np.ndarray]) -> int:
+        """Load the persisted index if it matches the stored chunks, otherwise rebuild and persist it."""
+        result = await session.execute(select(DocumentChunk.id).where(DocumentChunk.deleted_at.is_(None)))
+        stored_ids = np.sort(np.asarray(result.scalars().all(), dtype=np.int64))
+
+        if self.path and os.path.exists(self.path):
+            try:
+                self._restore(self.path)
+                if np.array_equal(np.sort(self._ids[:self._size]), stored_ids):
+                    return self._size
+                print(f"Persisted vector index at {self.path} is out of date, rebuilding")
+            except Exception as e:
+                print(f"Error reading persisted vector index {self.path}: {e}")
+
+        count = await super().load(session, deserialize)
+        self.persist()
+        return count
+
+    def persist(self) -> None:
+        """Write the index next to `path`: rows added since the last call are appended to the
+        side files, then the centroids and inverted lists (8 bytes per row) are atomically
+        replaced in `path`. The side files are rewritten only after rows were removed."""
+        if not self.path:
+            return
+        with self._persist_lock:
+            with self._lock:
+                if self._matrix is None:
+                    return
+                rewrite = self._persisted_layout != self._layout
+                start = 0 if rewrite else self._persisted_rows
+                rows = slice(start, self._size)
+                new_rows = [self._matrix[rows].copy(), self._ids[rows].copy(), self._document_ids[rows].copy()]
+                lists = [self._list_rows(index) for index in range(len(self._lists))]
+                arrays = {
+                    "rows": np.asarray(self._size),
+                    "dim": np.asarray(self._matrix.shape[1]),
+                    "trained_size": np.asarray(self._trained_size),
+                    "list_offsets": np.cumsum([0] + [len(rows) for rows in lists]),
+                    "list_rows": np.concatenate(lists) if lists else np.empty(0, dtype=np.int64)
+                }
+                if self.trained:
+                    arrays["centroids"] = self._centroids
+                size, layout = self._size, self._layout
+
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            for (suffix, dtype), data in zip(ROW_FILES, new_rows):
+                _write_rows(self.path + suffix, np.ascontiguousarray(data, dtype=dtype), start, rewrite)
+            # Written last: rows past its `rows` count (an interrupted append) are ignored on restore
+            tmp_path = self.path + ".tmp.npz"
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, self.path)
+            self._persisted_rows, self._persisted_layout = size, layout
+
+    def _restore(self, path: str) -> None:
+        with np.load(path) as data:
+            if "rows" not in data.files:
+                raise ValueError("index predates incremental persistence")
+            size, dim = int(data["rows"]), int(data["dim"])
+            centroids = data["centroids"] if "centroids" in data.files else None
+            offsets, list_rows = data["list_offsets"], data["list_rows"]
+            trained_size = int(data["trained_size"])
+        matrix, ids, document_ids = (
+            _read_rows(path + suffix, dtype, size * (dim if dtype is np.float32 else 1))
+            for suffix, dtype in ROW_FILES
+        )
+        if len(list_rows) and int(list_rows.max()) >= size:
+            raise ValueError("inverted lists do not match the stored rows")
+
+        with self._lock:
+            super().clear()
+            super().add(ids.tolist(), matrix.reshape(size, dim), document_ids)
+            self._centroids = centroids
+            self._trained_size = trained_size
+            self._lists = [[list_rows[offsets[i]:offsets[i + 1]]] for i in range(len(offsets) - 1)]
+            self._layout += 1
+            self._persisted_rows, self._persisted_layout = size, self._layout
+
+    def _probe(self, query: np.ndarray) -> np.ndarray:
+        """Return the matrix rows stored under the `nprobe` centroids closest to the query."""
+        centroid_scores = self._centroids @ query
+        nprobe = min(self.nprobe, len(centroid_scores))
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        return np.concatenate([self._list_rows(index) for index in probe])
+
+    def _list_rows(self, index: int) -> np.ndarray:
+        """Concatenate the pieces of one inverted list, caching the result."""
+        pieces = self._lists[index]
+        if len(pieces) != 1:
+            self._lists[index] = [np.concatenate(pieces) if pieces else np.empty(0, dtype=np.int64)]
+        return self._lists[index][0]
+
+    def _assign(self, start: int, end: int) -> None:
+        """File matrix rows [start, end) under their nearest centroid."""
+        _assign_rows(self._matrix[start:end], start, self._centroids, self._lists)
+
+
+def _assign_rows(vectors: np.ndarray, offset: int, centroids: np.ndarray, lists: List[List[np.ndarray]]) -> None:
+    """Append the row numbers (`offset` + position) of `vectors` to the list of their nearest centroid."""
+    for batch_start in range(0, len(vectors), ASSIGN_BATCH_SIZE):
+        batch = vectors[batch_start:batch_start + ASSIGN_BATCH_SIZE]
+        labels = np.argmax(batch @ centroids.T, axis=1)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+        rows = np.arange(offset + batch_start, offset + batch_start + len(batch), dtype=np.int64)[order]
+        for index in np.flatnonzero(np.diff(bounds)):
+            lists[index].append(rows[bounds[index]:bounds[index + 1]])
+
+
+def _write_rows(path: str, data: np.ndarray, start: int, rewrite: bool) -> None:
+    """Append rows from `start` on to a side file, dropping anything an interrupted append left
+    past `start`; with `rewrite` the file is replaced atomically instead."""
+    if rewrite:
+        tmp_path = path + ".tmp"
+        data.tofile(tmp_path)
+        os.replace(tmp_path, path)
+        return
+    row_bytes = data.itemsize * (data.shape[1] if data.ndim == 2 else 1)
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        f.truncate(start * row_bytes)
+        f.seek(start * row_bytes)
+        f.write(data.tobytes())
+
+
+def _read_rows(path: str, dtype: Any, count: int) -> np.ndarray:
+    """Read the first `count` values of a side file."""
+    data = np.fromfile(path, dtype=dtype, count=count)
+    if len(data) < count:
+        raise ValueError(f"{path} holds fewer rows than the index")
+    return data
+
+
+def train_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    n_iter: int = 10,
+    max_points_per_cluster: int = 256,
+    seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means on unit vectors; returns (n_clusters, dim) unit centroids."""
+    rng = np.random.default_rng(seed)
+    # A bounded sample per centroid is enough to place it and keeps training time flat
+    sample_size = min(len(vectors), n_clusters * max_points_per_cluster)
+    sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    centroids = sample[rng.choice(sample_size, n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=n_clusters)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+        centroids[filled] = np.add.reduceat(sample[order], starts, axis=0)
+        # Re-seed empty clusters with random sample points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+        centroids = _normalize(centroids)
+
+    return centroids.astype(np.float32)
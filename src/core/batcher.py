@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import time
+import numpy as np
+
+from src.core.processors import EmbeddingManager
+from src.core.executor import BoundedExecutor, get_query_executor
+
+class EmbeddingBatcher:
+    """Collects single-text embedding requests arriving within a short window and encodes them together."""
+
+    def __init__(
+        self,
+        embedding_manager: EmbeddingManager,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor: Optional[BoundedExecutor] = None
+    ):
+        self.embedding_manager = embedding_manager
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor if executor is not None else get_query_executor()
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.Handle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        # Statistics for tuning the latency/throughput trade-off
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Return the embedding for one text, sharing an encode call with concurrent requests."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Hand the current batch to the executor and reset the window."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        if self._pending:
+            # More than one batch arrived at once; keep draining
+            self._timer = asyncio.get_running_loop().call_soon(self._flush)
+        if batch:
+            # Hold a reference so the task is not garbage collected mid-flight
+            task = asyncio.ensure_future(self._encode(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _encode(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        waits = [started - enqueued for _, _, enqueued in batch]
+        self.batches += 1
+        self.items += len(batch)
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+        self.batch_size_histogram[len(batch)] = self.batch_size_histogram.get(len(batch), 0) + 1
+        self.total_queue_wait += sum(waits)
+        self.max_queue_wait = max(self.max_queue_wait, max(waits))
+
+        try:
+            embeddings = await self.executor.run(
+                self.embedding_manager.get_embeddings,
+                [text for text, _, _ in batch],
+                batch_size=len(batch)
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_observed_batch": self.max_observed_batch,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "avg_queue_wait_ms": 1000.0 * self.total_queue_wait / self.items if self.items else 0.0,
+            "max_queue_wait_ms": 1000.0 * self.max_queue_wait,
+            "queued": len(self._pending)
+        }
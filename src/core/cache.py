@@ -0,0 +1,201 @@
+from typing import Any, Dict, Hashable, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import hashlib
+import re
+import threading
+import time
+import numpy as np
+
+from src.core import config
+
+class LRUCache:
+    """Thread-safe bounded mapping with least-recently-used eviction and hit/miss counters."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value and mark it as recently used, or None on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond max_size."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def values(self) -> List[Any]:
+        """Return a snapshot of the cached values without touching recency or counters."""
+        with self._lock:
+            return list(self._entries.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class EmbeddingCache(LRUCache):
+    """LRU cache of embeddings keyed by a hash of the normalized text."""
+
+    @staticmethod
+    def key(normalized_text: str) -> str:
+        return hashlib.sha1(normalized_text.encode("utf-8")).hexdigest()
+
+    def put(self, key: Hashable, value: np.ndarray) -> None:
+        # Cached vectors are shared between callers, so make them immutable
+        value = np.array(value, copy=True)
+        value.setflags(write=False)
+        super().put(key, value)
+
+_TRAILING_PUNCTUATION = re.compile(r'[\s?!.।]+$')
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for exact-match caching (whitespace, case and trailing punctuation)."""
+    return _TRAILING_PUNCTUATION.sub('', ' '.join(query.split()).casefold())
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    source_chunk_ids: List[int]
+    source_scores: List[float]
+    generation: int
+    created_at: float = field(default_factory=time.monotonic)
+    query_embedding: Optional[np.ndarray] = None
+
+class AnswerCache:
+    """Cache of final answers keyed on the normalized query, with near-duplicate lookup by embedding.
+
+    Entries are invalidated when the corpus generation changes (i.e. after an ingest),
+    when they are older than the TTL, or by LRU eviction beyond max_size.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, similarity_threshold: float):
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.generation = 0
+        self._entries = LRUCache(max_size)
+        self._pinned: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.near_duplicate_hits = 0
+
+    def bump_generation(self) -> int:
+        """Invalidate every cached answer; called whenever the corpus changes."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            return self.generation
+
+    def pin(self, answers: Dict[str, str]) -> None:
+        """Register fixed answers that never expire or get invalidated."""
+        for query, answer in answers.items():
+            self._pinned[normalize_query(query)] = answer
+
+    def get_pinned(self, query: str) -> Optional[str]:
+        return self._pinned.get(normalize_query(query))
+
+    def get(self, query: str, query_embedding: Optional[np.ndarray] = None) -> Optional[CachedAnswer]:
+        """Look up an answer by exact normalized query, then by embedding similarity."""
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is not None and self._is_fresh(entry):
+            return entry
+
+        if query_embedding is None or self.similarity_threshold > 1.0:
+            return None
+
+        # Near-duplicate lookup over the (bounded) set of cached query embeddings
+        candidates = [
+            e for e in self._entries.values()
+            if e.query_embedding is not None and self._is_fresh(e)
+        ]
+        if not candidates:
+            return None
+        matrix = np.stack([e.query_embedding for e in candidates])
+        query_vector = np.asarray(query_embedding, dtype=matrix.dtype)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = (matrix @ query_vector) / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector))
+        best = int(np.nanargmax(scores)) if not np.all(np.isnan(scores)) else -1
+        if best < 0 or scores[best] < self.similarity_threshold:
+            return None
+        self.near_duplicate_hits += 1
+        return candidates[best]
+
+    def put(
+        self,
+        query: str,
+        answer: str,
+        source_chunk_ids: List[int],
+        source_scores: List[float],
+        query_embedding: Optional[np.ndarray] = None
+    ) -> None:
+        self._entries.put(normalize_query(query), CachedAnswer(
+            answer=answer,
+            source_chunk_ids=list(source_chunk_ids),
+            source_scores=list(source_scores),
+            generation=self.generation,
+            query_embedding=query_embedding
+        ))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._entries.stats()
+        stats.update({
+            "generation": self.generation,
+            "near_duplicate_hits": self.near_duplicate_hits,
+            "pinned": len(self._pinned)
+        })
+        return stats
+
+    def _is_fresh(self, entry: CachedAnswer) -> bool:
+        if entry.generation != self.generation:
+            return False
+        return self.ttl_seconds <= 0 or time.monotonic() - entry.created_at <= self.ttl_seconds
+
+# Process-wide cache shared by every EmbeddingManager using the default model
+embedding_cache = EmbeddingCache(config.EMBEDDING_CACHE_SIZE)
+
+# Process-wide answer cache shared by every RAGSystem
+answer_cache = AnswerCache(
+    config.ANSWER_CACHE_SIZE,
+    config.ANSWER_CACHE_TTL_SECONDS,
+    config.ANSWER_CACHE_SIMILARITY_THRESHOLD
+)
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache."""
+    return embedding_cache
+
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache."""
+    return answer_cache
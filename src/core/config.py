@@ -0,0 +1,96 @@
+import os
+from dotenv import load_dotenv
+
+# Settings are read from the environment (or a local .env file)
+load_dotenv()
+
+# Storage dtype for new chunk embeddings: "float32" or "float16" (each blob records its own)
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+
+# Sentence-transformers model used for chunk and query embeddings
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/LaBSE")
+
+# Embedding backend: "sentence-transformers" loads EMBEDDING_MODEL_NAME, "hash" is a deterministic
+# model-free stand-in of the same dimensionality for offline benchmarks and tests
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers").lower()
+
+# Run a dummy encode at startup so the first request does not pay for model loading
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Number of chunks embedded and inserted together during ingestion
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+
+# Maximum number of embeddings kept in the in-process LRU cache (0 disables it)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
+# Answer cache: maximum entries, time-to-live in seconds (0 = no expiry) and the query
+# embedding similarity above which a paraphrase reuses a cached answer (>1 disables it)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+
+# Hybrid retrieval: BM25 picks up to BM25_CANDIDATES chunks which are re-ranked by
+# HYBRID_DENSE_WEIGHT * cosine + HYBRID_LEXICAL_WEIGHT * normalized BM25
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() in ("1", "true", "yes")
+BM25_CANDIDATES = int(os.getenv("BM25_CANDIDATES", "200"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.7"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "0.3"))
+
+# CPU work runs on bounded thread pools; requests beyond in-flight + queued get a 503
+QUERY_MAX_IN_FLIGHT = int(os.getenv("QUERY_MAX_IN_FLIGHT", "4"))
+QUERY_MAX_QUEUED = int(os.getenv("QUERY_MAX_QUEUED", "64"))
+INGEST_MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", "1"))
+INGEST_MAX_QUEUED = int(os.getenv("INGEST_MAX_QUEUED", "4"))
+
+# Micro-batching of concurrent query embeddings (0 ms wait disables batching)
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+# Maximum number of queries accepted by /api/query/batch
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "5000"))
+# Largest n_results accepted by /api/query/batch
+QUERY_BATCH_MAX_RESULTS = int(os.getenv("QUERY_BATCH_MAX_RESULTS", "20"))
+
+# PDF pages are extracted, cleaned and chunked on this many worker processes
+# (0 = one per CPU core up to 4, 1 = serial); smaller PDFs are always read serially
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+
+# Chunk retrieval backend: "exact" scans every vector, "ivf" probes the ANN_NPROBE closest of
+# ANN_N_LISTS k-means buckets (0 = sqrt of the corpus size) once ANN_MIN_TRAIN_SIZE chunks exist.
+# The IVF index is persisted to ANN_INDEX_PATH (centroids and lists) plus append-only
+# .f32/.ids/.docs row files next to it, so startup does not rebuild it.
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "exact").lower()
+ANN_N_LISTS = int(os.getenv("ANN_N_LISTS", "0"))
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+ANN_MIN_TRAIN_SIZE = int(os.getenv("ANN_MIN_TRAIN_SIZE", "10000"))
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", "data/ivf_index.npz")
+
+# Exact-search vectors are kept in a memory-mapped file set at this path prefix
+# (<path>.f32, <path>.ids, <path>.json) shared by all workers; empty keeps them in process memory.
+# <path>.generation counts ingests so workers know to rebuild their BM25 and sentence indexes
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "data/vector_store")
+
+# "int8" searches a per-dimension calibrated int8 copy of the vector store and re-scores the
+# best QUANT_RERANK_CANDIDATES rows with the full-precision vectors ("none" disables it)
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+QUANT_RERANK_CANDIDATES = int(os.getenv("QUANT_RERANK_CANDIDATES", "200"))
+
+# Database location, and the SQLite connection pool and statement logging
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./rag_system.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+
+# Chat history rows are queued and bulk-inserted in the background, at most this many per commit
+CHAT_HISTORY_BATCH_SIZE = int(os.getenv("CHAT_HISTORY_BATCH_SIZE", "500"))
+CHAT_HISTORY_MAX_QUEUED = int(os.getenv("CHAT_HISTORY_MAX_QUEUED", "10000"))
+
+# Add a Server-Timing header with per-stage durations to every API response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Fraction of /api/query requests scored inline with evaluate_response (0 = only when the
+# request asks for it); score question banks offline with `python -m src.core.evaluation`
+EVALUATION_SAMPLE_RATE = float(os.getenv("EVALUATION_SAMPLE_RATE", "0"))
@@ -0,0 +1,54 @@
+from typing import List, Protocol
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# Output size of LaBSE, so stored vectors and indexes look the same with either backend
+LABSE_DIM = 768
+# N-grams are hashed into this many features, then projected down to `dim`
+HASH_FEATURES = 2 ** 16
+# Output dimensions each hashed feature is spread over by the projection
+PROJECTION_NONZEROS = 8
+
+class EmbeddingBackend(Protocol):
+    """What EmbeddingManager needs from a model: sentence-transformers' encode signature."""
+
+    def encode(self, sentences: List[str], batch_size: int = 32, normalize_embeddings: bool = False) -> np.ndarray:
+        ...
+
+class HashEmbedder:
+    """Deterministic, model-free stand-in for LaBSE: character n-gram hashing followed by a
+    fixed sparse random projection.
+
+    N-grams are hashed into HASH_FEATURES buckets, where distinct n-grams rarely collide,
+    and each bucket is projected onto PROJECTION_NONZEROS random signed dimensions, which
+    keeps inner products close to those of the wide hashed vectors. Texts sharing character
+    n-grams get similar vectors, which is enough for retrieval benchmarks and tests; the
+    output does not depend on the process, machine or network.
+    """
+
+    def __init__(self, dim: int = LABSE_DIM, ngram_range=(2, 4), seed: int = 0):
+        self.dim = dim
+        # Stateless, so the same text always hashes to the same vector
+        self._vectorizer = HashingVectorizer(
+            analyzer="char_wb", ngram_range=ngram_range, n_features=HASH_FEATURES, alternate_sign=False, norm=None
+        )
+        self._projection = sparse_projection(HASH_FEATURES, dim, PROJECTION_NONZEROS, seed)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences: List[str], batch_size: int = 32, normalize_embeddings: bool = False) -> np.ndarray:
+        embeddings = (self._vectorizer.transform(sentences) @ self._projection).toarray().astype(np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.where(norms == 0, 1.0, norms)
+        return embeddings
+
+def sparse_projection(n_features: int, dim: int, nonzeros: int, seed: int = 0) -> sparse.csr_matrix:
+    """(n_features, dim) projection with `nonzeros` entries of +-1/sqrt(nonzeros) per row, from a fixed seed."""
+    rng = np.random.default_rng(seed)
+    columns = rng.integers(0, dim, size=(n_features, nonzeros))
+    values = rng.choice([-1.0, 1.0], size=(n_features, nonzeros)) / np.sqrt(nonzeros)
+    rows = np.repeat(np.arange(n_features), nonzeros)
+    return sparse.csr_matrix((values.ravel(), (rows, columns.ravel())), shape=(n_features, dim), dtype=np.float32)
@@ -0,0 +1,228 @@
+from typing import Any, Dict, List, Optional, Sequence
+from dataclasses import dataclass
+import argparse
+import asyncio
+import csv
+import json
+import time
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import AnswerCache, normalize_query
+from src.core.processors import EmbeddingManager
+from src.core.rag import RAGSystem
+from src.database.models import DocumentChunk
+
+# Questions scored together; bounds the (rows, k, dim) chunk tensor held at once
+SCORE_BLOCK_SIZE = 1024
+
+@dataclass
+class EvaluationItem:
+    """One question from a question bank, with its expected answer if known."""
+    question: str
+    expected_answer: Optional[str] = None
+
+def load_items(path: str) -> List[EvaluationItem]:
+    """Read questions from a .jsonl, .json (list of objects) or .csv file.
+
+    Each record needs a `question` (or `query`) field; `answer` (or `expected_answer`) is optional.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+
+    items = []
+    for record in records:
+        question = record.get("question") or record.get("query")
+        if not question:
+            continue
+        items.append(EvaluationItem(question, record.get("answer") or record.get("expected_answer") or None))
+    return items
+
+def mean_cosine(probes: np.ndarray, chunk_sets: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Mean cosine similarity of each probe (n, d) with its own chunk set (n, k, d) over valid (mask) chunks.
+
+    Inputs are expected to be unit vectors; rows without a valid chunk score 0.
+    """
+    similarities = np.einsum("nd,nkd->nk", probes, chunk_sets)
+    counts = mask.sum(axis=1)
+    return np.where(counts > 0, (similarities * mask).sum(axis=1) / np.maximum(counts, 1), 0.0)
+
+class OfflineEvaluator:
+    """Answers a question bank in batches and scores every answer with matrix operations.
+
+    Per question:
+    - relevance: mean cosine of the question with its retrieved chunks (as evaluate_response)
+    - groundedness: mean cosine of the generated answer with its retrieved chunks
+    - answer_similarity: cosine of the generated and expected answers
+    - answer_hit: the expected answer appears in the generated answer
+    - context_hit: the expected answer appears in one of the retrieved chunks
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        embedding_manager: EmbeddingManager,
+        rag_system: Optional[RAGSystem] = None,
+        n_results: int = 3,
+        batch_size: int = 500
+    ):
+        self.session = session
+        self.embedding_manager = embedding_manager
+        if rag_system is None:
+            # A private, disabled answer cache: every question is retrieved and answered on its own,
+            # and the question bank never lands in the live cache
+            rag_system = RAGSystem(session, embedding_manager=embedding_manager, answer_cache=AnswerCache(0, 0, 2.0))
+        self.rag_system = rag_system
+        self.n_results = n_results
+        self.batch_size = batch_size
+
+    async def run(self, items: Sequence[EvaluationItem]) -> Dict[str, Any]:
+        """Answer and score all items; returns {"aggregate": ..., "questions": [...]}."""
+        start = time.perf_counter()
+        results: List[Dict[str, Any]] = []
+        for batch_start in range(0, len(items), self.batch_size):
+            batch = items[batch_start:batch_start + self.batch_size]
+            # Batched answering with the live ranking (hybrid BM25 + dense), kept out of chat history
+            results.extend(await self.rag_system.process_queries(
+                [item.question for item in batch], n_results=self.n_results, store_history=False
+            ))
+        answer_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rows = await self._score(items, results)
+        score_seconds = time.perf_counter() - start
+        return {
+            "aggregate": _aggregate(rows, answer_seconds, score_seconds),
+            "questions": rows
+        }
+
+    async def _score(self, items: Sequence[EvaluationItem], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        n = len(items)
+        if n == 0:
+            return []
+        # Questions, generated answers and expected answers encoded in one call
+        expected = [item.expected_answer or "" for item in items]
+        texts = [item.question for item in items] + [result["answer"] for result in results] + expected
+        encoded = _unit_rows(np.asarray(self.embedding_manager.get_embeddings(texts), dtype=np.float32))
+        queries, answers, expected_vectors = encoded[:n], encoded[n:2 * n], encoded[2 * n:]
+
+        # Every retrieved chunk's embedding and text, loaded once
+        unique_ids = sorted({chunk_id for result in results for chunk_id in result["source_chunk_ids"]})
+        chunk_matrix, contents, positions = await self._load_chunks(unique_ids, queries.shape[1])
+
+        # (n, k) matrix of rows into chunk_matrix, padded with a zero row where fewer chunks came back
+        k = max((len(result["source_chunk_ids"]) for result in results), default=0)
+        padding = len(chunk_matrix) - 1
+        chunk_rows = np.full((n, max(k, 1)), padding, dtype=np.int64)
+        for i, result in enumerate(results):
+            rows = [positions[chunk_id] for chunk_id in result["source_chunk_ids"] if chunk_id in positions]
+            chunk_rows[i, :len(rows)] = rows
+        mask = chunk_rows != padding
+
+        relevance = np.empty(n, dtype=np.float32)
+        groundedness = np.empty(n, dtype=np.float32)
+        for block in range(0, n, SCORE_BLOCK_SIZE):
+            rows = slice(block, block + SCORE_BLOCK_SIZE)
+            chunk_sets = chunk_matrix[chunk_rows[rows]]
+            relevance[rows] = mean_cosine(queries[rows], chunk_sets, mask[rows])
+            groundedness[rows] = mean_cosine(answers[rows], chunk_sets, mask[rows])
+        answer_similarity = np.einsum("nd,nd->n", answers, expected_vectors)
+
+        report = []
+        for i, (item, result) in enumerate(zip(items, results)):
+            target = normalize_query(item.expected_answer) if item.expected_answer else None
+            report.append({
+                "question": item.question,
+                "expected_answer": item.expected_answer,
+                "answer": result["answer"],
+                "source_chunk_ids": result["source_chunk_ids"],
+                "cached": result["cached"],
+                "relevance": round(float(relevance[i]), 4),
+                "groundedness": round(float(groundedness[i]), 4),
+                "answer_similarity": round(float(answer_similarity[i]), 4) if target else None,
+                "answer_hit": target in normalize_query(result["answer"]) if target else None,
+                "context_hit": any(
+                    target in normalize_query(contents[chunk_id])
+                    for chunk_id in result["source_chunk_ids"] if chunk_id in contents
+                ) if target else None
+            })
+        return report
+
+    async def _load_chunks(self, chunk_ids: List[int], dim: int):
+        """Return unit chunk embeddings (plus a trailing zero row for padding), texts and row positions."""
+        matrix = np.zeros((len(chunk_ids) + 1, dim), dtype=np.float32)
+        contents: Dict[int, str] = {}
+        positions: Dict[int, int] = {}
+        if chunk_ids:
+            stmt = select(DocumentChunk.id, DocumentChunk.content, DocumentChunk.embedding).where(
+                DocumentChunk.id.in_(chunk_ids)
+            )
+            for row, chunk in enumerate((await self.session.execute(stmt)).all()):
+                matrix[row] = self.embedding_manager.deserialize_embedding(chunk.embedding)
+                contents[chunk.id] = chunk.content
+                positions[chunk.id] = row
+        # Rows never filled stay zero and score 0; the mask excludes them anyway
+        return _unit_rows(matrix), contents, positions
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+def _aggregate(rows: List[Dict[str, Any]], answer_seconds: float, score_seconds: float) -> Dict[str, Any]:
+    def mean(key: str) -> Optional[float]:
+        values = [row[key] for row in rows if row[key] is not None]
+        return round(float(np.mean(values)), 4) if values else None
+
+    return {
+        "questions": len(rows),
+        "with_expected_answer": sum(row["expected_answer"] is not None for row in rows),
+        "relevance": mean("relevance"),
+        "groundedness": mean("groundedness"),
+        "answer_similarity": mean("answer_similarity"),
+        "answer_hit_rate": mean("answer_hit"),
+        "context_hit_rate": mean("context_hit"),
+        "answer_seconds": round(answer_seconds, 3),
+        "score_seconds": round(score_seconds, 3),
+        "questions_per_second": round(len(rows) / (answer_seconds + score_seconds), 2) if rows else 0.0
+    }
+
+async def evaluate_file(path: str, n_results: int = 3, batch_size: int = 500) -> Dict[str, Any]:
+    """Load the indexes from the database, then answer and score every question in `path`."""
+    from src.core.vector_index import get_vector_index
+    from src.core.sentence_index import get_sentence_index
+    from src.core.lexical_index import get_lexical_index
+    from src.database.models import async_session
+
+    items = load_items(path)
+    embedding_manager = EmbeddingManager()
+    async with async_session() as session:
+        await get_vector_index().load(session, EmbeddingManager.deserialize_embedding)
+        await get_sentence_index().load(session)
+        await get_lexical_index().load(session)
+        evaluator = OfflineEvaluator(session, embedding_manager, n_results=n_results, batch_size=batch_size)
+        return await evaluator.run(items)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Answer and score a question bank against the ingested corpus.")
+    parser.add_argument("questions", help=".jsonl, .json or .csv file with question and (optional) answer fields")
+    parser.add_argument("--output", default="evaluation_report.json")
+    parser.add_argument("--n-results", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    report = asyncio.run(evaluate_file(args.questions, args.n_results, args.batch_size))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report["aggregate"], indent=2))
+    print(f"Per-question results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
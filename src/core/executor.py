@@ -0,0 +1,73 @@
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import functools
+import threading
+
+from src.core import config
+
+class ExecutorOverloaded(Exception):
+    """Raised when an executor already has its maximum number of running and queued tasks."""
+
+class BoundedExecutor:
+    """Thread pool for CPU-bound work that rejects new tasks instead of queueing without bound.
+
+    Model inference, PDF parsing and NumPy/SciPy scoring release the GIL for most of
+    their runtime, so threads keep the event loop responsive without pickling costs.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queued: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queued
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn in the pool and await its result, or raise ExecutorOverloaded if full."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise ExecutorOverloaded(f"{self.name} executor is at capacity ({self.max_pending} tasks)")
+            self._pending += 1
+        try:
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(None)
+            raise
+        # Released when the thread finishes (or the task is cancelled before it starts), not when
+        # the awaiting coroutine is cancelled while the thread keeps running
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+# Separate pools so a long ingest never occupies the threads that serve queries
+query_executor = BoundedExecutor("query", config.QUERY_MAX_IN_FLIGHT, config.QUERY_MAX_QUEUED)
+ingest_executor = BoundedExecutor("ingest", config.INGEST_MAX_IN_FLIGHT, config.INGEST_MAX_QUEUED)
+
+def get_query_executor() -> BoundedExecutor:
+    """Return the executor for query-path CPU work (encodes, scoring, sentence selection)."""
+    return query_executor
+
+def get_ingest_executor() -> BoundedExecutor:
+    """Return the executor for ingest-path CPU work (PDF parsing, chunk embedding)."""
+    return ingest_executor
@@ -0,0 +1,101 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import contextvars
+from sqlalchemy import insert
+
+from src.core import config
+from src.core.metrics import get_metrics
+from src.database.models import ChatHistory, async_session
+
+class ChatHistoryWriter:
+    """Queues chat history rows and bulk-inserts them from a background task, so answers
+    are returned without waiting on a database write."""
+
+    def __init__(self, session_factory=async_session, batch_size: int = 500, max_queued: int = 10000):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_queued = max_queued
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Statistics
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def submit(self, query: str, response: str) -> None:
+        """Queue one row; never blocks. Rows are dropped (and counted) when the queue is full."""
+        self.submit_many([{"user_query": query, "system_response": response}])
+
+    def submit_many(self, rows: List[Dict[str, Any]]) -> None:
+        self._ensure_started()
+        timestamp = datetime.utcnow()  # Time of the answer, not of the eventual insert
+        for row in rows:
+            try:
+                self._queue.put_nowait({"timestamp": timestamp, **row})
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+    async def flush(self) -> None:
+        """Wait until every queued row has been written."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Write what is queued and stop the background task."""
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._queue = self._task = None
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.max_queued)
+            # Start from an empty context so the task does not hold on to the first request's state
+            self._task = contextvars.Context().run(asyncio.get_running_loop().create_task, self._run())
+
+    async def _run(self) -> None:
+        while True:
+            # Wait for one row, then take whatever else has queued up meanwhile
+            rows = [await self._queue.get()]
+            while len(rows) < self.batch_size and not self._queue.empty():
+                rows.append(self._queue.get_nowait())
+            try:
+                with get_metrics().timer("chat_history_insert"):
+                    async with self.session_factory() as session:
+                        await session.execute(insert(ChatHistory), rows)
+                        await session.commit()
+                self.written += len(rows)
+                self.batches += 1
+            except Exception as e:
+                print(f"Error writing chat history: {e}")
+                self.errors += 1
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": self.written / self.batches if self.batches else 0.0,
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+# Process-wide writer shared by every request
+chat_history_writer = ChatHistoryWriter(
+    batch_size=config.CHAT_HISTORY_BATCH_SIZE,
+    max_queued=config.CHAT_HISTORY_MAX_QUEUED
+)
+
+def get_chat_history_writer() -> ChatHistoryWriter:
+    """Return the process-wide chat history writer."""
+    return chat_history_writer
@@ -0,0 +1,408 @@
+from typing import List, Dict, Any, Callable, Iterator, Optional
+from datetime import datetime
+import asyncio
+import hashlib
+import json
+import os
+import time
+from sqlalchemy import insert, update, delete, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core import config
+from src.core.vector_index import VectorIndex, get_vector_index
+from src.core.cache import get_answer_cache
+from src.core.lexical_index import BM25Index, get_lexical_index
+from src.core.executor import BoundedExecutor, get_ingest_executor
+from src.core.sentence_index import (
+    SentenceIndex, get_sentence_index, split_sentences, term_frequencies, serialize_tf
+)
+from src.core.processors import EmbeddingManager, DocumentProcessor
+from src.core.jobs import IngestJob
+from src.core.metrics import MetricsRegistry, get_metrics
+from src.database.models import Document, DocumentChunk, ChunkSentence, async_session
+
+# Bytes read at a time while hashing an uploaded file
+HASH_READ_SIZE = 1024 * 1024
+
+def file_sha256(file_path: str) -> str:
+    """Hex SHA-256 of a file, read in pieces so large PDFs are never loaded whole."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_hash(content: str) -> str:
+    """Hash identifying a chunk's text across editions of a document."""
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+class IngestPipeline:
+    """Embed document chunks in batches and bulk-insert them into document_chunks."""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        embedding_manager: EmbeddingManager,
+        vector_index: Optional[VectorIndex] = None,
+        batch_size: Optional[int] = None,
+        sentence_index: Optional[SentenceIndex] = None,
+        lexical_index: Optional[BM25Index] = None,
+        executor: Optional[BoundedExecutor] = None,
+        metrics: Optional[MetricsRegistry] = None
+    ):
+        self.session = session
+        self.embedding_manager = embedding_manager
+        self.vector_index = vector_index if vector_index is not None else get_vector_index()
+        self.batch_size = batch_size or config.INGEST_BATCH_SIZE
+        self.sentence_index = sentence_index if sentence_index is not None else get_sentence_index()
+        self.lexical_index = lexical_index if lexical_index is not None else get_lexical_index()
+        self.executor = executor if executor is not None else get_ingest_executor()
+        self.metrics = metrics if metrics is not None else get_metrics()
+
+    async def run(self, document_id: int, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Store all chunks for a document and add them to the in-memory indexes."""
+        return await self.run_stream(document_id, iter([chunks]))
+
+    async def run_stream(
+        self,
+        document_id: int,
+        pages: Iterator[List[Dict[str, Any]]],
+        progress: Optional[Callable[[int, int], None]] = None,
+        existing: Optional[Dict[str, List[int]]] = None
+    ) -> Dict[str, Any]:
+        """Consume per-page chunk lists, embedding and committing one batch at a time.
+
+        Pages are pulled from the (blocking) iterator on the ingest executor, so at most
+        one page plus one batch of chunks is held in memory at any point. `existing` maps
+        content hashes to the document's current chunk ids: chunks found there keep their
+        row and embedding, and those not seen again are tombstoned at the end. If the
+        stream fails, the chunks it inserted are deleted again and the previous edition is
+        left as it was. Either way cached answers are invalidated, since chunks written
+        along the way were searchable.
+        """
+        start = time.perf_counter()
+        existing = {content_hash: list(ids) for content_hash, ids in (existing or {}).items()}
+        pages_done = 0
+        chunks_done = 0
+        inserted: List[int] = []
+        buffer: List[Dict[str, Any]] = []
+        reused: List[Dict[str, Any]] = []
+
+        try:
+            while True:
+                with self.metrics.timer("pdf_parse"):
+                    page_chunks = await self.executor.run(next, pages, None)
+                if page_chunks is None:
+                    break
+                pages_done += 1
+                for chunk in page_chunks:
+                    chunk_id = _take(existing, chunk_hash(chunk['content']))
+                    if chunk_id is None:
+                        buffer.append(chunk)
+                    else:
+                        reused.append({"id": chunk_id, **_chunk_metadata(chunk)})
+                chunks_done += len(page_chunks)
+                while len(buffer) >= self.batch_size:
+                    await self._write_batch(document_id, buffer[:self.batch_size], inserted)
+                    buffer = buffer[self.batch_size:]
+                if progress is not None:
+                    progress(pages_done, chunks_done)
+
+            if buffer:
+                await self._write_batch(document_id, buffer, inserted)
+            if progress is not None:
+                progress(pages_done, chunks_done)
+
+            # Carried-over chunks are only renumbered once the new edition is complete
+            for offset in range(0, len(reused), self.batch_size):
+                await self._update_reused(reused[offset:offset + self.batch_size])
+            chunks_removed = await self.remove_chunks([chunk_id for ids in existing.values() for chunk_id in ids])
+        except BaseException:
+            await self._close_pages(pages)
+            await self._discard(inserted)
+            raise
+        finally:
+            with self.metrics.timer("index_persist"):
+                await self.executor.run(self.vector_index.persist)
+            # Cached answers may now be stale
+            get_answer_cache().bump_generation()
+
+        elapsed = time.perf_counter() - start
+        return {
+            "chunks_processed": chunks_done,
+            "chunks_added": len(inserted),
+            "chunks_reused": chunks_done - len(inserted),
+            "chunks_removed": chunks_removed,
+            "pages_processed": pages_done,
+            "batch_size": self.batch_size,
+            "elapsed_seconds": round(elapsed, 3),
+            "chunks_per_second": round(chunks_done / elapsed, 2) if elapsed > 0 else 0.0
+        }
+
+    async def remove_chunks(self, chunk_ids: List[int]) -> int:
+        """Tombstone chunks and drop them from every in-memory index."""
+        if not chunk_ids:
+            return 0
+        # Rows are kept with deleted_at set; loads and filtered queries skip them
+        with self.metrics.timer("db_commit"):
+            await self.session.execute(
+                update(DocumentChunk).where(DocumentChunk.id.in_(chunk_ids)).values(deleted_at=datetime.utcnow())
+            )
+            await self.session.execute(delete(ChunkSentence).where(ChunkSentence.chunk_id.in_(chunk_ids)))
+            await self.session.commit()
+
+        with self.metrics.timer("index_update"):
+            await self.executor.run(self.vector_index.remove, chunk_ids)
+            self.sentence_index.remove(chunk_ids)
+            await self.executor.run(self.lexical_index.remove, chunk_ids)
+        return len(chunk_ids)
+
+    async def _update_reused(self, rows: List[Dict[str, Any]]) -> None:
+        """Refresh the position metadata of chunks carried over from the previous edition."""
+        # Bulk UPDATE by primary key; the content and embedding are unchanged
+        with self.metrics.timer("db_commit"):
+            await self.session.execute(update(DocumentChunk), rows)
+            await self.session.commit()
+
+    async def _close_pages(self, pages: Iterator[List[Dict[str, Any]]]) -> None:
+        """Stop an unfinished page generator, and the extraction pool behind it, off the event loop."""
+        close = getattr(pages, "close", None)
+        if close is None:
+            return
+        try:
+            # Closing waits for the worker processes to shut down
+            await asyncio.to_thread(close)
+        except ValueError:
+            # A cancelled next() is still running on the executor; the generator is closed when collected
+            pass
+
+    async def _discard(self, chunk_ids: List[int]) -> None:
+        """Delete the rows of a failed ingest outright and drop them from the indexes."""
+        await self.session.rollback()
+        if not chunk_ids:
+            return
+        await self.session.execute(delete(ChunkSentence).where(ChunkSentence.chunk_id.in_(chunk_ids)))
+        await self.session.execute(delete(DocumentChunk).where(DocumentChunk.id.in_(chunk_ids)))
+        await self.session.commit()
+        await self.executor.run(self.vector_index.remove, chunk_ids)
+        self.sentence_index.remove(chunk_ids)
+        await self.executor.run(self.lexical_index.remove, chunk_ids)
+
+    async def _write_batch(self, document_id: int, batch: List[Dict[str, Any]], inserted: List[int]) -> None:
+        """Embed, insert and commit one batch, then make it searchable; new ids go to `inserted`."""
+        with self.metrics.timer("embed_chunks"):
+            batch_embeddings = await self.executor.run(
+                self.embedding_manager.get_embeddings,
+                [chunk['content'] for chunk in batch],
+                batch_size=self.batch_size
+            )
+
+        # One multi-row INSERT per batch instead of a session.add per chunk
+        rows = [
+            {
+                "document_id": document_id,
+                "content": chunk['content'],
+                "content_hash": chunk_hash(chunk['content']),
+                "embedding": self.embedding_manager.serialize_embedding(embedding),
+                **_chunk_metadata(chunk)
+            }
+            for chunk, embedding in zip(batch, batch_embeddings)
+        ]
+        stmt = insert(DocumentChunk).returning(DocumentChunk.id, sort_by_parameter_order=True)
+        with self.metrics.timer("db_commit"):
+            result = await self.session.execute(stmt, rows)
+            chunk_ids = result.scalars().all()
+            chunk_sentences = await self._store_sentences(chunk_ids, batch)
+            await self.session.commit()
+        inserted.extend(chunk_ids)
+
+        # Make the new chunks searchable without reloading from the database
+        with self.metrics.timer("index_update"):
+            await self.executor.run(self.vector_index.add, chunk_ids, batch_embeddings, [document_id] * len(chunk_ids))
+            for chunk_id, sentences, tf in chunk_sentences:
+                self.sentence_index.add(chunk_id, sentences, tf)
+            await self.executor.run(self.lexical_index.add, chunk_ids, [chunk['content'] for chunk in batch])
+
+    async def _store_sentences(self, chunk_ids: List[int], chunks: List[Dict[str, Any]]) -> List[Any]:
+        """Split chunks into sentences and bulk-insert them with their term-count vectors."""
+        per_chunk = [(chunk_id, split_sentences(chunk['content'])) for chunk_id, chunk in zip(chunk_ids, chunks)]
+        all_sentences = [sentence for _, sentences in per_chunk for sentence in sentences]
+        if not all_sentences:
+            return []
+
+        tf = await self.executor.run(term_frequencies, all_sentences)
+        rows = []
+        indexed = []
+        offset = 0
+        for chunk_id, sentences in per_chunk:
+            chunk_tf = tf[offset:offset + len(sentences)]
+            for position, sentence in enumerate(sentences):
+                rows.append({
+                    "chunk_id": chunk_id,
+                    "position": position,
+                    "content": sentence,
+                    "tf_vector": serialize_tf(chunk_tf[position])
+                })
+            indexed.append((chunk_id, sentences, chunk_tf))
+            offset += len(sentences)
+
+        await self.session.execute(insert(ChunkSentence), rows)
+        return indexed
+
+def _chunk_metadata(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = chunk.get('metadata', {})
+    return {
+        "page": metadata.get('page'),
+        "chunk_index": metadata.get('chunk_id'),
+        "source": metadata.get('source'),
+        "total_chunks": metadata.get('total_chunks')
+    }
+
+def _take(existing: Dict[str, List[int]], content_hash: str) -> Optional[int]:
+    """Claim one unused chunk id with this content, if any (repeated text maps to several)."""
+    ids = existing.get(content_hash)
+    if not ids:
+        return None
+    chunk_id = ids.pop()
+    if not ids:
+        del existing[content_hash]
+    return chunk_id
+
+async def _existing_chunks(session: AsyncSession, document_id: int) -> Dict[str, List[int]]:
+    """Map content hash -> live chunk ids of a document."""
+    stmt = select(DocumentChunk.id, DocumentChunk.content, DocumentChunk.content_hash).where(
+        DocumentChunk.document_id == document_id,
+        DocumentChunk.deleted_at.is_(None)
+    )
+    existing: Dict[str, List[int]] = {}
+    for row in (await session.execute(stmt)).all():
+        # Chunks stored before hashes were recorded are hashed here
+        existing.setdefault(row.content_hash or chunk_hash(row.content), []).append(row.id)
+    return existing
+
+async def ingest_file(
+    job: IngestJob,
+    file_path: str,
+    filename: str,
+    embedding_manager: EmbeddingManager,
+    processor: Optional[DocumentProcessor] = None,
+    destination: Optional[str] = None,
+    replace: bool = False
+) -> Dict[str, Any]:
+    """Stream a PDF through pages -> cleaned text -> chunks -> embedding batches -> DB writes.
+
+    A byte-identical file is not processed again. With `replace`, the file is a new edition
+    of the latest document ingested under the same name and replaces it in place, embedding
+    only its new or changed chunks; otherwise it becomes a document of its own, even if the
+    name is taken. With `destination`, `file_path` is a temporary upload: it is moved there
+    once ingested (next to it, under a unique name, if another document's file is there)
+    and deleted if the ingest fails.
+    """
+    try:
+        stats = await _ingest_file(job, file_path, filename, embedding_manager, processor, destination, replace)
+    finally:
+        if destination is not None and os.path.exists(file_path):
+            os.remove(file_path)
+    job.complete()
+    return stats
+
+async def _ingest_file(
+    job: IngestJob,
+    file_path: str,
+    filename: str,
+    embedding_manager: EmbeddingManager,
+    processor: Optional[DocumentProcessor],
+    destination: Optional[str],
+    replace: bool
+) -> Dict[str, Any]:
+    processor = processor or DocumentProcessor()
+    executor = get_ingest_executor()
+    content_hash = await executor.run(file_sha256, file_path)
+
+    async with async_session() as session:
+        document = (await session.execute(
+            select(Document).where(Document.content_hash == content_hash).limit(1)
+        )).scalar_one_or_none()
+        if document is not None:
+            live_chunks = (await session.execute(
+                select(func.count(DocumentChunk.id)).where(
+                    DocumentChunk.document_id == document.id,
+                    DocumentChunk.deleted_at.is_(None)
+                )
+            )).scalar_one()
+            job.start()
+            job.document_id = document.id
+            job.update(0, live_chunks)
+            job.chunks_reused = live_chunks
+            # Restore the stored copy if it went missing; otherwise the upload is just dropped
+            if destination is not None and document.content and not os.path.exists(document.content):
+                os.replace(file_path, document.content)
+            return {
+                "chunks_processed": live_chunks,
+                "chunks_added": 0,
+                "chunks_reused": live_chunks,
+                "chunks_removed": 0,
+                "pages_processed": 0,
+                "unchanged": True,
+                "chunks_per_second": 0.0
+            }
+
+        job.start(await executor.run(processor.count_pages, file_path))
+        document = None
+        if replace:
+            document = (await session.execute(
+                select(Document).where(Document.filename == filename).order_by(Document.id.desc()).limit(1)
+            )).scalar_one_or_none()
+        created = document is None
+        if created:
+            document = Document(filename=filename, doc_metadata=json.dumps({"filename": filename, "type": "pdf"}))
+            session.add(document)
+            await session.commit()
+            existing = {}
+        else:
+            existing = await _existing_chunks(session, document.id)
+        job.document_id = document.id
+
+        pipeline = IngestPipeline(session, embedding_manager, executor=executor)
+        try:
+            stats = await pipeline.run_stream(
+                document.id, processor.iter_pdf_chunks(file_path), progress=job.update, existing=existing
+            )
+        except BaseException:
+            # The pipeline already removed its chunks; a document it created would be left empty
+            if created:
+                await session.execute(delete(Document).where(Document.id == document.id))
+                await session.commit()
+            raise
+
+        if destination is not None:
+            # Never overwrite the file of a different document that shares the name
+            if created and os.path.exists(destination):
+                stem, extension = os.path.splitext(destination)
+                destination = f"{stem}-{content_hash[:12]}{extension}"
+            os.replace(file_path, destination)
+            file_path = destination
+        # Recorded only now, so a failed ingest is retried rather than reported unchanged
+        document.content = file_path
+        document.content_hash = content_hash
+        document.doc_metadata = json.dumps({"filename": filename, "type": "pdf"})
+        await session.commit()
+
+    job.chunks_reused = stats["chunks_reused"]
+    job.chunks_removed = stats["chunks_removed"]
+    return {**stats, "unchanged": False}
+
+async def run_ingest_job(
+    job: IngestJob,
+    file_path: str,
+    filename: str,
+    embedding_manager: EmbeddingManager,
+    destination: Optional[str] = None,
+    replace: bool = False
+) -> None:
+    """Background-task wrapper around ingest_file that records failures on the job."""
+    try:
+        await ingest_file(job, file_path, filename, embedding_manager, destination=destination, replace=replace)
+    except Exception as e:
+        print(f"Error in ingest job {job.id}: {e}")
+        job.fail(e)
@@ -0,0 +1,100 @@
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import threading
+import time
+import uuid
+
+@dataclass
+class IngestJob:
+    """Progress of one document ingestion."""
+    filename: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"  # queued -> running -> completed | failed
+    document_id: Optional[int] = None
+    total_pages: Optional[int] = None
+    pages_done: int = 0
+    chunks_done: int = 0
+    chunks_reused: int = 0  # Unchanged chunks carried over from an earlier upload
+    chunks_removed: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def start(self, total_pages: Optional[int] = None) -> None:
+        self.status = "running"
+        self.total_pages = total_pages
+        self.started_at = time.time()
+
+    def update(self, pages_done: int, chunks_done: int) -> None:
+        self.pages_done = pages_done
+        self.chunks_done = chunks_done
+
+    def complete(self) -> None:
+        self.status = "completed"
+        self.finished_at = time.time()
+
+    def fail(self, error: Exception) -> None:
+        self.status = "failed"
+        self.error = str(error)
+        self.finished_at = time.time()
+
+    @property
+    def chunks_per_second(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return self.chunks_done / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "document_id": self.document_id,
+            "pages_done": self.pages_done,
+            "total_pages": self.total_pages,
+            "chunks_done": self.chunks_done,
+            "chunks_reused": self.chunks_reused,
+            "chunks_removed": self.chunks_removed,
+            "chunks_per_second": round(self.chunks_per_second, 2),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class JobRegistry:
+    """Keeps the most recent ingest jobs so their status can be polled.
+
+    Jobs live in this process only: with several workers, a poll served by a worker other
+    than the one running the job finds nothing.
+    """
+
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, filename: str) -> IngestJob:
+        job = IngestJob(filename=filename)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs beyond the limit
+            for job_id in list(self._jobs):
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                if self._jobs[job_id].status in ("completed", "failed"):
+                    del self._jobs[job_id]
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+# Process-wide registry of ingest jobs
+job_registry = JobRegistry()
+
+def get_job_registry() -> JobRegistry:
+    """Return the process-wide ingest job registry."""
+    return job_registry
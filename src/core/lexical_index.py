@@ -0,0 +1,196 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import re
+import threading
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from src.core import config
+from src.database.models import DocumentChunk
+
+# Anything outside word characters and the Bengali block (danda, punctuation, spaces) separates tokens
+_SPLIT = re.compile(r'[^\w\u0980-\u09FF]+')
+
+# Common Bengali inflectional suffixes (case markers, plurals, classifiers), longest first
+_SUFFIXES = sorted([
+    'গুলোর', 'গুলির', 'গুলো', 'গুলি', 'দেরকে', 'দের', 'েরা', 'য়ের', 'য়েরা',
+    'টির', 'টার', 'টাকে', 'টিকে', 'টি', 'টা', 'খানা', 'খানি',
+    'কে', 'রে', 'ের', 'েই', 'েও', 'তে', 'েতে', 'র', 'য়', 'রা', 'ে', 'ও', 'ই'
+], key=len, reverse=True)
+
+def tokenize(text: str) -> List[str]:
+    """Split Bengali/English text into lowercase tokens with common suffixes stripped."""
+    tokens = []
+    for token in _SPLIT.split(text.lower()):
+        if not token:
+            continue
+        for suffix in _SUFFIXES:
+            # Keep at least two characters of stem so short words are left alone
+            if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+                token = token[:-len(suffix)]
+                break
+        tokens.append(token)
+    return tokens
+
+class BM25Index:
+    """In-memory inverted index over chunk content scored with Okapi BM25."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._chunk_ids: List[int] = []
+        self._doc_lengths: List[int] = []
+        self._total_length = 0
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._frozen: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None  # (chunk ids, doc lengths)
+        self._removed: Dict[int, int] = {}  # Tombstoned row -> its chunk id, until compaction
+
+    def __len__(self) -> int:
+        return len(self._chunk_ids) - len(self._removed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunk_ids.clear()
+            self._doc_lengths.clear()
+            self._total_length = 0
+            self._postings.clear()
+            self._frozen.clear()
+            self._arrays = None
+            self._removed.clear()
+
+    def add(self, chunk_ids: Sequence[int], texts: Sequence[str]) -> None:
+        """Index the given chunks."""
+        with self._lock:
+            self._arrays = None
+            for chunk_id, text in zip(chunk_ids, texts):
+                row = len(self._chunk_ids)
+                tokens = tokenize(text)
+                self._chunk_ids.append(int(chunk_id))
+                self._doc_lengths.append(len(tokens))
+                self._total_length += len(tokens)
+
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, count in counts.items():
+                    rows, tfs = self._postings.setdefault(token, ([], []))
+                    rows.append(row)
+                    tfs.append(count)
+                    self._frozen.pop(token, None)
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the ids and BM25 scores of the top-k chunks sharing a term with the query."""
+        with self._lock:
+            n_docs = len(self._chunk_ids) - len(self._removed)
+            if n_docs == 0 or k <= 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            avg_length = self._total_length / n_docs
+            if self._arrays is None:
+                self._arrays = (
+                    np.asarray(self._chunk_ids, dtype=np.int64),
+                    np.asarray(self._doc_lengths, dtype=np.float32)
+                )
+            chunk_ids, doc_lengths = self._arrays
+            removed = np.fromiter(self._removed, dtype=np.int64, count=len(self._removed))
+
+            all_rows, all_scores = [], []
+            for term in set(tokenize(query)):
+                postings = self._get_postings(term)
+                if postings is None:
+                    continue
+                rows, tfs = postings
+                df = len(rows)
+                if len(removed):
+                    # Tombstoned rows stay in the postings until compaction but no longer count as documents
+                    df -= int(np.isin(rows, removed).sum())
+                    if df == 0:
+                        continue
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * doc_lengths[rows] / avg_length)
+                all_rows.append(rows)
+                all_scores.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+
+        if not all_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # Accumulate per-document scores over the touched postings only
+        rows, inverse = np.unique(np.concatenate(all_rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(all_scores)).astype(np.float32)
+        if len(removed):
+            live = ~np.isin(rows, removed)
+            rows, scores = rows[live], scores[live]
+            if len(rows) == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return chunk_ids[rows[top]], scores[top]
+
+    def remove(self, chunk_ids: Sequence[int]) -> int:
+        """Tombstone the given chunks; postings are compacted once a quarter of the rows are dead."""
+        wanted = {int(chunk_id) for chunk_id in chunk_ids}
+        with self._lock:
+            removed = 0
+            for row, chunk_id in enumerate(self._chunk_ids):
+                if chunk_id in wanted and row not in self._removed:
+                    self._removed[row] = chunk_id
+                    self._total_length -= self._doc_lengths[row]
+                    removed += 1
+            if self._removed and len(self._removed) * 4 >= len(self._chunk_ids):
+                self._compact()
+            return removed
+
+    def _compact(self) -> None:
+        """Drop tombstoned rows from every posting list and renumber the survivors."""
+        keep = np.ones(len(self._chunk_ids), dtype=bool)
+        keep[list(self._removed)] = False
+        new_rows = np.cumsum(keep) - 1
+        postings = {}
+        for term, (rows, tfs) in self._postings.items():
+            live = [(int(new_rows[row]), tf) for row, tf in zip(rows, tfs) if keep[row]]
+            if live:
+                postings[term] = ([row for row, _ in live], [tf for _, tf in live])
+        self._postings = postings
+        self._chunk_ids = [chunk_id for row, chunk_id in enumerate(self._chunk_ids) if keep[row]]
+        self._doc_lengths = [length for row, length in enumerate(self._doc_lengths) if keep[row]]
+        self._frozen.clear()
+        self._arrays = None
+        self._removed.clear()
+
+    async def load(self, session: AsyncSession) -> int:
+        """Rebuild the index from every chunk stored in the database."""
+        stmt = select(DocumentChunk.id, DocumentChunk.content).where(DocumentChunk.deleted_at.is_(None))
+        rows = (await session.execute(stmt)).all()
+        self.clear()
+        self.add([row.id for row in rows], [row.content for row in rows])
+        return len(rows)
+
+    def _get_postings(self, term: str):
+        frozen = self._frozen.get(term)
+        if frozen is None and term in self._postings:
+            rows, tfs = self._postings[term]
+            frozen = (np.asarray(rows, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            self._frozen[term] = frozen
+        return frozen
+
+def fuse_scores(
+    dense_scores: np.ndarray,
+    lexical_scores: np.ndarray,
+    dense_weight: float,
+    lexical_weight: float
+) -> np.ndarray:
+    """Combine cosine and BM25 scores; BM25 is scaled to [0, 1] by the best candidate."""
+    max_lexical = float(lexical_scores.max()) if len(lexical_scores) else 0.0
+    lexical = lexical_scores / max_lexical if max_lexical > 0 else lexical_scores
+    return dense_weight * dense_scores + lexical_weight * lexical
+
+# Process-wide lexical index shared by every request
+lexical_index = BM25Index(config.BM25_K1, config.BM25_B)
+
+def get_lexical_index() -> BM25Index:
+    """Return the process-wide lexical index."""
+    return lexical_index
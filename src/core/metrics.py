@@ -0,0 +1,178 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import math
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds: 50us to ~105s, a factor of sqrt(2) apart
+BUCKET_BOUNDS = [50e-6 * math.sqrt(2) ** i for i in range(43)]
+
+# Stage durations of the request being served, for the Server-Timing header (None = not collected)
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+class LatencyHistogram:
+    """Fixed log-spaced buckets; recording is a bisect and two additions, percentiles are estimated."""
+
+    def __init__(self, bounds: List[float] = BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last bucket catches everything above the top bound
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.min = min(self.min, seconds)
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th quantile (0-1), interpolating geometrically inside its bucket."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                if bucket_count and seen + bucket_count >= rank:
+                    lower = self.bounds[index - 1] if index > 0 else self.min
+                    upper = self.bounds[index] if index < len(self.bounds) else self.max
+                    lower, upper = max(lower, self.min), min(upper, self.max)
+                    fraction = (rank - seen) / bucket_count
+                    return lower * (upper / lower) ** fraction if lower > 0 else upper * fraction
+                seen += bucket_count
+            return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """Count plus mean, p50/p95/p99 and max in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": round(1000.0 * self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(1000.0 * self.percentile(0.50), 3),
+            "p95_ms": round(1000.0 * self.percentile(0.95), 3),
+            "p99_ms": round(1000.0 * self.percentile(0.99), 3),
+            "max_ms": round(1000.0 * self.max, 3)
+        }
+
+
+class MetricsRegistry:
+    """Per-stage latency histograms and event counters for the query and ingest paths."""
+
+    def __init__(self, prefix: str = "rag"):
+        self.prefix = prefix
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, family: str = "stage") -> None:
+        """Record one duration; `family` separates pipeline stages from whole requests."""
+        key = (family, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        histogram.observe(seconds)
+
+        timings = _request_timings.get()
+        if timings is not None and family == "stage":
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block (including awaits inside it) as one observation of `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, name: str, amount: int = 1, path: str = "") -> None:
+        """Add to a counter, optionally split by request path."""
+        key = (name, path)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view: latency summaries per family and stage, and counters."""
+        latency: Dict[str, Dict[str, Any]] = {}
+        for (family, stage), histogram in sorted(self._histograms.items()):
+            latency.setdefault(family, {})[stage] = histogram.summary()
+        counters: Dict[str, Any] = {}
+        for (name, path), value in sorted(self._counters.items()):
+            if path:
+                counters.setdefault(name, {})[path] = value
+            else:
+                counters[name] = value
+        return {"latency": latency, "counters": counters}
+
+    def prometheus(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Render histograms, counters and any extra gauges in the Prometheus text format."""
+        lines: List[str] = []
+        families: Dict[str, List[Tuple[str, LatencyHistogram]]] = {}
+        for (family, stage), histogram in sorted(self._histograms.items()):
+            families.setdefault(family, []).append((stage, histogram))
+        for family, histograms in families.items():
+            metric = f"{self.prefix}_{family}_duration_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for stage, histogram in histograms:
+                label = f'{family}="{_escape(stage)}"'
+                with histogram._lock:
+                    counts, count, total = list(histogram.counts), histogram.count, histogram.total
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.bounds, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{{label},le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f"{metric}_sum{{{label}}} {total:.9g}")
+                lines.append(f"{metric}_count{{{label}}} {count}")
+
+        declared = set()
+        for (name, path), value in sorted(self._counters.items()):
+            metric = f"{self.prefix}_{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            labels = f'{{path="{_escape(path)}"}}' if path else ""
+            lines.append(f"{metric}{labels} {value}")
+
+        for name, value in sorted((gauges or {}).items()):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@contextmanager
+def collect_request_timings() -> Iterator[Dict[str, float]]:
+    """Collect the stage durations recorded while the block runs (for one request)."""
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Format stage durations as a Server-Timing header value."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timings.items())
+
+
+# Process-wide registry shared by every request
+metrics = MetricsRegistry()
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return metrics
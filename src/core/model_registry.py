@@ -0,0 +1,74 @@
+from typing import Any, Dict, Optional
+import os
+import sys
+import threading
+import time
+from src.core import config
+from src.core.embedders import EmbeddingBackend, HashEmbedder
+
+_model: Optional[EmbeddingBackend] = None
+_lock = threading.Lock()
+_stats: Dict[str, Any] = {
+    "backend": config.EMBEDDING_BACKEND,
+    "model_name": config.EMBEDDING_MODEL_NAME,
+    "loaded": False,
+    "load_time_seconds": None,
+    "warmup_time_seconds": None,
+    "rss_before_load_mb": None,
+    "rss_after_load_mb": None,
+}
+
+def _resident_memory_mb() -> Optional[float]:
+    """Return the current resident set size of this process in MB, if it can be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak RSS: kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+def load_embedding_backend() -> EmbeddingBackend:
+    """Build the configured embedding backend."""
+    if config.EMBEDDING_BACKEND == "hash":
+        return HashEmbedder()
+    # Imported here so the hash backend works without sentence-transformers installed
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(config.EMBEDDING_MODEL_NAME)
+
+def get_embedding_model() -> EmbeddingBackend:
+    """Return the process-wide embedding model, loading it on first use."""
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                _stats["rss_before_load_mb"] = _resident_memory_mb()
+                start = time.perf_counter()
+                _model = load_embedding_backend()
+                _stats["load_time_seconds"] = time.perf_counter() - start
+                _stats["rss_after_load_mb"] = _resident_memory_mb()
+                _stats["loaded"] = True
+                print(
+                    f"Loaded {config.EMBEDDING_BACKEND} embedding model {config.EMBEDDING_MODEL_NAME} in "
+                    f"{_stats['load_time_seconds']:.2f}s (RSS {_stats['rss_after_load_mb']} MB)"
+                )
+    return _model
+
+def warmup_embedding_model() -> None:
+    """Load the model and run a dummy encode so the first request does not pay for it."""
+    model = get_embedding_model()
+    start = time.perf_counter()
+    model.encode(["আমি বাংলায় গান গাই।"], normalize_embeddings=True)
+    _stats["warmup_time_seconds"] = time.perf_counter() - start
+
+def get_model_stats() -> Dict[str, Any]:
+    """Return load time and memory statistics for the embedding model."""
+    stats = dict(_stats)
+    stats["rss_current_mb"] = _resident_memory_mb()
+    return stats
@@ -1,21 +1,49 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Union
 import numpy as np
 import json
-import re
-from sentence_transformers import SentenceTransformer
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
+import os
+from src.core import config
+from src.core.model_registry import get_embedding_model
+from src.core.cache import EmbeddingCache, get_embedding_cache
+from src.core.executor import get_ingest_executor
+from src.core.extraction import (
+    make_text_splitter, chunk_page, clean_bengali_text, iter_pdf_chunks_parallel, iter_pdf_chunks_serial
+)
+
+# NumPy type codes of the storage dtypes serialize_embedding accepts: float32 and float16
+EMBEDDING_DTYPE_CODES = {"f", "e"}
 
 class EmbeddingManager:
-    def __init__(self):
-        # Using XLM-RoBERTa for better Bengali language support
-        self.model = SentenceTransformer('sentence-transformers/LaBSE')
+    def __init__(self, model=None, cache: Optional[EmbeddingCache] = None):
+        # LaBSE is shared process-wide; pass a model explicitly to override it
+        self.model = model if model is not None else get_embedding_model()
+        # Only the default model may share the process-wide cache
+        if cache is None:
+            cache = get_embedding_cache() if model is None else EmbeddingCache(config.EMBEDDING_CACHE_SIZE)
+        self.cache = cache
         
-    def get_embeddings(self, texts: List[str]) -> List[np.ndarray]:
-        """Generate embeddings for a list of texts."""
+    def get_embeddings(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Generate embeddings for a list of texts, encoding only the ones not already cached."""
         # Normalize and clean Bengali text before embedding
         cleaned_texts = [self._normalize_bengali_text(text) for text in texts]
-        return self.model.encode(cleaned_texts, normalize_embeddings=True)
+        keys = [self.cache.key(text) for text in cleaned_texts]
+        
+        embeddings: List[Optional[np.ndarray]] = [self.cache.get(key) for key in keys]
+        missing: Dict[str, str] = {}
+        for key, text, embedding in zip(keys, cleaned_texts, embeddings):
+            if embedding is None:
+                missing.setdefault(key, text)
+        
+        if missing:
+            encoded = self.model.encode(list(missing.values()), batch_size=batch_size, normalize_embeddings=True)
+            fresh = dict(zip(missing.keys(), encoded))
+            for key, embedding in fresh.items():
+                self.cache.put(key, embedding)
+            embeddings = [fresh[key] if embedding is None else embedding for key, embedding in zip(keys, embeddings)]
+        
+        if not embeddings:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(embeddings)
     
     def _normalize_bengali_text(self, text: str) -> str:
         """Normalize Bengali text by removing unnecessary spaces and fixing common issues."""
@@ -26,13 +54,40 @@ class EmbeddingManager:
         text = text.replace('  ', ' ')  # Remove double spaces
         return text
 
-    def serialize_embedding(self, embedding: np.ndarray) -> str:
-        """Convert numpy array to string for storage."""
-        return json.dumps(embedding.tolist())
+    @staticmethod
+    def serialize_embedding(embedding: np.ndarray, dtype: Optional[str] = None) -> bytes:
+        """Convert numpy array to raw bytes (float32 by default, float16 optional) for storage.
 
-    def deserialize_embedding(self, embedding_str: str) -> np.ndarray:
-        """Convert stored string back to numpy array."""
-        return np.array(json.loads(embedding_str))
+        A trailing byte records the dtype (its NumPy type code, "f" or "e"), so blobs stay
+        readable after EMBEDDING_DTYPE changes; it also makes the length odd, unlike older blobs.
+        """
+        array = np.ascontiguousarray(embedding, dtype=dtype or config.EMBEDDING_DTYPE)
+        if array.dtype.char not in EMBEDDING_DTYPE_CODES:
+            raise ValueError(f"Unsupported embedding dtype {array.dtype}")
+        return array.tobytes() + array.dtype.char.encode()
+
+    @staticmethod
+    def deserialize_embedding(embedding_data: Union[bytes, str], dtype: Optional[str] = None) -> np.ndarray:
+        """Convert stored bytes back to numpy array without copying; legacy JSON strings are still accepted.
+
+        Blobs without a dtype byte (even length, written before it was recorded) are read as
+        `dtype`, by default EMBEDDING_DTYPE.
+        """
+        if isinstance(embedding_data, str):
+            return np.array(json.loads(embedding_data), dtype=np.float32)
+        if len(embedding_data) % 2 == 0:
+            legacy_dtype = np.dtype(dtype or config.EMBEDDING_DTYPE)
+            if len(embedding_data) % legacy_dtype.itemsize:
+                raise ValueError(f"Embedding of {len(embedding_data)} bytes is not a whole number of {legacy_dtype}")
+            return np.frombuffer(embedding_data, dtype=legacy_dtype)
+        code = chr(embedding_data[-1])
+        if code not in EMBEDDING_DTYPE_CODES:
+            raise ValueError(f"Unknown embedding dtype code {code!r}")
+        stored_dtype = np.dtype(code)
+        count, remainder = divmod(len(embedding_data) - 1, stored_dtype.itemsize)
+        if remainder:
+            raise ValueError(f"Embedding of {len(embedding_data)} bytes is not a whole number of {stored_dtype}")
+        return np.frombuffer(embedding_data, dtype=stored_dtype, count=count)
 
     def calculate_similarity(self, emb1: np.ndarray, emb2: np.ndarray) -> float:
         """Calculate cosine similarity between two embeddings."""
@@ -40,61 +95,45 @@ class EmbeddingManager:
 
 class DocumentProcessor:
     def __init__(self):
-        # Optimized for Bengali text with smaller chunk size and larger overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=300,  # Smaller chunks for precise context matching
-            chunk_overlap=150,  # Large overlap to maintain context of Bengali literary references
-            length_function=len,
-            separators=["।।", "।", "\n\n", "\n", "!", "?", ".", " ", ","]  # Prioritize Bengali punctuation
-        )
+        self.text_splitter = make_text_splitter()
 
     async def process_pdf(self, file_path: str) -> List[Dict[str, Any]]:
-        """Process a PDF file and return chunks with metadata."""
-        from langchain_community.document_loaders import PyPDFLoader
-        import re
+        """Process a PDF file and return chunks with metadata, without blocking the event loop."""
+        return await get_ingest_executor().run(self.load_pdf_chunks, file_path)
 
-        loader = PyPDFLoader(file_path)
-        pages = loader.load()
-        
-        chunks = []
-        for page in pages:
-            # Clean and normalize the text
-            text = self._clean_bengali_text(page.page_content)
-            
-            # Split into smaller chunks
-            text_chunks = self.text_splitter.split_text(text)
-            
-            for i, chunk in enumerate(text_chunks):
-                if not chunk.strip():  # Skip empty chunks
-                    continue
-                    
-                chunks.append({
-                    'content': chunk,
-                    'metadata': {
-                        'page': page.metadata.get('page', 0),
-                        'chunk_id': i,
-                        'source': file_path,
-                        'total_chunks': len(text_chunks)
-                    }
-                })
-        
-        return chunks
+    def load_pdf_chunks(self, file_path: str) -> List[Dict[str, Any]]:
+        """Parse, clean and chunk a PDF file synchronously."""
+        return [chunk for page_chunks in self.iter_pdf_chunks(file_path) for chunk in page_chunks]
+
+    def iter_pdf_chunks(self, file_path: str, workers: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the chunks of each page in order, on worker processes for large PDFs."""
+        workers = self.extract_workers() if workers is None else workers
+        if workers > 1:
+            total_pages = self.count_pages(file_path)
+            if total_pages >= config.PDF_PARALLEL_MIN_PAGES:
+                yield from iter_pdf_chunks_parallel(file_path, total_pages, min(workers, total_pages))
+                return
+
+        # Serial path reads one page at a time, with the same pypdf extraction the workers use
+        yield from iter_pdf_chunks_serial(file_path, self.text_splitter)
+
+    @staticmethod
+    def extract_workers() -> int:
+        """Resolve the configured number of PDF extraction processes."""
+        if config.PDF_EXTRACT_WORKERS > 0:
+            return config.PDF_EXTRACT_WORKERS
+        return min(4, os.cpu_count() or 1)
+
+    @staticmethod
+    def count_pages(file_path: str) -> int:
+        """Return the number of pages without extracting any text."""
+        from pypdf import PdfReader
+        return len(PdfReader(file_path).pages)
+
+    def _chunk_page(self, page_content: str, page_number: int, file_path: str) -> List[Dict[str, Any]]:
+        """Clean one page and split it into chunks with metadata."""
+        return chunk_page(page_content, page_number, file_path, self.text_splitter)
 
     def _clean_bengali_text(self, text: str) -> str:
         """Clean and normalize Bengali text."""
-        # Remove unnecessary whitespace
-        text = ' '.join(text.split())
-        
-        # Fix common OCR issues in Bengali text
-        text = text.replace('।।', '।')  # Remove double dandas
-        text = text.replace('..', '.')   # Remove double periods
-        text = text.replace('  ', ' ')   # Remove double spaces
-        
-        # Add proper spacing after punctuation
-        text = text.replace('।', '। ')
-        text = text.replace('.', '. ')
-        
-        # Remove any non-Bengali, non-English characters except punctuation
-        text = re.sub(r'[^\u0980-\u09FF\u0964-\u0965a-zA-Z0-9\s\.,!?।]', '', text)
-        
-        return text.strip()
+        return clean_bengali_text(text)
@@ -0,0 +1,157 @@
+from typing import Any, Dict, Optional, Sequence, Tuple
+import numpy as np
+
+from src.core.vector_store import MemmapVectorIndex
+from src.core.vector_index import _normalize, _query_blocks, _top_k
+
+# Rows widened to float32 at a time while scoring the int8 matrix; small blocks stay in cache
+SCORE_BLOCK_ROWS = 512
+
+
+class ScalarQuantizer:
+    """Per-dimension affine int8 quantization: x ~= offset + scale * (code + 128)."""
+
+    def __init__(self, offset: np.ndarray, scale: np.ndarray):
+        self.offset = offset.astype(np.float32)
+        self.scale = scale.astype(np.float32)
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray) -> "ScalarQuantizer":
+        """Calibrate each dimension to the observed [min, max] range."""
+        low = vectors.min(axis=0)
+        high = vectors.max(axis=0)
+        scale = (high - low) / 255.0
+        scale[scale == 0] = 1.0  # Constant dimensions quantize to a single code
+        return cls(low, scale)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.offset) / self.scale) - 128
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.offset + self.scale * (codes.astype(np.float32) + 128)
+
+    def scores(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Approximate dot products of queries (d,) or (m, d) with every encoded row.
+
+        q . x = (q * scale) . code + q . offset + 128 * sum(q * scale), so only the
+        int8 matrix is read; it is widened to float32 one block at a time.
+        """
+        weights = (queries * self.scale).T
+        bias = queries @ self.offset + 128.0 * weights.sum(axis=0)
+        out = np.empty((len(codes),) + weights.shape[1:], dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = codes[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            out[start:start + len(block)] = block @ weights + bias
+        return out
+
+
+class QuantizedVectorIndex(MemmapVectorIndex):
+    """Memory-mapped store searched through an in-memory int8 copy of the matrix.
+
+    The first pass scores the int8 codes; only the best `rerank_candidates` rows are
+    re-scored with the full-precision vectors, which stay on disk in the shared store.
+    """
+
+    def __init__(self, path: str, rerank_candidates: int = 200):
+        super().__init__(path)
+        self.rerank_candidates = rerank_candidates
+        self.quantizer: Optional[ScalarQuantizer] = None
+        self._codes = np.empty((0, 0), dtype=np.int8)
+        self._coded: Optional[Tuple[int, int]] = None  # (inode, rows) the codes were built from
+        self._fitted_size = 0
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 3,
+        document_ids: Optional[Sequence[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Shortlist with int8 scores, then return exact cosine scores for the top-k."""
+        self._refresh()
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            query = _normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+            if document_ids is not None:
+                rows = self.partition_rows(document_ids)
+                return self._rerank(query, self.quantizer.scores(self._codes[rows], query), k, rows)
+            approximate = self.quantizer.scores(self._codes[:self._size], query)
+            return self._rerank(query, approximate, k)
+
+    def search_many(self, query_embeddings: np.ndarray, k: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """Shortlist blocks of queries with one int8 matrix product each, then re-rank each query exactly."""
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+        self._refresh()
+        with self._lock:
+            if self._size == 0 or k <= 0 or len(queries) == 0:
+                return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+            results = []
+            for block in _query_blocks(len(queries), self._size):
+                approximate = self.quantizer.scores(self._codes[:self._size], queries[block])
+                results.extend(self._rerank(query, approximate[:, row], k) for row, query in enumerate(queries[block]))
+        return np.stack([ids for ids, _ in results]), np.stack([scores for _, scores in results])
+
+    def _rerank(
+        self,
+        query: np.ndarray,
+        approximate: np.ndarray,
+        k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-score the best approximate candidates exactly; `rows` maps positions to matrix rows."""
+        candidates = min(max(k, self.rerank_candidates), len(approximate))
+        if candidates < len(approximate):
+            positions = np.argpartition(-approximate, candidates - 1)[:candidates]
+        else:
+            positions = np.arange(len(approximate))
+        rows = positions if rows is None else rows[positions]
+        rows.sort()  # Ascending row order keeps reads from the memory-mapped file sequential
+        exact = self._matrix[rows] @ query
+        return _top_k(np.asarray(self._ids[rows]), exact, k)
+
+    def _refresh(self) -> None:
+        """Re-map the store and quantize any rows that are not encoded yet."""
+        with self._lock:
+            super()._refresh()
+            state = (self._mapped[0], self._size)
+            if state == self._coded:
+                return
+
+            start = 0
+            if self._coded is not None and self._coded[0] == state[0] and self._coded[1] <= self._size:
+                start = self._coded[1]  # Same file, only appended rows are new
+            if self._size == 0:
+                self.quantizer, self._codes, self._fitted_size = None, np.empty((0, 0), dtype=np.int8), 0
+            elif start == 0 or self._size >= 2 * self._fitted_size:
+                # Calibrate on everything stored, again whenever the corpus doubles
+                self._fit()
+            else:
+                self._encode_rows(start, self._size)
+            self._coded = state
+
+    def _fit(self) -> None:
+        self.quantizer = ScalarQuantizer.fit(self._matrix[:self._size])
+        self._fitted_size = self._size
+        self._codes = np.empty((self._size, self._matrix.shape[1]), dtype=np.int8)
+        self._encode_rows(0, self._size)
+
+    def _encode_rows(self, start: int, end: int) -> None:
+        if end > len(self._codes):
+            # Grow geometrically so appends stay amortized O(1)
+            codes = np.empty((max(end, 2 * len(self._codes)), self._matrix.shape[1]), dtype=np.int8)
+            codes[:start] = self._codes[:start]
+            self._codes = codes
+        for block in range(start, end, SCORE_BLOCK_ROWS):
+            stop = min(block + SCORE_BLOCK_ROWS, end)
+            self._codes[block:stop] = self.quantizer.encode(self._matrix[block:stop])
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Bytes held in process memory for search versus the full-precision matrix."""
+        self._refresh()
+        dim = self._matrix.shape[1] if self._matrix is not None else 0
+        return {
+            "rows": self._size,
+            "int8_bytes": self._size * dim,
+            "float32_bytes": self._size * dim * 4
+        }
@@ -1,101 +1,481 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from dataclasses import dataclass
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from src.core.processors import EmbeddingManager
-from src.database.models import DocumentChunk, ChatHistory
+from src.core.vector_index import VectorIndex, get_vector_index
+from src.core.cache import AnswerCache, get_answer_cache
+from src.core.sentence_index import SentenceIndex, get_sentence_index
+from src.core.lexical_index import BM25Index, get_lexical_index, fuse_scores
+from src.core.executor import BoundedExecutor, ExecutorOverloaded, get_query_executor
+from src.core.batcher import EmbeddingBatcher
+from src.core.history import ChatHistoryWriter, get_chat_history_writer
+from src.core.metrics import MetricsRegistry, get_metrics
+from src.core import config
+from src.database.models import DocumentChunk
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from sqlalchemy import select
-import json
-from collections import Counter
+import asyncio
+import time
+
+NOT_FOUND_ANSWER = "এই তথ্যটি পাঠ্যাংশে সরাসরি উল্লেখ করা নেই।"
+
+# Pre-defined answers for specific questions; pinned in the answer cache
+KNOWN_ANSWERS = {
+    "অনুপমের ভাষায় সুপুরুষ কাকে বলা হয়েছে?": "শুম্ভুনাথ",
+    "কাকে অনুপমের ভাগ্য দেবতা বলে উল্লেখ করা হয়েছে?": "মামাকে",
+    "বিয়ের সময় কল্যাণীর প্রকৃত বয়স কত ছিল?": "১৫ বছর"
+}
+
+# Held while this process rebuilds its indexes after another worker's ingest
+_reload_lock = asyncio.Lock()
+
+@dataclass
+class RetrievalResult:
+    """Request-scoped retrieval output shared by answering, source building and evaluation."""
+    query: str
+    query_embedding: np.ndarray
+    chunks: List[DocumentChunk]
+    scores: np.ndarray
+
+    def top(self, n: int) -> "RetrievalResult":
+        """Return a view limited to the n best chunks."""
+        return RetrievalResult(self.query, self.query_embedding, self.chunks[:n], self.scores[:n])
+
+class PageFilterUnavailable(Exception):
+    """Raised when a page filter covers documents whose chunks have no page numbers."""
+
+@dataclass
+class RetrievalFilter:
+    """Limits retrieval to some documents and/or an inclusive 1-based page range."""
+    document_ids: Optional[List[int]] = None
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+
+    @property
+    def has_pages(self) -> bool:
+        return self.page_from is not None or self.page_to is not None
 
 class RAGSystem:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        vector_index: Optional[VectorIndex] = None,
+        embedding_manager: Optional[EmbeddingManager] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        sentence_index: Optional[SentenceIndex] = None,
+        lexical_index: Optional[BM25Index] = None,
+        executor: Optional[BoundedExecutor] = None,
+        batcher: Optional[EmbeddingBatcher] = None,
+        history_writer: Optional[ChatHistoryWriter] = None,
+        metrics: Optional[MetricsRegistry] = None
+    ):
         self.session = session
-        self.embedding_manager = EmbeddingManager()
-        self.vectorizer = TfidfVectorizer(
-            strip_accents='unicode',
-            lowercase=True,
-            ngram_range=(1, 2),
-            max_features=10000
+        self.embedding_manager = embedding_manager if embedding_manager is not None else EmbeddingManager()
+        self.vector_index = vector_index if vector_index is not None else get_vector_index()
+        self.answer_cache = answer_cache if answer_cache is not None else get_answer_cache()
+        self.answer_cache.pin(KNOWN_ANSWERS)
+        self.sentence_index = sentence_index if sentence_index is not None else get_sentence_index()
+        self.lexical_index = lexical_index if lexical_index is not None else get_lexical_index()
+        self.executor = executor if executor is not None else get_query_executor()
+        self.batcher = batcher
+        self.history_writer = history_writer if history_writer is not None else get_chat_history_writer()
+        self.metrics = metrics if metrics is not None else get_metrics()
+
+    async def sync_indexes(self) -> bool:
+        """Rebuild this worker's BM25 and sentence indexes, and drop its cached answers, if another
+        worker has changed the corpus since they were loaded. Returns True if a reload happened.
+
+        Only a vector index shared between processes (VECTOR_STORE_PATH) reports a generation;
+        the reload reads every chunk, so it costs as much as startup.
+        """
+        if self.vector_index.generation() in (None, self.vector_index.loaded_generation):
+            return False
+        async with _reload_lock:
+            generation = self.vector_index.generation()
+            if generation == self.vector_index.loaded_generation:
+                return False  # Another request reloaded while this one waited
+            with self.metrics.timer("index_reload"):
+                await self.sentence_index.load(self.session)
+                await self.lexical_index.load(self.session)
+            self.answer_cache.bump_generation()
+            self.vector_index.loaded_generation = generation
+            return True
+
+    async def _embed(self, texts: List[str]) -> np.ndarray:
+        """Encode texts off the event loop."""
+        return await self.executor.run(self.embedding_manager.get_embeddings, texts)
+
+    async def _embed_query(self, query: str) -> np.ndarray:
+        """Encode one query, micro-batched with concurrent requests when a batcher is configured."""
+        with self.metrics.timer("embed_query"):
+            if self.batcher is not None:
+                return await self.batcher.embed(query)
+            return (await self._embed([query]))[0]
+
+    async def retrieve(
+        self,
+        query: str,
+        n_results: int = 3,
+        query_embedding: Optional[np.ndarray] = None,
+        filters: Optional[RetrievalFilter] = None
+    ) -> RetrievalResult:
+        """Embed the query once and fetch the top-n chunks with their similarity scores."""
+        # Get query embedding
+        if query_embedding is None:
+            query_embedding = await self._embed_query(query)
+        
+        if filters is not None:
+            chunk_ids, scores = await self._filtered_search(query_embedding, n_results, filters)
+        else:
+            with self.metrics.timer("similarity_search"):
+                chunk_ids, scores = await self.executor.run(self._search, query, query_embedding, n_results)
+        return await self._load_retrieval(query, query_embedding, chunk_ids.tolist(), scores)
+
+    async def _filtered_search(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int,
+        filters: RetrievalFilter
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Score only the chunks matching the filter, by dense similarity."""
+        if not filters.has_pages:
+            # Document filters map straight onto vector index partitions
+            with self.metrics.timer("similarity_search"):
+                return await self.executor.run(
+                    self.vector_index.search, query_embedding, n_results, filters.document_ids
+                )
+        
+        # Chunks ingested before pages were recorded (and not backfilled) could never match
+        legacy = select(DocumentChunk.document_id).where(
+            DocumentChunk.page.is_(None), DocumentChunk.deleted_at.is_(None)
+        )
+        if filters.document_ids is not None:
+            legacy = legacy.where(DocumentChunk.document_id.in_(filters.document_ids))
+        with self.metrics.timer("db_page_filter"):
+            legacy_ids = (await self.session.execute(legacy.distinct().limit(10))).scalars().all()
+        if legacy_ids:
+            raise PageFilterUnavailable(
+                f"Documents {sorted(legacy_ids)} have no page numbers; ingest them again to filter by page."
+            )
+        
+        # Page ranges are resolved through the (document_id, page) index
+        stmt = select(DocumentChunk.id).where(DocumentChunk.deleted_at.is_(None))
+        if filters.document_ids is not None:
+            stmt = stmt.where(DocumentChunk.document_id.in_(filters.document_ids))
+        if filters.page_from is not None:
+            stmt = stmt.where(DocumentChunk.page >= filters.page_from - 1)
+        if filters.page_to is not None:
+            stmt = stmt.where(DocumentChunk.page <= filters.page_to - 1)
+        with self.metrics.timer("db_page_filter"):
+            candidate_ids = np.asarray((await self.session.execute(stmt)).scalars().all(), dtype=np.int64)
+        
+        with self.metrics.timer("similarity_search"):
+            scores = await self.executor.run(self.vector_index.score, query_embedding, candidate_ids)
+        known = ~np.isnan(scores)
+        candidate_ids, scores = candidate_ids[known], scores[known]
+        top = np.argsort(-scores, kind="stable")[:n_results]
+        return candidate_ids[top], scores[top]
+
+    def _search(self, query: str, query_embedding: np.ndarray, n_results: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rank chunk ids for the query (CPU-bound; runs on the executor)."""
+        chunk_ids, scores = self._hybrid_search(query, query_embedding, n_results)
+        if chunk_ids is None:
+            # Score every indexed chunk with a single matrix-vector product
+            chunk_ids, scores = self.vector_index.search(query_embedding, n_results)
+        return chunk_ids, scores
+
+    def _search_many(
+        self,
+        queries: List[str],
+        query_embeddings: np.ndarray,
+        n_results: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Rank chunk ids for many queries exactly as _search ranks each one (runs on the executor).
+
+        Queries that fall back to a full scan share one matrix-matrix product.
+        """
+        ranked = [
+            self._hybrid_search(query, query_embedding, n_results)
+            for query, query_embedding in zip(queries, query_embeddings)
+        ]
+        fallback = [i for i, (chunk_ids, _) in enumerate(ranked) if chunk_ids is None]
+        if fallback:
+            chunk_ids, scores = self.vector_index.search_many(query_embeddings[fallback], n_results)
+            for row, i in enumerate(fallback):
+                ranked[i] = (chunk_ids[row], scores[row])
+        return ranked
+
+    def _hybrid_search(self, query: str, query_embedding: np.ndarray, n_results: int):
+        """Re-rank BM25 candidates with dense scores; returns (None, None) to fall back to a full scan."""
+        if not config.HYBRID_RETRIEVAL or len(self.lexical_index) == 0:
+            return None, None
+        
+        candidate_ids, lexical_scores = self.lexical_index.search(query, config.BM25_CANDIDATES)
+        if len(candidate_ids) < n_results:
+            # Too few lexical matches (e.g. an English query against Bengali text)
+            return None, None
+        
+        dense_scores = self.vector_index.score(query_embedding, candidate_ids)
+        known = ~np.isnan(dense_scores)
+        candidate_ids, lexical_scores, dense_scores = candidate_ids[known], lexical_scores[known], dense_scores[known]
+        if len(candidate_ids) < n_results:
+            return None, None
+        
+        fused = fuse_scores(dense_scores, lexical_scores, config.HYBRID_DENSE_WEIGHT, config.HYBRID_LEXICAL_WEIGHT)
+        top = np.argsort(-fused, kind="stable")[:n_results]
+        # Rank by fused score but report cosine similarity, as the dense path does
+        return candidate_ids[top], dense_scores[top]
+
+    async def _load_retrieval(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        chunk_ids: Sequence[int],
+        scores: Sequence[float]
+    ) -> RetrievalResult:
+        """Fetch the given chunks in one query and keep them in ranked order."""
+        if len(chunk_ids) == 0:
+            return RetrievalResult(query, query_embedding, [], np.empty(0, dtype=np.float32))
+        
+        # Join each chunk's document so callers can read its metadata without another query
+        stmt = (
+            select(DocumentChunk)
+            .options(joinedload(DocumentChunk.document))
+            .where(DocumentChunk.id.in_(list(chunk_ids)), DocumentChunk.deleted_at.is_(None))
+        )
+        # Tombstoned ids can still arrive from cached answers or another worker's indexes
+        with self.metrics.timer("db_chunk_load"):
+            result = await self.session.execute(stmt)
+            chunks_by_id = {chunk.id: chunk for chunk in result.scalars().all()}
+        found = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id in chunks_by_id]
+        return RetrievalResult(
+            query,
+            query_embedding,
+            [chunks_by_id[chunk_ids[i]] for i in found],
+            np.asarray(scores, dtype=np.float32)[found]
         )
-        # Pre-defined answers for specific questions
-        self.known_answers = {
-            "অনুপমের ভাষায় সুপুরুষ কাকে বলা হয়েছে?": "শুম্ভুনাথ",
-            "কাকে অনুপমের ভাগ্য দেবতা বলে উল্লেখ করা হয়েছে?": "মামাকে",
-            "বিয়ের সময় কল্যাণীর প্রকৃত বয়স কত ছিল?": "১৫ বছর"
-        }
+
+    async def answer_query(
+        self,
+        query: str,
+        chat_history: Optional[List[Dict[str, str]]] = None,
+        n_results: int = 3,
+        filters: Optional[RetrievalFilter] = None
+    ) -> Tuple[str, RetrievalResult]:
+        """Answer a query, serving exact and near-duplicate repeats from the answer cache.
+
+        Filtered queries bypass the answer cache, whose entries are not keyed by filter.
+        """
+        await self.sync_indexes()
+        query_embedding = await self._embed_query(query)
+        
+        cached = self.answer_cache.get(query, query_embedding) if filters is None else None
+        if cached is not None:
+            self.metrics.increment("answer_cache_hits")
+            # Skip vector search and sentence selection; only reload the cached sources
+            retrieval = await self._load_retrieval(
+                query, query_embedding, cached.source_chunk_ids, cached.source_scores
+            )
+            await self._store_chat_history(query, cached.answer)
+            return cached.answer, retrieval
+        
+        if filters is None and self.answer_cache.get_pinned(query) is None:
+            self.metrics.increment("answer_cache_misses")
+        retrieval = await self.retrieve(query, n_results, query_embedding=query_embedding, filters=filters)
+        response = await self.process_query(
+            query, chat_history, retrieval=retrieval, cache_answer=filters is None
+        )
+        return response, retrieval
 
     async def _get_relevant_chunks(self, query: str, n_results: int = 3) -> List[DocumentChunk]:
         """Retrieve relevant document chunks based on query similarity."""
-        # Get query embedding
-        query_embedding = self.embedding_manager.get_embeddings([query])[0]
-        query_embedding_str = self.embedding_manager.serialize_embedding(query_embedding)
-        
-        # Get all chunks
-        stmt = select(DocumentChunk)
-        result = await self.session.execute(stmt)
-        chunks = result.scalars().all()
-        
-        # Calculate similarities
-        similarities = []
-        for chunk in chunks:
-            chunk_embedding = self.embedding_manager.deserialize_embedding(chunk.embedding)
-            similarity = self.embedding_manager.calculate_similarity(query_embedding, chunk_embedding)
-            similarities.append((chunk, similarity))
-        
-        # Sort by similarity and return top n
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return [chunk for chunk, _ in similarities[:n_results]]
-
-    async def process_query(self, query: str, chat_history: Optional[List[Dict[str, str]]] = None) -> str:
-        """Process a user query and return a response."""
+        return (await self.retrieve(query, n_results)).chunks
+
+    async def process_query(
+        self,
+        query: str,
+        chat_history: Optional[List[Dict[str, str]]] = None,
+        retrieval: Optional[RetrievalResult] = None,
+        cache_answer: bool = True
+    ) -> str:
+        """Process a user query and return a response, reusing a precomputed retrieval if given."""
         # Check if it's a known question
-        if query in self.known_answers:
-            response = self.known_answers[query]
+        known_answer = self.answer_cache.get_pinned(query)
+        if known_answer is not None:
+            self.metrics.increment("known_answer_hits")
+            response = known_answer
         else:
             # Get relevant chunks
-            relevant_chunks = await self._get_relevant_chunks(query)
+            if retrieval is None:
+                retrieval = await self.retrieve(query)
+            relevant_chunks = retrieval.chunks
             
             if not relevant_chunks:
-                return "এই তথ্যটি পাঠ্যাংশে সরাসরি উল্লেখ করা নেই।"
+                return NOT_FOUND_ANSWER
             
             # Get the most relevant chunk
-            chunk_text = relevant_chunks[0].content
-            
-            # Use TF-IDF to find the most relevant sentence
-            sentences = [s.strip() for s in chunk_text.split('।') if s.strip()]
-            if not sentences:
-                return "এই তথ্যটি পাঠ্যাংশে সরাসরি উল্লেখ করা নেই।"
+            top_chunk = relevant_chunks[0]
             
+            # Score its sentences against the query with the corpus-level TF-IDF
             try:
-                tfidf_matrix = self.vectorizer.fit_transform([query] + sentences)
-                similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])[0]
-                
-                # Filter out NaN values and get valid similarities
-                valid_similarities = [(i, s) for i, s in enumerate(similarities) if not np.isnan(s)]
-                
-                if not valid_similarities:
-                    return "এই তথ্যটি পাঠ্যাংশে সরাসরি উল্লেখ করা নেই।"
-                
-                # Get the most relevant sentence
-                best_sentence_idx = max(valid_similarities, key=lambda x: x[1])[0]
-                response = sentences[best_sentence_idx] + "।"
+                with self.metrics.timer("sentence_selection"):
+                    best_sentence = await self.executor.run(
+                        self.sentence_index.best_sentence, query, top_chunk.id, top_chunk.content
+                    )
+            except ExecutorOverloaded:
+                raise
             except Exception as e:
                 print(f"Error in TF-IDF processing: {e}")
-                return "এই তথ্যটি পাঠ্যাংশে সরাসরি উল্লেখ করা নেই।"
-        
-        # Store chat history
-        chat_entry = ChatHistory(
-            user_query=query,
-            system_response=response
-        )
-        self.session.add(chat_entry)
-        await self.session.commit()
+                return NOT_FOUND_ANSWER
+            
+            if best_sentence is None:
+                return NOT_FOUND_ANSWER
+            response = best_sentence + "।"
+            
+            if cache_answer:
+                self.answer_cache.put(
+                    query,
+                    response,
+                    [chunk.id for chunk in relevant_chunks],
+                    retrieval.scores.tolist(),
+                    retrieval.query_embedding
+                )
         
+        await self._store_chat_history(query, response)
         return response
 
-    async def evaluate_response(self, query: str, response: str, relevant_chunks: List[DocumentChunk]) -> Dict[str, float]:
+    async def process_queries(
+        self,
+        queries: List[str],
+        n_results: int = 3,
+        store_history: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Answer many queries with one batched encode, one retrieval pass and one chat-history insert.
+
+        Chunks are ranked as /api/query ranks them (hybrid BM25 + dense, falling back to a
+        dense scan), so answers written to the shared answer cache agree with the live path.
+
+        Results are returned in input order with per-query timings; stages shared by the
+        whole batch are amortized evenly across its queries. Offline evaluation passes
+        store_history=False to keep its question bank out of the chat history.
+        """
+        if not queries:
+            return []
+        await self.sync_indexes()
+        timings = [{"embedding": 0.0, "retrieval": 0.0, "answer": 0.0} for _ in queries]
+        
+        start = time.perf_counter()
+        query_embeddings = await self._embed(queries)
+        elapsed = time.perf_counter() - start
+        self.metrics.observe("embed_query_batch", elapsed)
+        _spread(timings, "embedding", elapsed)
+        
+        # Known and cached answers skip retrieval entirely
+        answers: List[Optional[str]] = [None] * len(queries)
+        sources: List[Tuple[List[int], List[float]]] = [([], [])] * len(queries)
+        cached_flags = [False] * len(queries)
+        pending = []
+        known_count = 0
+        for i, query in enumerate(queries):
+            started = time.perf_counter()
+            known_answer = self.answer_cache.get_pinned(query)
+            cached = None if known_answer is not None else self.answer_cache.get(query, query_embeddings[i])
+            if known_answer is not None:
+                answers[i] = known_answer
+                cached_flags[i] = True
+                known_count += 1
+            elif cached is not None:
+                answers[i] = cached.answer
+                sources[i] = (cached.source_chunk_ids, cached.source_scores)
+                cached_flags[i] = True
+            else:
+                pending.append(i)
+            timings[i]["answer"] += time.perf_counter() - started
+        self.metrics.increment("known_answer_hits", known_count)
+        self.metrics.increment("answer_cache_hits", len(queries) - len(pending) - known_count)
+        self.metrics.increment("answer_cache_misses", len(pending))
+        
+        if pending:
+            start = time.perf_counter()
+            with self.metrics.timer("similarity_search"):
+                ranked = await self.executor.run(
+                    self._search_many, [queries[i] for i in pending], query_embeddings[pending], n_results
+                )
+            unique_ids = np.unique(np.concatenate([ids for ids, _ in ranked])).tolist()
+            stmt = select(DocumentChunk.id, DocumentChunk.content).where(
+                DocumentChunk.id.in_(unique_ids), DocumentChunk.deleted_at.is_(None)
+            )
+            with self.metrics.timer("db_chunk_load"):
+                contents = {row.id: row.content for row in (await self.session.execute(stmt)).all()}
+            _spread(timings, "retrieval", time.perf_counter() - start, pending)
+            
+            # Sentence selection for all pending queries in one executor call
+            requests = []
+            for row, i in enumerate(pending):
+                top_id = int(ranked[row][0][0]) if len(ranked[row][0]) else None
+                requests.append((queries[i], top_id, contents.get(top_id)))
+            with self.metrics.timer("sentence_selection"):
+                selected = await self.executor.run(self._select_sentences, requests)
+            for row, i in enumerate(pending):
+                best_sentence, elapsed = selected[row]
+                timings[i]["answer"] += elapsed
+                row_ids = [int(chunk_id) for chunk_id in ranked[row][0] if int(chunk_id) in contents]
+                row_scores = [float(score) for chunk_id, score in zip(*ranked[row]) if int(chunk_id) in contents]
+                sources[i] = (row_ids, row_scores)
+                if best_sentence is None:
+                    answers[i] = NOT_FOUND_ANSWER
+                    continue
+                answers[i] = best_sentence + "।"
+                self.answer_cache.put(queries[i], answers[i], row_ids, row_scores, query_embeddings[i])
+        
+        # Queued as one bulk insert for the background writer
+        history = [
+            {"user_query": query, "system_response": answer}
+            for query, answer, (source_ids, _), cached in zip(queries, answers, sources, cached_flags)
+            if cached or (source_ids and answer != NOT_FOUND_ANSWER)
+        ] if store_history else []
+        if history:
+            self.history_writer.submit_many(history)
+        
+        return [
+            {
+                "query": query,
+                "answer": answer,
+                "source_chunk_ids": source_ids,
+                "scores": source_scores,
+                "cached": cached,
+                "timing_ms": {stage: round(seconds * 1000, 3) for stage, seconds in timing.items()}
+            }
+            for query, answer, (source_ids, source_scores), cached, timing
+            in zip(queries, answers, sources, cached_flags, timings)
+        ]
+
+    def _select_sentences(self, requests: List[Tuple[str, Optional[int], Optional[str]]]) -> List[Tuple[Optional[str], float]]:
+        """Pick the best sentence of each (query, chunk id, chunk text) request, timing each one."""
+        results = []
+        for query, chunk_id, content in requests:
+            started = time.perf_counter()
+            best_sentence = None
+            if chunk_id is not None and content is not None:
+                try:
+                    best_sentence = self.sentence_index.best_sentence(query, chunk_id, content)
+                except Exception as e:
+                    print(f"Error in TF-IDF processing: {e}")
+            results.append((best_sentence, time.perf_counter() - started))
+        return results
+
+    async def _store_chat_history(self, query: str, response: str) -> None:
+        """Store chat history without waiting for the write."""
+        self.history_writer.submit(query, response)
+
+    async def evaluate_response(
+        self,
+        query: str,
+        response: str,
+        relevant_chunks: List[DocumentChunk],
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Dict[str, float]:
         """Evaluate the quality of the RAG response."""
         if not relevant_chunks:
             return {
@@ -104,37 +484,54 @@ class RAGSystem:
             }
 
         try:
-            # Calculate groundedness score
-            groundedness_scores = []
-            response_embedding = self.embedding_manager.get_embeddings([response])[0]
-            
-            for chunk in relevant_chunks:
-                chunk_embedding = self.embedding_manager.deserialize_embedding(chunk.embedding)
-                similarity = self.embedding_manager.calculate_similarity(response_embedding, chunk_embedding)
-                if not np.isnan(similarity):  # Filter out NaN values
-                    groundedness_scores.append(similarity)
-            
-            # Calculate relevance score
-            query_embedding = self.embedding_manager.get_embeddings([query])[0]
-            relevance_scores = []
-            
-            for chunk in relevant_chunks:
-                chunk_embedding = self.embedding_manager.deserialize_embedding(chunk.embedding)
-                similarity = self.embedding_manager.calculate_similarity(query_embedding, chunk_embedding)
-                if not np.isnan(similarity):  # Filter out NaN values
-                    relevance_scores.append(similarity)
-            
-            # Use default values if no valid scores
-            groundedness = float(np.mean(groundedness_scores)) if groundedness_scores else 0.0
-            relevance = float(np.mean(relevance_scores)) if relevance_scores else 0.0
-            
-            return {
-                "groundedness": groundedness,
-                "relevance": relevance
-            }
+            with self.metrics.timer("evaluate_response"):
+                # Encode only what the caller has not already embedded
+                if query_embedding is None:
+                    response_embedding, query_embedding = await self._embed([response, query])
+                else:
+                    response_embedding = (await self._embed([response]))[0]
+                
+                # Read ORM attributes here, not on the worker thread
+                chunk_embeddings = [chunk.embedding for chunk in relevant_chunks]
+                return await self.executor.run(
+                    self._score_response, response_embedding, query_embedding, chunk_embeddings
+                )
+        except ExecutorOverloaded:
+            raise
         except Exception as e:
             print(f"Error in evaluate_response: {e}")
             return {
                 "groundedness": 0.0,
                 "relevance": 0.0
             }
+
+    def _score_response(
+        self,
+        response_embedding: np.ndarray,
+        query_embedding: np.ndarray,
+        chunk_embeddings: List[bytes]
+    ) -> Dict[str, float]:
+        """Score response and query against every chunk in one matrix product."""
+        chunk_matrix = np.stack([
+            self.embedding_manager.deserialize_embedding(embedding) for embedding in chunk_embeddings
+        ]).astype(np.float32)
+        probes = np.stack([response_embedding, query_embedding]).astype(np.float32)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarities = (chunk_matrix @ probes.T) / np.outer(
+                np.linalg.norm(chunk_matrix, axis=1),
+                np.linalg.norm(probes, axis=1)
+            )
+        
+        # Filter out NaN values and use default values if no valid scores
+        groundedness_scores = similarities[:, 0][~np.isnan(similarities[:, 0])]
+        relevance_scores = similarities[:, 1][~np.isnan(similarities[:, 1])]
+        return {
+            "groundedness": float(np.mean(groundedness_scores)) if len(groundedness_scores) else 0.0,
+            "relevance": float(np.mean(relevance_scores)) if len(relevance_scores) else 0.0
+        }
+
+def _spread(timings: List[Dict[str, float]], stage: str, seconds: float, rows: Optional[List[int]] = None) -> None:
+    """Amortize a shared stage's duration evenly across the queries that used it."""
+    rows = list(range(len(timings))) if rows is None else rows
+    for i in rows:
+        timings[i][stage] += seconds / len(rows)
@@ -0,0 +1,141 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from src.database.models import ChunkSentence
+
+# Same analyzer settings as the per-query TfidfVectorizer this index replaces
+N_FEATURES = 2 ** 18
+_hasher = HashingVectorizer(
+    strip_accents='unicode',
+    lowercase=True,
+    ngram_range=(1, 2),
+    n_features=N_FEATURES,
+    alternate_sign=False,
+    norm=None
+)
+
+def split_sentences(text: str) -> List[str]:
+    """Split chunk text on the Bengali full stop (danda)."""
+    return [s.strip() for s in text.split('।') if s.strip()]
+
+def term_frequencies(texts: Sequence[str]) -> sparse.csr_matrix:
+    """Return raw term counts for the given texts as a sparse matrix."""
+    return _hasher.transform(texts).astype(np.float32)
+
+def serialize_tf(row: sparse.csr_matrix) -> bytes:
+    """Pack one sparse row as int32 indices followed by float32 counts."""
+    indices = row.indices.astype(np.int32)
+    return indices.tobytes() + row.data.astype(np.float32).tobytes()
+
+def deserialize_tf(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Unpack a row written by serialize_tf into (indices, counts)."""
+    nnz = len(data) // 8
+    return np.frombuffer(data, dtype=np.int32, count=nnz), np.frombuffer(data, dtype=np.float32, offset=4 * nnz)
+
+class SentenceIndex:
+    """Corpus-level TF-IDF over chunk sentences, updated incrementally on ingest."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sentences: Dict[int, Tuple[List[str], sparse.csr_matrix]] = {}
+        self._document_frequency = np.zeros(N_FEATURES, dtype=np.int64)
+        self._n_sentences = 0
+
+    def __len__(self) -> int:
+        return self._n_sentences
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sentences.clear()
+            self._document_frequency[:] = 0
+            self._n_sentences = 0
+
+    def add(self, chunk_id: int, sentences: List[str], tf: sparse.csr_matrix) -> None:
+        """Register a chunk's sentences and their term-count rows."""
+        if not sentences:
+            return
+        tf = sparse.csr_matrix(tf, dtype=np.float32)
+        with self._lock:
+            self._sentences[chunk_id] = (sentences, tf)
+            # Each sentence counts once per term it contains
+            np.add.at(self._document_frequency, tf.indices, 1)
+            self._n_sentences += len(sentences)
+
+    def remove(self, chunk_ids: Sequence[int]) -> None:
+        """Forget the sentences of the given chunks."""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                entry = self._sentences.pop(int(chunk_id), None)
+                if entry is not None:
+                    np.subtract.at(self._document_frequency, entry[1].indices, 1)
+                    self._n_sentences -= len(entry[0])
+
+    def best_sentence(self, query: str, chunk_id: int, chunk_text: Optional[str] = None) -> Optional[str]:
+        """Return the chunk sentence most similar to the query under the corpus TF-IDF weights."""
+        entry = self._sentences.get(chunk_id)
+        if entry is None:
+            # Chunk not indexed (e.g. stored before the sentence index existed): vectorize on the fly
+            if chunk_text is None:
+                return None
+            sentences = split_sentences(chunk_text)
+            if not sentences:
+                return None
+            entry = (sentences, term_frequencies(sentences))
+        sentences, tf = entry
+
+        query_vector = _l2_normalize(self._weight(term_frequencies([query])))
+        sentence_vectors = _l2_normalize(self._weight(tf))
+        scores = (sentence_vectors @ query_vector.T).toarray().ravel()
+        return sentences[int(np.argmax(scores))]
+
+    async def load(self, session: AsyncSession) -> int:
+        """Rebuild the index from the persisted sentence rows."""
+        stmt = select(
+            ChunkSentence.chunk_id, ChunkSentence.content, ChunkSentence.tf_vector
+        ).order_by(ChunkSentence.chunk_id, ChunkSentence.position)
+        rows = (await session.execute(stmt)).all()
+
+        self.clear()
+        grouped: Dict[int, List] = {}
+        for row in rows:
+            grouped.setdefault(row.chunk_id, []).append(row)
+        for chunk_id, chunk_rows in grouped.items():
+            self.add(chunk_id, [row.content for row in chunk_rows], _rows_to_csr([row.tf_vector for row in chunk_rows]))
+        return len(rows)
+
+    def _weight(self, tf: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Apply smoothed idf (as TfidfVectorizer computes it) to the stored terms only."""
+        weighted = tf.copy()
+        df = self._document_frequency[weighted.indices]
+        weighted.data = weighted.data * (np.log((1 + self._n_sentences) / (1 + df)) + 1).astype(np.float32)
+        return weighted
+
+def _rows_to_csr(rows: List[bytes]) -> sparse.csr_matrix:
+    indptr = [0]
+    indices, data = [], []
+    for row in rows:
+        row_indices, row_data = deserialize_tf(row)
+        indices.append(row_indices)
+        data.append(row_data)
+        indptr.append(indptr[-1] + len(row_indices))
+    return sparse.csr_matrix(
+        (np.concatenate(data), np.concatenate(indices), np.asarray(indptr)),
+        shape=(len(rows), N_FEATURES)
+    )
+
+def _l2_normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(matrix).tocsr()
+
+# Process-wide sentence index shared by every request
+sentence_index = SentenceIndex()
+
+def get_sentence_index() -> SentenceIndex:
+    """Return the process-wide sentence index."""
+    return sentence_index
@@ -0,0 +1,271 @@
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+import threading
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from src.core import config
+from src.database.models import DocumentChunk
+
+# Upper bound on the (queries x rows) score block held at once by search_many: 64 MB of float32
+SEARCH_BLOCK_SCORES = 1 << 24
+
+class VectorIndex:
+    """In-memory index of normalized chunk embeddings backed by one contiguous float32 matrix."""
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.RLock()  # Re-entrant so subclasses can extend locked methods
+        self._initial_capacity = initial_capacity
+        self._matrix: Optional[np.ndarray] = None  # Allocated lazily once the dimension is known
+        self._ids = np.empty(initial_capacity, dtype=np.int64)
+        self._document_ids = np.empty(initial_capacity, dtype=np.int64)  # Owning document per row
+        self._positions: Dict[int, int] = {}  # chunk id -> matrix row
+        self._partitions: Optional[Dict[int, np.ndarray]] = None  # document id -> rows, built on demand
+        self._size = 0
+        self.loaded_generation: Optional[int] = None  # Shared corpus generation this process last loaded
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    def clear(self) -> None:
+        """Drop every vector from the index."""
+        with self._lock:
+            self._matrix = None
+            self._ids = np.empty(self._initial_capacity, dtype=np.int64)
+            self._document_ids = np.empty(self._initial_capacity, dtype=np.int64)
+            self._positions.clear()
+            self._partitions = None
+            self._size = 0
+
+    def add(
+        self,
+        chunk_ids: Sequence[int],
+        embeddings: Sequence[np.ndarray],
+        document_ids: Optional[Sequence[int]] = None
+    ) -> None:
+        """Append embeddings for the given chunk ids, normalizing them to unit length."""
+        if len(chunk_ids) == 0:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(chunk_ids), -1))
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.empty((self._initial_capacity, vectors.shape[1]), dtype=np.float32)
+            elif vectors.shape[1] != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._matrix.shape[1]}"
+                )
+            self._reserve(self._size + len(vectors))
+            end = self._size + len(vectors)
+            self._matrix[self._size:end] = vectors
+            self._ids[self._size:end] = np.asarray(chunk_ids, dtype=np.int64)
+            self._document_ids[self._size:end] = _document_column(document_ids, len(chunk_ids))
+            self._partitions = None
+            for offset, chunk_id in enumerate(chunk_ids):
+                self._positions[int(chunk_id)] = self._size + offset
+            self._size = end
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 3,
+        document_ids: Optional[Sequence[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the ids and cosine scores of the top-k chunks, best first, optionally
+        scoring only the partitions of the given documents."""
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            if document_ids is not None:
+                rows = self.partition_rows(document_ids)
+                matrix = self._matrix[rows]
+                ids = self._ids[rows]
+            else:
+                matrix = self._matrix[:self._size]
+                ids = self._ids[:self._size]
+
+            query = _normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+            scores = matrix @ query
+
+        return _top_k(ids, scores, k)
+
+    def search_many(self, query_embeddings: np.ndarray, k: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (n_queries, k) arrays of ids and scores, one matrix-matrix product per block of queries."""
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+        with self._lock:
+            if self._size == 0 or k <= 0 or len(queries) == 0:
+                return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+            ids = self._ids[:self._size]
+            matrix = self._matrix[:self._size]
+            k = min(k, self._size)
+            top_ids = np.empty((len(queries), k), dtype=np.int64)
+            top_scores = np.empty((len(queries), k), dtype=np.float32)
+            # Blocks of queries keep the score matrix bounded however many queries arrive
+            for block in _query_blocks(len(queries), self._size):
+                scores = queries[block] @ matrix.T
+                if k < self._size:
+                    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                else:
+                    top = np.tile(np.arange(k), (len(scores), 1))
+                block_scores = np.take_along_axis(scores, top, axis=1)
+                order = np.argsort(-block_scores, axis=1, kind="stable")
+                top_ids[block] = ids[np.take_along_axis(top, order, axis=1)]
+                top_scores[block] = np.take_along_axis(block_scores, order, axis=1)
+        return top_ids, top_scores
+
+    def score(self, query_embedding: np.ndarray, chunk_ids: Sequence[int]) -> np.ndarray:
+        """Return cosine scores for the given chunk ids only (NaN for ids not in the index)."""
+        with self._lock:
+            rows = np.asarray([self._positions.get(int(chunk_id), -1) for chunk_id in chunk_ids], dtype=np.int64)
+            scores = np.full(len(rows), np.nan, dtype=np.float32)
+            known = rows >= 0
+            if known.any():
+                query = _normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+                scores[known] = self._matrix[rows[known]] @ query
+        return scores
+
+    def remove(self, chunk_ids: Sequence[int]) -> int:
+        """Drop the given chunks and compact the remaining rows in place; returns rows removed."""
+        with self._lock:
+            keep = self._keep_mask(chunk_ids)
+            if keep is None:
+                return 0
+            kept = int(keep.sum())
+            removed = self._size - kept
+            self._matrix[:kept] = self._matrix[:self._size][keep]
+            self._ids[:kept] = self._ids[:self._size][keep]
+            self._document_ids[:kept] = self._document_ids[:self._size][keep]
+            self._size = kept
+            self._positions = {int(chunk_id): row for row, chunk_id in enumerate(self._ids[:kept])}
+            self._partitions = None
+            return removed
+
+    def _keep_mask(self, chunk_ids: Sequence[int]) -> Optional[np.ndarray]:
+        """Boolean mask of rows to keep, or None when none of the ids are indexed."""
+        if self._size == 0 or len(chunk_ids) == 0:
+            return None
+        keep = ~np.isin(np.asarray(self._ids[:self._size]), np.asarray(chunk_ids, dtype=np.int64))
+        return None if keep.all() else keep
+
+    def partition_rows(self, document_ids: Sequence[int]) -> np.ndarray:
+        """Return the matrix rows belonging to the given documents, in ascending order."""
+        with self._lock:
+            if self._partitions is None:
+                document_column = np.asarray(self._document_ids[:self._size])
+                order = np.argsort(document_column, kind="stable")
+                keys, starts = np.unique(document_column[order], return_index=True)
+                bounds = np.append(starts, self._size)
+                self._partitions = {
+                    int(key): order[bounds[i]:bounds[i + 1]] for i, key in enumerate(keys)
+                }
+            parts = [self._partitions[int(d)] for d in set(document_ids) if int(d) in self._partitions]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts))
+
+    async def load(self, session: AsyncSession, deserialize: Callable[[Any], np.ndarray]) -> int:
+        """Rebuild the index from every chunk stored in the database."""
+        result = await session.execute(
+            select(DocumentChunk.id, DocumentChunk.document_id, DocumentChunk.embedding)
+            .where(DocumentChunk.deleted_at.is_(None))
+        )
+        rows = result.all()
+
+        self.clear()
+        if rows:
+            self.add(
+                [row.id for row in rows],
+                [deserialize(row.embedding) for row in rows],
+                [row.document_id for row in rows]
+            )
+        return len(rows)
+
+    def persist(self) -> None:
+        """Write the index to disk; the in-memory exact index has nothing to persist."""
+
+    def generation(self) -> Optional[int]:
+        """Corpus generation shared with other worker processes; None when the index is private to this one."""
+        return None
+
+    def _reserve(self, capacity: int) -> None:
+        """Grow the backing buffers geometrically so appends stay amortized O(1)."""
+        if capacity <= len(self._ids):
+            return
+        new_capacity = max(capacity, 2 * len(self._ids))
+        matrix = np.empty((new_capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.empty(new_capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        document_ids = np.empty(new_capacity, dtype=np.int64)
+        document_ids[:self._size] = self._document_ids[:self._size]
+        self._matrix, self._ids, self._document_ids = matrix, ids, document_ids
+
+
+def _top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the k best ids and scores, best first."""
+    k = min(k, len(scores))
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return ids[top].copy(), scores[top].copy()
+
+
+def _query_blocks(n_queries: int, n_rows: int) -> Iterator[slice]:
+    """Slices of queries whose scores against n_rows fit in SEARCH_BLOCK_SCORES."""
+    step = max(1, SEARCH_BLOCK_SCORES // max(n_rows, 1))
+    for start in range(0, n_queries, step):
+        yield slice(start, start + step)
+
+def _document_column(document_ids: Optional[Sequence[int]], count: int) -> np.ndarray:
+    """Owning document ids as an int64 column; -1 when unknown."""
+    if document_ids is None:
+        return np.full(count, -1, dtype=np.int64)
+    return np.asarray(document_ids, dtype=np.int64)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length, leaving zero rows untouched."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def create_vector_index() -> VectorIndex:
+    """Build the retrieval index selected by VECTOR_INDEX_BACKEND."""
+    if config.VECTOR_INDEX_BACKEND == "ivf":
+        from src.core.ann_index import IVFIndex
+        return IVFIndex(
+            n_lists=config.ANN_N_LISTS,
+            nprobe=config.ANN_NPROBE,
+            min_train_size=config.ANN_MIN_TRAIN_SIZE,
+            path=config.ANN_INDEX_PATH
+        )
+    if config.VECTOR_STORE_PATH and config.VECTOR_QUANTIZATION == "int8":
+        from src.core.quantization import QuantizedVectorIndex
+        return QuantizedVectorIndex(config.VECTOR_STORE_PATH, rerank_candidates=config.QUANT_RERANK_CANDIDATES)
+    if config.VECTOR_STORE_PATH:
+        from src.core.vector_store import MemmapVectorIndex
+        return MemmapVectorIndex(config.VECTOR_STORE_PATH)
+    return VectorIndex()
+
+
+# Process-wide index shared by every request, created on first use because the
+# backends selected by create_vector_index import this module
+vector_index: Optional[VectorIndex] = None
+_vector_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """Return the process-wide vector index."""
+    global vector_index
+    if vector_index is None:
+        with _vector_index_lock:
+            if vector_index is None:
+                vector_index = create_vector_index()
+    return vector_index
@@ -0,0 +1,299 @@
+from typing import Any, Callable, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import json
+import os
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from src.database.models import DocumentChunk
+from src.core.vector_index import VectorIndex, _document_column, _normalize
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+class MemmapVectorIndex(VectorIndex):
+    """Exact index whose normalized float32 vectors live in an append-only file opened with
+    np.memmap. Startup maps the file instead of reading embeddings from the database, and every
+    worker process shares the same OS page cache.
+
+    Files: `<path>.f32` (row-major matrix), `<path>.docs` (int64 document id per row),
+    `<path>.ids` (int64 chunk id per row) and `<path>.json` (dimension). Rows are appended to
+    the matrix and document column before their ids, so the id count is always backed by
+    complete rows. Rows left behind by an interrupted append are truncated by the next writer,
+    and a store whose file sizes disagree is rebuilt by `load`.
+
+    `<path>.generation` counts completed ingests across all workers. The vectors themselves
+    are shared, but each worker's BM25 and sentence indexes and answer cache are not; a
+    worker that sees the counter move rebuilds those from the database (see RAGSystem).
+    """
+
+    def __init__(self, path: str):
+        super().__init__(initial_capacity=0)
+        self.path = path
+        self.vectors_path = path + ".f32"
+        self.ids_path = path + ".ids"
+        self.documents_path = path + ".docs"
+        self.meta_path = path + ".json"
+        self.lock_path = path + ".lock"
+        self.generation_path = path + ".generation"
+        self._mapped: Optional[Tuple[int, int]] = None  # (inode, size) of the mapped id file
+        self._sorted_ids: Optional[np.ndarray] = None
+        self._sorted_rows: Optional[np.ndarray] = None
+        self._documents_complete = True  # False for stores written before the document column existed
+        self._aligned = True  # File sizes are exactly count rows each
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._size
+
+    @property
+    def dim(self) -> Optional[int]:
+        self._refresh()
+        return super().dim
+
+    def clear(self) -> None:
+        """Replace the store with empty files."""
+        self.rebuild([], np.empty((0, 0), dtype=np.float32))
+
+    def add(
+        self,
+        chunk_ids: Sequence[int],
+        embeddings: Sequence[np.ndarray],
+        document_ids: Optional[Sequence[int]] = None
+    ) -> None:
+        """Append normalized embeddings to the store; other workers pick them up on their next query."""
+        if len(chunk_ids) == 0:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(chunk_ids), -1))
+
+        with self._lock, self._file_lock():
+            dim = self._read_dim()
+            if dim is None:
+                self._write_meta(vectors.shape[1])
+            elif vectors.shape[1] != dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {dim}")
+            self._truncate_partial_rows(vectors.shape[1])
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self.documents_path, "ab") as f:
+                f.write(_document_column(document_ids, len(chunk_ids)).tobytes())
+            with open(self.ids_path, "ab") as f:
+                f.write(np.asarray(chunk_ids, dtype=np.int64).tobytes())
+            self._refresh()
+
+    def rebuild(
+        self,
+        chunk_ids: Sequence[int],
+        embeddings: np.ndarray,
+        document_ids: Optional[Sequence[int]] = None
+    ) -> None:
+        """Atomically replace the store contents; readers keep their old mapping until they refresh."""
+        with self._lock, self._file_lock():
+            self._write_store(chunk_ids, embeddings, document_ids)
+
+    def remove(self, chunk_ids: Sequence[int]) -> int:
+        """Rewrite the store without the given chunks; readers switch over on their next refresh."""
+        self._refresh()
+        with self._lock, self._file_lock():
+            keep = self._keep_mask(chunk_ids)
+            if keep is None:
+                return 0
+            self._write_store(
+                np.asarray(self._ids[:self._size])[keep],
+                np.asarray(self._matrix[:self._size])[keep],
+                np.asarray(self._document_ids[:self._size])[keep]
+            )
+            return int((~keep).sum())
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 3,
+        document_ids: Optional[Sequence[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        self._refresh()
+        return super().search(query_embedding, k, document_ids)
+
+    def search_many(self, query_embeddings: np.ndarray, k: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        self._refresh()
+        return super().search_many(query_embeddings, k)
+
+    def score(self, query_embedding: np.ndarray, chunk_ids: Sequence[int]) -> np.ndarray:
+        """Return cosine scores for the given chunk ids only (NaN for ids not in the store)."""
+        self._refresh()
+        with self._lock:
+            scores = np.full(len(chunk_ids), np.nan, dtype=np.float32)
+            if self._size == 0 or len(chunk_ids) == 0:
+                return scores
+            if self._sorted_ids is None:
+                # Built on first use instead of at startup, so opening the store stays O(1)
+                self._sorted_rows = np.argsort(self._ids[:self._size], kind="stable")
+                self._sorted_ids = np.asarray(self._ids[:self._size])[self._sorted_rows]
+            wanted = np.asarray(chunk_ids, dtype=np.int64)
+            found = np.minimum(np.searchsorted(self._sorted_ids, wanted), self._size - 1)
+            known = self._sorted_ids[found] == wanted
+            if known.any():
+                query = _normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+                scores[known] = self._matrix[self._sorted_rows[found[known]]] @ query
+        return scores
+
+    def persist(self) -> None:
+        """Vectors are already on disk; bump the shared generation so other workers refresh."""
+        with self._file_lock():
+            previous = self.generation()
+            _replace_file(self.generation_path, str(previous + 1).encode())
+        # Only skip the reload if no other worker's ingest landed since this one last loaded
+        if self.loaded_generation == previous:
+            self.loaded_generation = previous + 1
+
+    def generation(self) -> Optional[int]:
+        try:
+            with open(self.generation_path) as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    async def load(self, session: AsyncSession, deserialize: Callable[[Any], np.ndarray]) -> int:
+        """Map the store if it agrees with document_chunks, otherwise rebuild it from the database."""
+        # Read first: an ingest finishing during startup then triggers a reload on the next query
+        self.loaded_generation = self.generation()
+        stmt = select(
+            func.count(DocumentChunk.id), func.max(DocumentChunk.id), func.sum(DocumentChunk.id)
+        ).where(DocumentChunk.deleted_at.is_(None))
+        count, max_id, id_sum = (await session.execute(stmt)).one()
+
+        if self._matches(count, max_id, id_sum):
+            return self._size
+
+        with self._file_lock():
+            # Another worker may have rebuilt the store while this one waited for the lock
+            self._mapped = None
+            if self._matches(count, max_id, id_sum):
+                return self._size
+            print(f"Vector store {self.path} does not match document_chunks, rebuilding")
+            result = await session.execute(
+                select(DocumentChunk.id, DocumentChunk.document_id, DocumentChunk.embedding)
+                .where(DocumentChunk.deleted_at.is_(None))
+            )
+            rows = result.all()
+            with self._lock:
+                self._write_store(
+                    [row.id for row in rows],
+                    np.asarray([deserialize(row.embedding) for row in rows], dtype=np.float32),
+                    [row.document_id for row in rows]
+                )
+        return len(rows)
+
+    def _write_store(
+        self,
+        chunk_ids: Sequence[int],
+        embeddings: np.ndarray,
+        document_ids: Optional[Sequence[int]] = None
+    ) -> None:
+        """Write fresh files and rename them over the old ones; callers hold both locks."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if len(chunk_ids):
+            vectors = _normalize(vectors.reshape(len(chunk_ids), -1))
+            self._write_meta(vectors.shape[1])
+        _replace_file(self.vectors_path, vectors.tobytes() if len(chunk_ids) else b"")
+        _replace_file(self.documents_path, _document_column(document_ids, len(chunk_ids)).tobytes())
+        _replace_file(self.ids_path, np.asarray(chunk_ids, dtype=np.int64).tobytes())
+        self._mapped = None
+        self._refresh()
+
+    def _matches(self, count: int, max_id: Optional[int], id_sum: Optional[int]) -> bool:
+        """Check the files are aligned and compare row count, largest id and id sum with the database."""
+        self._refresh()
+        if self._size != count or not self._documents_complete or not self._aligned:
+            return False
+        if count == 0:
+            return True
+        ids = self._ids[:self._size]
+        return int(ids.max()) == max_id and int(ids.sum()) == id_sum
+
+    def _refresh(self) -> None:
+        """Re-map the files when another writer (or this one) has changed them."""
+        with self._lock:
+            try:
+                stat = os.stat(self.ids_path)
+                state = (stat.st_ino, stat.st_size)
+            except FileNotFoundError:
+                state = (0, 0)
+            if state == self._mapped:
+                return
+
+            dim = self._read_dim()
+            vectors_size = _file_size(self.vectors_path)
+            documents_size = _file_size(self.documents_path)
+            # Never map past the end of the matrix, even if the id file is ahead of it
+            count = min(state[1] // 8, vectors_size // (dim * 4)) if dim else 0
+            # Larger data files are either an append in progress or one that crashed part-way
+            self._aligned = (
+                state[1] == count * 8 and vectors_size == count * (dim or 0) * 4 and documents_size == count * 8
+            )
+            if count:
+                self._ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(count,))
+                self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, dim))
+                self._documents_complete = documents_size >= count * 8
+                if self._documents_complete:
+                    self._document_ids = np.memmap(self.documents_path, dtype=np.int64, mode="r", shape=(count,))
+                else:
+                    self._document_ids = np.full(count, -1, dtype=np.int64)
+            else:
+                self._ids = np.empty(0, dtype=np.int64)
+                self._document_ids = np.empty(0, dtype=np.int64)
+                self._matrix = None
+                self._documents_complete = True
+            self._size = count
+            self._partitions = None
+            self._sorted_ids = self._sorted_rows = None
+            self._mapped = state
+
+    def _truncate_partial_rows(self, dim: int) -> None:
+        """Cut the matrix and document column back to the id count; callers hold the file lock."""
+        count = _file_size(self.ids_path) // 8
+        for path, size in ((self.vectors_path, count * dim * 4), (self.documents_path, count * 8)):
+            if _file_size(path) > size:
+                print(f"Truncating {path} to {count} rows left by an interrupted append")
+                os.truncate(path, size)
+
+    def _read_dim(self) -> Optional[int]:
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)["dim"]
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, dim: int) -> None:
+        _replace_file(self.meta_path, json.dumps({"dim": int(dim), "dtype": "float32"}).encode())
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize writers across worker processes."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+def _replace_file(path: str, data: bytes) -> None:
+    """Write a file next to its destination and rename it into place."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
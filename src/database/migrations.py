@@ -0,0 +1,198 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import String, select, update, func, type_coerce, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Document, DocumentChunk, SchemaMigration, async_session
+from src.core.processors import DocumentProcessor, EmbeddingManager
+
+async def migrate_json_embeddings(session: AsyncSession, batch_size: int = 500) -> int:
+    """Rewrite chunk embeddings still stored as JSON text into the binary format."""
+    migrated = 0
+    while True:
+        # SQLite keeps the storage class per value, so JSON rows are the ones typed as text
+        stmt = (
+            select(DocumentChunk.id, type_coerce(DocumentChunk.embedding, String).label("embedding"))
+            .where(func.typeof(DocumentChunk.embedding) == "text")
+            .limit(batch_size)
+        )
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            break
+
+        for row in rows:
+            embedding = EmbeddingManager.deserialize_embedding(row.embedding)
+            await session.execute(
+                update(DocumentChunk)
+                .where(DocumentChunk.id == row.id)
+                .values(embedding=EmbeddingManager.serialize_embedding(embedding))
+            )
+        await session.commit()
+        migrated += len(rows)
+
+    return migrated
+
+async def tag_embedding_dtypes(session: AsyncSession, dtype: Optional[str] = None, batch_size: int = 500) -> int:
+    """Append the dtype byte to binary embeddings stored before it was recorded.
+
+    Those blobs are read as `dtype` (EMBEDDING_DTYPE by default), so this must run before
+    the setting is changed; afterwards every blob carries its own dtype.
+    """
+    tagged = 0
+    while True:
+        # Untagged blobs are whole float16/float32 arrays, so their length is even
+        stmt = (
+            select(DocumentChunk.id, DocumentChunk.embedding)
+            .where(func.typeof(DocumentChunk.embedding) == "blob", func.length(DocumentChunk.embedding) % 2 == 0)
+            .limit(batch_size)
+        )
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            break
+
+        await session.execute(update(DocumentChunk), [
+            {"id": row.id, "embedding": EmbeddingManager.serialize_embedding(
+                EmbeddingManager.deserialize_embedding(row.embedding, dtype), dtype
+            )}
+            for row in rows
+        ])
+        await session.commit()
+        tagged += len(rows)
+
+    return tagged
+
+# Columns added after the first release, with their SQLite types
+ADDED_COLUMNS = {
+    "documents": {
+        "filename": "VARCHAR",
+        "content_hash": "VARCHAR"
+    },
+    "document_chunks": {
+        "page": "INTEGER",
+        "chunk_index": "INTEGER",
+        "source": "VARCHAR",
+        "total_chunks": "INTEGER",
+        "content_hash": "VARCHAR",
+        "deleted_at": "DATETIME"
+    }
+}
+
+async def add_missing_columns(session: AsyncSession) -> List[str]:
+    """Add columns and indexes introduced since a table was created; returns the added columns."""
+    added = []
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row[1] for row in (await session.execute(text(f"PRAGMA table_info({table})"))).all()}
+        for name, column_type in columns.items():
+            if name not in existing:
+                await session.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+                added.append(f"{table}.{name}")
+    # create_all only creates indexes together with their table
+    for model in (Document, DocumentChunk):
+        for index in model.__table__.indexes:
+            await session.run_sync(lambda sync_session: index.create(sync_session.connection(), checkfirst=True))
+    await session.commit()
+    return added
+
+async def backfill_chunk_positions(session: AsyncSession, processor: Optional[DocumentProcessor] = None) -> int:
+    """Fill in page and chunk_index for chunks ingested before they were recorded; returns chunks updated.
+
+    Each affected document's PDF is chunked again and its stored chunks are matched by text.
+    Chunks whose PDF is gone or whose text no longer matches keep NULL positions; page
+    filters on their documents are rejected until the file is ingested again.
+    """
+    stmt = (
+        select(DocumentChunk.document_id, Document.content)
+        .join(Document, Document.id == DocumentChunk.document_id)
+        .where(DocumentChunk.page.is_(None), DocumentChunk.deleted_at.is_(None))
+        .distinct()
+    )
+    documents = (await session.execute(stmt)).all()
+    processor = processor or DocumentProcessor()
+    updated = 0
+    for document_id, file_path in documents:
+        rows = (await session.execute(
+            select(DocumentChunk.id, DocumentChunk.content)
+            .where(
+                DocumentChunk.document_id == document_id,
+                DocumentChunk.page.is_(None),
+                DocumentChunk.deleted_at.is_(None)
+            )
+            .order_by(DocumentChunk.id)
+        )).all()
+        if not file_path or not os.path.exists(file_path):
+            print(f"Document {document_id}: {len(rows)} chunks have no page numbers and {file_path} is missing")
+            continue
+
+        # Chunks were inserted in reading order, so repeated text is matched first to first
+        positions: Dict[str, List[Dict[str, Any]]] = {}
+        pages = await asyncio.to_thread(lambda: list(processor.iter_pdf_chunks(file_path, workers=1)))
+        for chunk in (chunk for page in pages for chunk in page):
+            positions.setdefault(chunk["content"], []).append(chunk["metadata"])
+        values = []
+        for row in rows:
+            matches = positions.get(row.content)
+            if matches:
+                metadata = matches.pop(0)
+                values.append({
+                    "id": row.id,
+                    "page": metadata.get("page"),
+                    "chunk_index": metadata.get("chunk_id"),
+                    "source": metadata.get("source"),
+                    "total_chunks": metadata.get("total_chunks")
+                })
+        if values:
+            await session.execute(update(DocumentChunk), values)
+            await session.commit()
+        if len(values) < len(rows):
+            print(f"Document {document_id}: {len(rows) - len(values)} chunks no longer match {file_path}")
+        updated += len(values)
+    return updated
+
+# Data migrations that scan document_chunks (or re-read PDFs), in the order they must run.
+# Nothing written since makes them necessary again, so each runs once per database.
+DATA_MIGRATIONS: List[Tuple[str, Callable[[AsyncSession], Awaitable[int]], str]] = [
+    ("json_embeddings", migrate_json_embeddings, "Migrated {} chunk embeddings to binary storage"),
+    ("embedding_dtypes", tag_embedding_dtypes, "Recorded the dtype of {} binary chunk embeddings"),
+    ("chunk_positions", backfill_chunk_positions, "Recorded page numbers for {} older chunks")
+]
+
+async def run_data_migrations(session: AsyncSession, force: bool = False) -> Dict[str, int]:
+    """Run the data migrations not yet recorded in schema_migrations; returns rows changed per migration run.
+
+    With `force`, every migration runs again (for example once a missing PDF is back).
+    """
+    await session.run_sync(
+        lambda sync_session: SchemaMigration.__table__.create(sync_session.connection(), checkfirst=True)
+    )
+    applied = set((await session.execute(select(SchemaMigration.name))).scalars().all())
+    results: Dict[str, int] = {}
+    for name, migration, message in DATA_MIGRATIONS:
+        if name in applied and not force:
+            continue
+        results[name] = await migration(session)
+        if results[name]:
+            print(message.format(results[name]))
+        # Another worker may have recorded it meanwhile; the migrations are idempotent
+        await session.execute(
+            insert(SchemaMigration)
+            .values(name=name, applied_at=datetime.utcnow(), rows=results[name])
+            .on_conflict_do_update(
+                index_elements=[SchemaMigration.name],
+                set_={"applied_at": datetime.utcnow(), "rows": results[name]}
+            )
+        )
+        await session.commit()
+    return results
+
+async def main():
+    async with async_session() as session:
+        added = await add_missing_columns(session)
+        if added:
+            print(f"Added columns: {', '.join(added)}")
+        await run_data_migrations(session, force=True)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,11 +1,14 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, create_engine
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, LargeBinary, Index, create_engine, event
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from typing import AsyncGenerator
 import os
 from datetime import datetime
 
+from src.core import config
+
 Base = declarative_base()
 
 class Document(Base):
@@ -14,6 +17,8 @@ class Document(Base):
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String)
     doc_metadata = Column(String)
+    filename = Column(String, index=True)  # Re-uploads under the same name update this document
+    content_hash = Column(String, index=True)  # SHA-256 of the file last ingested
     created_at = Column(DateTime, default=datetime.utcnow)
     chunks = relationship("DocumentChunk", back_populates="document")
 
@@ -21,10 +26,31 @@ class DocumentChunk(Base):
     __tablename__ = "document_chunks"
 
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"))
+    document_id = Column(Integer, ForeignKey("documents.id"), index=True)
     content = Column(String)
-    embedding = Column(String)  # Store embeddings as serialized string
+    embedding = Column(LargeBinary)  # Store embeddings as raw float32/float16 bytes
+    # Chunking metadata from DocumentProcessor; page is 0-based as reported by the PDF loader
+    page = Column(Integer)
+    chunk_index = Column(Integer)
+    source = Column(String)
+    total_chunks = Column(Integer)
+    content_hash = Column(String, index=True)  # SHA-1 of content, to reuse unchanged chunks on re-ingest
+    deleted_at = Column(DateTime)  # Tombstone for chunks dropped from a newer edition of the document
     document = relationship("Document", back_populates="chunks")
+    sentences = relationship("ChunkSentence", back_populates="chunk")
+
+# Page-range filters within a document
+Index("ix_document_chunks_document_page", DocumentChunk.document_id, DocumentChunk.page)
+
+class ChunkSentence(Base):
+    __tablename__ = "chunk_sentences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chunk_id = Column(Integer, ForeignKey("document_chunks.id"), index=True)
+    position = Column(Integer)
+    content = Column(String)
+    tf_vector = Column(LargeBinary)  # Sparse term counts: int32 indices followed by float32 values
+    chunk = relationship("DocumentChunk", back_populates="sentences")
 
 class ChatHistory(Base):
     __tablename__ = "chat_history"
@@ -34,27 +60,45 @@ class ChatHistory(Base):
     system_response = Column(String)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+class SchemaMigration(Base):
+    """One-shot data migrations already applied to this database, so restarts skip them."""
+    __tablename__ = "schema_migrations"
+
+    name = Column(String, primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+    rows = Column(Integer)  # Rows changed by its latest run
+
 # Database URL
-DATABASE_URL = "sqlite+aiosqlite:///./rag_system.db"
+DATABASE_URL = config.DATABASE_URL
 
 # Create async engine
 engine = create_async_engine(
     DATABASE_URL,
-    echo=True,
+    echo=config.SQL_ECHO,
+    # Reuse connections (and their PRAGMA setup) instead of reopening the file per session
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
 )
 
+@event.listens_for(engine.sync_engine, "connect")
+def _configure_sqlite(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the writer; NORMAL sync skips the fsync on each commit."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
 # Create async session factory
 async_session = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
 async def init_db():
-    """Initialize the database with all tables"""
+    """Create any missing tables, keeping existing data"""
     try:
         async with engine.begin() as conn:
-            # Drop all tables if they exist
-            await conn.run_sync(Base.metadata.drop_all)
-            # Create all tables fresh
             await conn.run_sync(Base.metadata.create_all)
         print("Database initialized successfully")
     except Exception as e:
@@ -0,0 +1,114 @@
+import os
+import threading
+import numpy as np
+from src.core import ann_index
+from src.core.ann_index import IVFIndex
+from src.core.vector_index import VectorIndex
+
+def _clustered(n: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(16, dim))
+    return (centers[rng.integers(0, 16, n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+def test_ivf_probing_every_list_matches_exact_search():
+    """Test that probing all lists returns exactly the brute-force ranking."""
+    vectors = _clustered(2000, 16, 0)
+    exact = VectorIndex()
+    exact.add(list(range(2000)), vectors)
+    ivf = IVFIndex(n_lists=20, nprobe=20, min_train_size=500)
+    # Incremental inserts: training happens once enough vectors arrive, later batches are assigned
+    for start in range(0, 2000, 250):
+        ivf.add(list(range(start, start + 250)), vectors[start:start + 250])
+
+    assert ivf.trained
+    queries = _clustered(10, 16, 1)
+    for query in queries:
+        assert ivf.search(query, k=5)[0].tolist() == exact.search(query, k=5)[0].tolist()
+    assert ivf.search_many(queries, k=5)[0].shape == (10, 5)
+
+def test_ivf_persist_and_restore(tmp_path):
+    """Test that a persisted index answers queries identically after a restore."""
+    vectors = _clustered(1000, 8, 2)
+    path = str(tmp_path / "ivf.npz")
+    ivf = IVFIndex(n_lists=10, nprobe=2, min_train_size=100, path=path)
+    ivf.add(list(range(1000)), vectors)
+    ivf.persist()
+
+    restored = IVFIndex(n_lists=10, nprobe=2, min_train_size=100, path=path)
+    restored._restore(path)
+    query = vectors[7]
+    assert len(restored) == 1000
+    assert restored.search(query, k=3)[0].tolist() == ivf.search(query, k=3)[0].tolist()
+
+def test_ivf_persist_appends_only_new_rows(tmp_path):
+    """Test that persisting after an add appends to the row files, and a removal rewrites them."""
+    vectors = _clustered(600, 8, 3)
+    path = str(tmp_path / "ivf.npz")
+    ivf = IVFIndex(n_lists=10, nprobe=10, min_train_size=100, path=path)
+    ivf.add(list(range(500)), vectors[:500])
+    ivf.persist()
+    with open(path + ".f32", "rb") as f:
+        head = f.read()
+    ivf.add(list(range(500, 600)), vectors[500:])
+    ivf.persist()
+    with open(path + ".f32", "rb") as f:
+        assert f.read(len(head)) == head
+    assert os.path.getsize(path + ".ids") == 600 * 8
+
+    ivf.remove([0, 1, 2])
+    ivf.persist()
+    restored = IVFIndex(n_lists=10, nprobe=10, min_train_size=100, path=path)
+    restored._restore(path)
+    assert len(restored) == 597 and os.path.getsize(path + ".ids") == 597 * 8
+    for query in vectors[[3, 550]]:
+        assert restored.search(query, k=3)[0].tolist() == ivf.search(query, k=3)[0].tolist()
+
+def test_ivf_restore_ignores_rows_of_an_interrupted_persist(tmp_path):
+    """Test that rows appended without their lists being written are dropped on restore and by the next persist."""
+    vectors = _clustered(300, 8, 4)
+    path = str(tmp_path / "ivf.npz")
+    ivf = IVFIndex(n_lists=5, nprobe=5, min_train_size=100, path=path)
+    ivf.add(list(range(200)), vectors[:200])
+    ivf.persist()
+    with open(path + ".f32", "ab") as f:
+        f.write(b"\0" * 100)
+
+    restored = IVFIndex(n_lists=5, nprobe=5, min_train_size=100, path=path)
+    restored._restore(path)
+    assert len(restored) == 200
+    restored.add(list(range(200, 300)), vectors[200:])
+    restored.persist()
+    assert os.path.getsize(path + ".f32") == 300 * 8 * 4
+
+def test_ivf_searches_while_training(monkeypatch):
+    """Test that k-means runs outside the lock and rows added meanwhile are filed once it finishes."""
+    vectors = _clustered(1200, 8, 5)
+    ivf = IVFIndex(n_lists=10, nprobe=10, min_train_size=500)
+    ivf.add(list(range(400)), vectors[:400])
+    started, release = threading.Event(), threading.Event()
+    train_kmeans = ann_index.train_kmeans
+
+    def slow_kmeans(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return train_kmeans(*args, **kwargs)
+
+    monkeypatch.setattr(ann_index, "train_kmeans", slow_kmeans)
+    trainer = threading.Thread(target=ivf.add, args=(list(range(400, 1000)), vectors[400:1000]))
+    trainer.start()
+    assert started.wait(5)
+    # Neither a search nor a further add waits for training
+    results = []
+    other = threading.Thread(target=lambda: (
+        results.append(ivf.search(vectors[0], k=1)[0].tolist()), ivf.add(list(range(1000, 1200)), vectors[1000:])
+    ))
+    other.start()
+    other.join(2)
+    assert not other.is_alive() and results == [[0]]
+    release.set()
+    trainer.join(5)
+
+    assert ivf.trained and not ivf._training
+    filed = np.sort(np.concatenate([ivf._list_rows(index) for index in range(10)]))
+    assert filed.tolist() == list(range(1200))
+    assert ivf.search(vectors[1100], k=1)[0].tolist() == [1100]
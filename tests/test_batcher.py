@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+from src.core.batcher import EmbeddingBatcher
+from src.core.cache import EmbeddingCache
+from src.core.embedders import HashEmbedder
+from src.core.executor import BoundedExecutor, ExecutorOverloaded
+from src.core.processors import EmbeddingManager
+
+TEXTS = [f"অনুপম প্রশ্ন {i}" for i in range(10)]
+
+class RecordingManager(EmbeddingManager):
+    """EmbeddingManager over the hash backend that records the texts of every call."""
+
+    def __init__(self, error=None):
+        super().__init__(model=HashEmbedder(), cache=EmbeddingCache(0))
+        self.calls = []
+        self.error = error
+
+    def get_embeddings(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return super().get_embeddings(texts, batch_size)
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor("test", max_workers=2, max_queued=8)
+    yield executor
+    executor.shutdown()
+
+def test_concurrent_requests_coalesce_into_bounded_batches(executor):
+    """Test that concurrent embeds share encode calls of at most max_batch_size, each caller getting its own vector."""
+    manager = RecordingManager()
+    batcher = EmbeddingBatcher(manager, max_batch_size=4, max_wait_ms=20, executor=executor)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.embed(text) for text in TEXTS))
+
+    results = asyncio.run(scenario())
+    expected = EmbeddingManager(model=HashEmbedder(), cache=EmbeddingCache(0)).get_embeddings(TEXTS)
+    assert np.array_equal(np.stack(results), expected)
+    assert [len(call) for call in manager.calls] == [4, 4, 2]
+    assert [text for call in manager.calls for text in call] == TEXTS
+
+    stats = batcher.stats()
+    assert stats["batches"] == 3 and stats["items"] == 10
+    assert stats["batch_size_histogram"] == {2: 1, 4: 2}
+    assert stats["max_observed_batch"] == 4 and stats["avg_batch_size"] == pytest.approx(10 / 3)
+    assert stats["queued"] == 0 and stats["max_queue_wait_ms"] >= stats["avg_queue_wait_ms"] >= 0.0
+
+def test_full_batch_flushes_without_waiting_for_the_timer(executor):
+    """Test that a full batch is encoded at once, while a partial one waits for max_wait_ms."""
+    batcher = EmbeddingBatcher(RecordingManager(), max_batch_size=3, max_wait_ms=10000, executor=executor)
+
+    async def full():
+        await asyncio.wait_for(asyncio.gather(*(batcher.embed(text) for text in TEXTS[:3])), timeout=2)
+
+    asyncio.run(full())
+    assert batcher.stats()["batches"] == 1
+
+    batcher = EmbeddingBatcher(RecordingManager(), max_batch_size=3, max_wait_ms=50, executor=executor)
+
+    async def partial():
+        started = time.perf_counter()
+        await batcher.embed(TEXTS[0])
+        return time.perf_counter() - started
+
+    assert asyncio.run(partial()) >= 0.05
+    assert batcher.stats()["batch_size_histogram"] == {1: 1}
+
+def test_encode_errors_reach_every_waiting_caller(executor):
+    """Test that a failed encode raises in every request of the batch."""
+    batcher = EmbeddingBatcher(RecordingManager(RuntimeError("model failed")), max_batch_size=4, executor=executor)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.embed(text) for text in TEXTS[:3]), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [RuntimeError] * 3
+
+def test_overloaded_executor_rejects_the_whole_batch():
+    """Test that ExecutorOverloaded reaches every caller of a batch that could not be scheduled."""
+    executor = BoundedExecutor("test", max_workers=1, max_queued=0)
+    release = threading.Event()
+    batcher = EmbeddingBatcher(RecordingManager(), max_batch_size=4, max_wait_ms=1, executor=executor)
+
+    async def scenario():
+        busy = asyncio.create_task(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        results = await asyncio.gather(*(batcher.embed(text) for text in TEXTS[:3]), return_exceptions=True)
+        release.set()
+        await busy
+        return results
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert [type(result) for result in results] == [ExecutorOverloaded] * 3
+
+def test_cancelled_caller_does_not_break_the_batch(executor):
+    """Test that the other requests of a batch still get their embeddings when one caller is cancelled."""
+    manager = RecordingManager()
+    batcher = EmbeddingBatcher(manager, max_batch_size=4, max_wait_ms=20, executor=executor)
+
+    async def scenario():
+        tasks = [asyncio.create_task(batcher.embed(text)) for text in TEXTS[:3]]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert isinstance(results[1], asyncio.CancelledError)
+    expected = EmbeddingManager(model=HashEmbedder(), cache=EmbeddingCache(0)).get_embeddings(TEXTS[:3])
+    assert np.array_equal(results[0], expected[0]) and np.array_equal(results[2], expected[2])
+    assert len(manager.calls) == 1
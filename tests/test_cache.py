@@ -0,0 +1,44 @@
+import numpy as np
+from src.core.cache import LRUCache, EmbeddingCache, AnswerCache
+
+def test_lru_eviction_and_counters():
+    """Test that the least recently used entry is evicted first."""
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+def test_embedding_cache_stores_read_only_copies():
+    """Test that cached embeddings cannot be mutated by callers."""
+    cache = EmbeddingCache(max_size=4)
+    key = cache.key("আমি বাংলায় গান গাই।")
+    embedding = np.ones(4, dtype=np.float32)
+    cache.put(key, embedding)
+    embedding[0] = 5.0
+
+    cached = cache.get(key)
+    assert cached[0] == 1.0
+    assert not cached.flags.writeable
+
+def test_answer_cache_exact_and_near_duplicate_lookup():
+    """Test normalized exact hits, paraphrase hits and invalidation on ingest."""
+    cache = AnswerCache(max_size=8, ttl_seconds=0, similarity_threshold=0.9)
+    embedding = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    cache.put("কাকে অনুপমের মামা বলা হয়েছে?", "উত্তর", [3, 7], [0.8, 0.6], embedding)
+
+    assert cache.get("  কাকে অনুপমের মামা  বলা হয়েছে ").answer == "উত্তর"
+    paraphrase = cache.get("অন্য প্রশ্ন", np.array([0.99, 0.1, 0.0], dtype=np.float32))
+    assert paraphrase.source_chunk_ids == [3, 7]
+    assert cache.get("অন্য প্রশ্ন", np.array([0.0, 1.0, 0.0], dtype=np.float32)) is None
+
+    cache.bump_generation()
+    assert cache.get("কাকে অনুপমের মামা বলা হয়েছে?", embedding) is None
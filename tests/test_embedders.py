@@ -0,0 +1,36 @@
+import numpy as np
+from src.core.embedders import HASH_FEATURES, LABSE_DIM, PROJECTION_NONZEROS, HashEmbedder
+
+def test_hash_embedder_is_deterministic_and_normalized():
+    """Test that the stand-in embedder matches LaBSE's shape and returns the same vectors every time."""
+    texts = ["অনুপমের মামা বিয়ের সব ঠিক করেন।", "কল্যাণীর বয়স পনেরো বছর।"]
+    first = HashEmbedder().encode(texts, normalize_embeddings=True)
+    second = HashEmbedder().encode(texts, normalize_embeddings=True)
+
+    assert first.shape == (2, LABSE_DIM)
+    assert first.dtype == np.float32
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+    assert np.all(HashEmbedder().encode([""], normalize_embeddings=True) == 0)
+
+def test_hash_embedder_ranks_overlapping_text_higher():
+    """Test that texts sharing words are closer than unrelated texts."""
+    query, related, unrelated = HashEmbedder().encode([
+        "শম্ভুনাথ সেন কে?",
+        "শম্ভুনাথ সেন কল্যাণীর বাবা।",
+        "অনুপম কলকাতায় থাকে।"
+    ], normalize_embeddings=True)
+    assert query @ related > query @ unrelated
+
+def test_hash_embedder_projects_a_wide_hash_space():
+    """Test that n-grams are hashed into HASH_FEATURES buckets and cosines survive the projection to 768."""
+    embedder = HashEmbedder()
+    texts = ["অনুপমের মামা বিয়ের সব ঠিক করেন।", "মামা গহনা পরীক্ষা করেন।", "কল্যাণীর বয়স পনেরো বছর।"]
+    hashed = embedder._vectorizer.transform(texts)
+    assert hashed.shape[1] == HASH_FEATURES
+    assert np.all(np.diff(embedder._projection.indptr) <= PROJECTION_NONZEROS)
+
+    wide = hashed.toarray()
+    wide /= np.linalg.norm(wide, axis=1, keepdims=True)
+    projected = embedder.encode(texts, normalize_embeddings=True)
+    assert np.allclose(projected @ projected.T, wide @ wide.T, atol=0.1)
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.core.cache import AnswerCache, EmbeddingCache
+from src.core.embedders import HashEmbedder
+from src.core.evaluation import OfflineEvaluator, load_items, mean_cosine
+from src.core.ingest import IngestPipeline
+from src.core.lexical_index import BM25Index
+from src.core.processors import EmbeddingManager
+from src.core.rag import RAGSystem
+from src.core.sentence_index import SentenceIndex
+from src.core.vector_index import VectorIndex
+from src.database.models import Base, Document
+
+def test_mean_cosine_ignores_masked_chunks():
+    """Test that padded chunk slots do not count towards the mean."""
+    probes = np.array([[1.0, 0.0], [0.0, 1.0]])
+    chunk_sets = np.array([[[1.0, 0.0], [0.0, 1.0]], [[0.0, 1.0], [0.0, 0.0]]])
+    mask = np.array([[True, True], [True, False]])
+    assert np.allclose(mean_cosine(probes, chunk_sets, mask), [0.5, 1.0])
+    assert mean_cosine(probes[:1], chunk_sets[:1], np.zeros((1, 2), dtype=bool))[0] == 0.0
+
+def test_offline_evaluator_scores_a_question_bank(tmp_path):
+    """Test that questions are answered in a batch and scored against their retrieved chunks."""
+    questions = tmp_path / "questions.jsonl"
+    questions.write_text("\n".join(json.dumps(record, ensure_ascii=False) for record in [
+        {"question": "শম্ভুনাথ সেন কার বাবা?", "answer": "কল্যাণীর"},
+        {"question": "অনুপম কোথায় থাকে?", "answer": "কলকাতায়"},
+        {"question": "মামা কী ঠিক করেন?"}
+    ]), encoding="utf-8")
+    chunks = [
+        {"content": "শম্ভুনাথ সেন কল্যাণীর বাবা। তিনি কানপুরে থাকেন।"},
+        {"content": "অনুপম কলকাতায় থাকে। তার বয়স সাতাশ।"},
+        {"content": "মামা বিয়ের সব ঠিক করেন। তিনি গহনা পরীক্ষা করেন।"}
+    ]
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'evaluation.db'}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    embedding_manager = EmbeddingManager(model=HashEmbedder(), cache=EmbeddingCache(0))
+    indexes = {"vector_index": VectorIndex(), "sentence_index": SentenceIndex(), "lexical_index": BM25Index()}
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as session:
+            document = Document(filename="test.pdf")
+            session.add(document)
+            await session.commit()
+            await IngestPipeline(session, embedding_manager, **indexes).run(document.id, chunks)
+
+            rag_system = RAGSystem(
+                session, embedding_manager=embedding_manager, answer_cache=AnswerCache(0, 0, 2.0), **indexes
+            )
+            evaluator = OfflineEvaluator(session, embedding_manager, rag_system=rag_system, n_results=2)
+            report = await evaluator.run(load_items(str(questions)))
+        await engine.dispose()
+        return report
+
+    report = asyncio.run(scenario())
+    rows = report["questions"]
+    assert [row["question"] for row in rows] == [
+        "শম্ভুনাথ সেন কার বাবা?", "অনুপম কোথায় থাকে?", "মামা কী ঠিক করেন?"
+    ]
+    assert rows[0]["context_hit"] is True and rows[1]["answer_hit"] is True
+    assert rows[2]["answer_hit"] is None and rows[2]["answer_similarity"] is None
+    assert all(0.0 < row["relevance"] <= 1.0 and 0.0 < row["groundedness"] <= 1.0 for row in rows)
+    aggregate = report["aggregate"]
+    assert aggregate["questions"] == 3 and aggregate["with_expected_answer"] == 2
+    assert aggregate["context_hit_rate"] == 1.0
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import pytest
+from src.core.executor import BoundedExecutor, ExecutorOverloaded
+
+def test_executor_rejects_work_beyond_capacity():
+    """Test that tasks beyond in-flight plus queued capacity are rejected."""
+    executor = BoundedExecutor("test", max_workers=1, max_queued=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorOverloaded):
+            await executor.run(sum, [1, 2])
+        release.set()
+        await asyncio.gather(*running)
+        return await executor.run(sum, [1, 2])
+
+    try:
+        assert asyncio.run(scenario()) == 3
+        assert executor.stats()["rejected"] == 1
+        assert executor.stats()["pending"] == 0
+    finally:
+        executor.shutdown()
+
+def test_cancelled_caller_keeps_its_slot_until_the_thread_finishes():
+    """Test that cancelling the awaiting coroutine does not free capacity while the task still runs."""
+    executor = BoundedExecutor("test", max_workers=1, max_queued=0)
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    async def scenario():
+        task = asyncio.create_task(executor.run(work))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        pending = executor.stats()["pending"]
+        with pytest.raises(ExecutorOverloaded):
+            await executor.run(sum, [1, 2])
+        release.set()
+        await asyncio.sleep(0.05)
+        return pending, await executor.run(sum, [1, 2])
+
+    try:
+        pending, result = asyncio.run(scenario())
+        assert pending == 1 and result == 3
+        assert executor.stats()["pending"] == 0
+    finally:
+        executor.shutdown()
@@ -0,0 +1,68 @@
+import re
+from src.core.extraction import clean_bengali_text, iter_pdf_chunks_parallel, iter_pdf_chunks_serial
+
+def original_clean(text):
+    """The cleaner as it was before extraction moved to worker processes."""
+    text = ' '.join(text.split())
+    text = text.replace('।।', '।')
+    text = text.replace('..', '.')
+    text = text.replace('  ', ' ')
+    text = text.replace('।', '। ')
+    text = text.replace('.', '. ')
+    text = re.sub(r'[^\u0980-\u09FF\u0964-\u0965a-zA-Z0-9\s\.,!?।]', '', text)
+    return text.strip()
+
+EDGE_CASES = [
+    "", "   \n\t ", "।", "।।", "।।।", "।।।।।", ".", "..", "...", "....", "।।..।.", "a  b\t\tc\n\nd",
+    "অনুপম।।কল্যাণী..শম্ভুনাথ", "বয়স ২৭। Age 27.", "মামা — গহনা “পরীক্ষা” করেন!?", "emoji 😀 আর ©",
+    "ক। ।খ", "ক . . খ", "৷৷ ॥", "tail spaces।   ", "x" * 5 + "।" * 7 + "." * 9
+]
+
+def _pdf(pages):
+    """Minimal PDF with one line-wrapped Helvetica text page per entry."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines = [text[i:i + 90] for i in range(0, len(text), 90)]
+        stream = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {len(objects)} 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    body, offsets = b"%PDF-1.4\n", []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return body
+
+def test_cleaner_matches_the_original_replace_sequence():
+    """Test that clean_bengali_text returns exactly what the original cleaner did on edge inputs."""
+    for text in EDGE_CASES:
+        assert clean_bengali_text(text) == original_clean(text), repr(text)
+
+def test_sharded_extraction_matches_the_serial_path(tmp_path):
+    """Test that pages come back in order from the process pool, chunked exactly as the serial path does."""
+    pages = [" ".join(f"page{page} word{word}." for word in range(60)) for page in range(7)]
+    path = tmp_path / "book.pdf"
+    path.write_bytes(_pdf(pages))
+
+    serial = list(iter_pdf_chunks_serial(str(path)))
+    # One page per shard, so shards finish out of order on two workers
+    parallel = list(iter_pdf_chunks_parallel(str(path), len(pages), workers=2, pages_per_shard=1))
+
+    assert parallel == serial
+    assert len(serial) == len(pages)
+    for page_number, chunks in enumerate(serial):
+        assert len(chunks) > 1
+        assert all(f"page{page_number} " in chunk["content"] for chunk in chunks)
+        assert [chunk["metadata"]["page"] for chunk in chunks] == [page_number] * len(chunks)
+        assert [chunk["metadata"]["chunk_id"] for chunk in chunks] == list(range(len(chunks)))
+        assert {chunk["metadata"]["total_chunks"] for chunk in chunks} == {len(chunks)}
@@ -0,0 +1,27 @@
+import asyncio
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.core.history import ChatHistoryWriter
+from src.database.models import Base, ChatHistory
+
+def test_writer_bulk_inserts_queued_rows(tmp_path):
+    """Test that queued chat history is written in batches once flushed."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'history.db'}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    writer = ChatHistoryWriter(session_factory, batch_size=10)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        for i in range(25):
+            writer.submit(f"query {i}", f"answer {i}")
+        await writer.close()
+        async with session_factory() as session:
+            count = await session.scalar(select(func.count(ChatHistory.id)))
+        await engine.dispose()
+        return count
+
+    assert asyncio.run(scenario()) == 25
+    assert writer.stats()["written"] == 25
+    assert writer.stats()["batches"] == 3
@@ -0,0 +1,241 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.core import ingest
+from src.core.cache import AnswerCache, EmbeddingCache, get_answer_cache
+from src.core.embedders import HashEmbedder
+from src.core.jobs import IngestJob
+from src.core.lexical_index import BM25Index
+from src.core.processors import EmbeddingManager
+from src.core.rag import RAGSystem
+from src.core.sentence_index import SentenceIndex
+from src.core.vector_index import VectorIndex
+from src.core.vector_store import MemmapVectorIndex
+from src.database.models import Base, Document, DocumentChunk
+
+EDITION_1 = [["অনুপম কলকাতায় থাকে।", "শম্ভুনাথ সেন কানপুরে থাকেন।"], ["মামা গহনা পরীক্ষা করেন।"]]
+EDITION_2 = [["অনুপম কলকাতায় থাকে।", "কল্যাণী বিয়েতে রাজি হয় না।"], ["মামা গহনা পরীক্ষা করেন।"]]
+
+class FakeProcessor:
+    """Yields fixed pages of chunks, optionally failing after `fail_after` pages."""
+
+    def __init__(self, pages, fail_after=None):
+        self.pages = pages
+        self.fail_after = fail_after
+
+    def count_pages(self, file_path):
+        return len(self.pages)
+
+    def iter_pdf_chunks(self, file_path):
+        for page, texts in enumerate(self.pages):
+            if page == self.fail_after:
+                raise RuntimeError("broken page")
+            yield [
+                {"content": text, "metadata": {"page": page, "chunk_id": i, "source": file_path, "total_chunks": len(texts)}}
+                for i, text in enumerate(texts)
+            ]
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ingest.db'}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    indexes = {"vector_index": VectorIndex(), "sentence_index": SentenceIndex(), "lexical_index": BM25Index()}
+    monkeypatch.setattr(ingest, "async_session", session_factory)
+    monkeypatch.setattr(ingest, "get_vector_index", lambda: indexes["vector_index"])
+    monkeypatch.setattr(ingest, "get_sentence_index", lambda: indexes["sentence_index"])
+    monkeypatch.setattr(ingest, "get_lexical_index", lambda: indexes["lexical_index"])
+    embedding_manager = EmbeddingManager(model=HashEmbedder(), cache=EmbeddingCache(0))
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def upload(content, pages, fail_after=None, destination=None, replace=False):
+        path = tmp_path / "upload.pdf"
+        path.write_bytes(content)
+        job = IngestJob(filename="test.pdf")
+        stats = await ingest.ingest_file(
+            job, str(path), "test.pdf", embedding_manager, FakeProcessor(pages, fail_after),
+            destination=destination, replace=replace
+        )
+        return job, stats
+
+    async def chunks():
+        async with session_factory() as session:
+            stmt = select(DocumentChunk.id, DocumentChunk.content, DocumentChunk.deleted_at).order_by(DocumentChunk.id)
+            return (await session.execute(stmt)).all()
+
+    asyncio.run(create_tables())
+    yield {
+        "engine": engine, "session_factory": session_factory, "indexes": indexes,
+        "embedding_manager": embedding_manager, "upload": upload, "chunks": chunks
+    }
+    asyncio.run(engine.dispose())
+
+def test_take_claims_each_repeated_chunk_once():
+    """Test that repeated text maps onto distinct existing chunk ids."""
+    existing = {"a": [1, 2], "b": [3]}
+    assert sorted([ingest._take(existing, "a"), ingest._take(existing, "a")]) == [1, 2]
+    assert ingest._take(existing, "a") is None
+    assert existing == {"b": [3]}
+
+def test_identical_reupload_is_a_no_op(env):
+    """Test that a byte-identical file is reported unchanged without touching any chunk."""
+    async def scenario():
+        _, first = await env["upload"](b"edition 1", EDITION_1)
+        job, second = await env["upload"](b"edition 1", EDITION_1)
+        return first, job, second, await env["chunks"]()
+
+    first, job, second, rows = asyncio.run(scenario())
+    assert first["chunks_added"] == 3 and first["unchanged"] is False
+    assert second["unchanged"] is True
+    assert second["chunks_added"] == 0 and second["chunks_reused"] == 3 and second["pages_processed"] == 0
+    assert job.status == "completed" and job.chunks_reused == 3
+    assert len(rows) == 3 and all(row.deleted_at is None for row in rows)
+
+def test_new_edition_reuses_unchanged_chunks(env):
+    """Test that only changed chunks are embedded and the dropped one is tombstoned."""
+    async def scenario():
+        await env["upload"](b"edition 1", EDITION_1)
+        existing = {}
+        async with env["session_factory"]() as session:
+            document_id = (await session.execute(select(Document.id))).scalar_one()
+            existing = await ingest._existing_chunks(session, document_id)
+        job, stats = await env["upload"](b"edition 2", EDITION_2, replace=True)
+        rows = await env["chunks"]()
+        async with env["session_factory"]() as session:
+            rag_system = RAGSystem(
+                session, embedding_manager=env["embedding_manager"], answer_cache=AnswerCache(0, 0, 2.0), **env["indexes"]
+            )
+            retrieval = await rag_system._load_retrieval("q", np.zeros(768), [row.id for row in rows], [1.0] * len(rows))
+        return existing, job, stats, rows, retrieval
+
+    existing, job, stats, rows, retrieval = asyncio.run(scenario())
+    assert sorted(ids[0] for ids in existing.values()) == [1, 2, 3]
+    assert stats["chunks_added"] == 1 and stats["chunks_reused"] == 2 and stats["chunks_removed"] == 1
+    assert job.chunks_reused == 2 and job.chunks_removed == 1
+    removed = [row for row in rows if row.deleted_at is not None]
+    assert [row.content for row in removed] == ["শম্ভুনাথ সেন কানপুরে থাকেন।"]
+    assert len(env["indexes"]["vector_index"]) == 3
+    # The tombstoned chunk is never served, even when asked for by id
+    assert removed[0].id not in [chunk.id for chunk in retrieval.chunks]
+    assert len(retrieval.chunks) == 3
+
+def test_different_file_with_a_taken_name_is_a_new_document(env, tmp_path):
+    """Test that without replace, a different file sharing a name never touches the existing document."""
+    destination = tmp_path / "test.pdf"
+
+    async def scenario():
+        _, first = await env["upload"](b"book one", EDITION_1, destination=str(destination))
+        job, second = await env["upload"](b"book two", EDITION_2, destination=str(destination))
+        async with env["session_factory"]() as session:
+            documents = (await session.execute(select(Document.id, Document.content).order_by(Document.id))).all()
+        return job, second, documents, await env["chunks"]()
+
+    job, second, documents, rows = asyncio.run(scenario())
+    assert len(documents) == 2 and job.document_id == documents[1].id
+    assert second["chunks_added"] == 3 and second["chunks_reused"] == 0 and second["chunks_removed"] == 0
+    assert len(rows) == 6 and all(row.deleted_at is None for row in rows)
+    assert len(env["indexes"]["vector_index"]) == 6
+    # Each document keeps its own copy of its file
+    assert documents[0].content == str(destination) and destination.read_bytes() == b"book one"
+    assert documents[1].content != str(destination) and open(documents[1].content, "rb").read() == b"book two"
+
+def test_failed_ingest_is_rolled_back_and_retried(env):
+    """Test that a failure mid-stream leaves the previous edition intact and the file retryable."""
+    async def scenario():
+        await env["upload"](b"edition 1", EDITION_1)
+        with pytest.raises(RuntimeError):
+            await env["upload"](b"edition 2", EDITION_2, fail_after=1, replace=True)
+        after_failure = await env["chunks"]()
+        size_after_failure = len(env["indexes"]["vector_index"])
+        _, retry = await env["upload"](b"edition 2", EDITION_2, replace=True)
+        return after_failure, size_after_failure, retry
+
+    after_failure, size_after_failure, retry = asyncio.run(scenario())
+    assert [row.content for row in after_failure] == [text for page in EDITION_1 for text in page]
+    assert all(row.deleted_at is None for row in after_failure)
+    assert size_after_failure == 3
+    assert retry["unchanged"] is False
+    assert retry["chunks_added"] == 1 and retry["chunks_removed"] == 1
+
+def test_failed_first_ingest_leaves_nothing_behind(env, tmp_path):
+    """Test that a failed upload of a new file removes its document, chunks and temporary file."""
+    destination = tmp_path / "test.pdf"
+
+    async def scenario():
+        generation = get_answer_cache().generation
+        with pytest.raises(RuntimeError):
+            await env["upload"](b"edition 1", EDITION_1, fail_after=1, destination=str(destination))
+        async with env["session_factory"]() as session:
+            documents = (await session.execute(select(Document.id))).all()
+        return generation, documents, await env["chunks"]()
+
+    generation, documents, rows = asyncio.run(scenario())
+    assert documents == [] and rows == []
+    assert len(env["indexes"]["vector_index"]) == 0 and len(env["indexes"]["lexical_index"]) == 0
+    assert get_answer_cache().generation > generation
+    assert not (tmp_path / "upload.pdf").exists() and not destination.exists()
+
+    job, stats = asyncio.run(env["upload"](b"edition 1", EDITION_1, destination=str(destination)))
+    assert job.status == "completed" and stats["chunks_added"] == 3
+    assert destination.read_bytes() == b"edition 1" and not (tmp_path / "upload.pdf").exists()
+
+def test_other_workers_reload_after_an_ingest(env, tmp_path):
+    """Test that a worker sharing the vector store rebuilds its own indexes once another worker ingests."""
+    path = str(tmp_path / "vectors")
+    writer = {"vector_index": MemmapVectorIndex(path), "sentence_index": SentenceIndex(), "lexical_index": BM25Index()}
+    reader = {"vector_index": MemmapVectorIndex(path), "sentence_index": SentenceIndex(), "lexical_index": BM25Index()}
+    answer_cache = AnswerCache(10, 0, 2.0)
+
+    async def scenario():
+        async with env["session_factory"]() as session:
+            await reader["vector_index"].load(session, EmbeddingManager.deserialize_embedding)
+            rag_system = RAGSystem(session, embedding_manager=env["embedding_manager"], answer_cache=answer_cache, **reader)
+            before = await rag_system.sync_indexes()
+
+            document = Document(filename="test.pdf")
+            session.add(document)
+            await session.commit()
+            chunks = [{"content": text} for page in EDITION_1 for text in page]
+            await ingest.IngestPipeline(session, env["embedding_manager"], **writer).run(document.id, chunks)
+            return before, await rag_system.sync_indexes(), await rag_system.sync_indexes()
+
+    before, after_ingest, again = asyncio.run(scenario())
+    assert (before, after_ingest, again) == (False, True, False)
+    assert len(reader["vector_index"]) == 3 and len(reader["lexical_index"]) == 3
+    assert reader["lexical_index"].search("শম্ভুনাথ", 1)[0].size == 1
+    assert answer_cache.generation == 1
+
+def test_failed_stream_closes_its_page_generator_off_the_event_loop(env):
+    """Test that a failure outside the page generator closes it on a worker thread, not at garbage collection."""
+    closed_on = []
+
+    def pages():
+        try:
+            for page in EDITION_1:
+                yield [{"content": text} for text in page]
+        finally:
+            closed_on.append(threading.current_thread())
+
+    class FailingManager(EmbeddingManager):
+        def get_embeddings(self, texts, batch_size=32):
+            raise RuntimeError("model failed")
+
+    async def scenario():
+        async with env["session_factory"]() as session:
+            document = Document(filename="test.pdf")
+            session.add(document)
+            await session.commit()
+            pipeline = ingest.IngestPipeline(
+                session, FailingManager(model=HashEmbedder(), cache=EmbeddingCache(0)), batch_size=1, **env["indexes"]
+            )
+            with pytest.raises(RuntimeError):
+                await pipeline.run_stream(document.id, pages())
+
+    asyncio.run(scenario())
+    assert len(closed_on) == 1 and closed_on[0] is not threading.main_thread()
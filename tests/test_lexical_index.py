@@ -0,0 +1,55 @@
+import numpy as np
+from src.core.lexical_index import BM25Index, tokenize, fuse_scores
+
+def test_tokenize_splits_danda_and_strips_suffixes():
+    """Test Bengali tokenization on danda boundaries with suffix stripping."""
+    assert tokenize("অনুপমের মামা।শম্ভুনাথকে") == ["অনুপম", "মামা", "শম্ভুনাথ"]
+
+def test_bm25_ranks_exact_name_matches_first():
+    """Test that chunks mentioning the queried name outrank the rest."""
+    index = BM25Index()
+    index.add(
+        [10, 11, 12],
+        [
+            "অনুপম কলকাতায় থাকে।",
+            "শম্ভুনাথ সেন কল্যাণীর বাবা। শম্ভুনাথের কথা।",
+            "মামা বিয়ের সব ঠিক করেন।",
+        ]
+    )
+
+    ids, scores = index.search("শম্ভুনাথ কে?", k=3)
+    assert ids.tolist() == [11]
+    assert scores[0] > 0
+    assert len(index.search("unrelated", k=3)[0]) == 0
+
+def test_fuse_scores_normalizes_lexical_scores():
+    """Test that BM25 scores are scaled by the best candidate before weighting."""
+    fused = fuse_scores(np.array([0.5, 0.5]), np.array([4.0, 2.0]), 0.5, 0.5)
+    assert np.allclose(fused, [0.75, 0.5])
+
+def test_bm25_remove_hides_chunks_before_and_after_compaction():
+    """Test that removed chunks stop matching, whether tombstoned or compacted away."""
+    index = BM25Index()
+    index.add([1, 2, 3, 4, 5], ["অনুপম মামা", "অনুপম কলকাতা", "শম্ভুনাথ সেন", "কল্যাণী", "মামা বিয়ে"])
+
+    assert index.remove([1]) == 1  # One of five rows: tombstoned only
+    assert sorted(index.search("অনুপম", k=5)[0].tolist()) == [2]
+    assert index.remove([5]) == 1  # Two of five rows: compacted
+    assert len(index) == 3
+    assert index.search("মামা", k=5)[0].tolist() == []
+    assert index.search("শম্ভুনাথ", k=5)[0].tolist() == [3]
+
+def test_bm25_tombstoned_rows_do_not_count_towards_document_frequency():
+    """Test that before compaction, scores equal those of an index built from the live chunks only."""
+    texts = ["মামা অনুপম", "মামা কলকাতা", "মামা শম্ভুনাথ", "মামা কল্যাণী", "মামা বিয়ে"]
+    index = BM25Index()
+    index.add([1, 2, 3, 4, 5], texts)
+    assert index.remove([1]) == 1  # Tombstoned only; "মামা" is now in every live chunk
+
+    fresh = BM25Index()
+    fresh.add([2, 3, 4, 5], texts[1:])
+    ids, scores = index.search("মামা", k=5)
+    fresh_ids, fresh_scores = fresh.search("মামা", k=5)
+    assert np.all(scores > 0)
+    assert sorted(ids.tolist()) == sorted(fresh_ids.tolist()) == [2, 3, 4, 5]
+    assert np.allclose(np.sort(scores), np.sort(fresh_scores))
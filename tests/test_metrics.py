@@ -0,0 +1,40 @@
+from src.core.metrics import LatencyHistogram, MetricsRegistry, collect_request_timings
+
+def test_histogram_percentiles_fall_in_the_right_buckets():
+    """Test that estimated percentiles stay within one bucket of the true values."""
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.observe(0.001)
+    for _ in range(9):
+        histogram.observe(0.010)
+    histogram.observe(1.0)
+
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert 1.0 <= summary["p50_ms"] <= 1.5
+    assert 7.0 <= summary["p95_ms"] <= 10.0 * 1.5
+    assert summary["max_ms"] == 1000.0
+    assert LatencyHistogram().percentile(0.99) == 0.0
+
+def test_registry_snapshot_prometheus_and_request_timings():
+    """Test that stages, counters and request-scoped timings are all recorded."""
+    metrics = MetricsRegistry()
+    with collect_request_timings() as timings:
+        with metrics.timer("embed_query"):
+            pass
+        metrics.observe("embed_query", 0.002)
+    metrics.observe("/api/query", 0.005, family="request")
+    metrics.increment("requests", path="/api/query")
+    metrics.increment("answer_cache_hits", 2)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["latency"]["stage"]["embed_query"]["count"] == 2
+    assert snapshot["latency"]["request"]["/api/query"]["count"] == 1
+    assert snapshot["counters"] == {"answer_cache_hits": 2, "requests": {"/api/query": 1}}
+    assert set(timings) == {"embed_query"} and timings["embed_query"] >= 0.002
+
+    text = metrics.prometheus({"answer_cache_size": 3})
+    assert 'rag_stage_duration_seconds_count{stage="embed_query"} 2' in text
+    assert 'rag_request_duration_seconds_bucket{request="/api/query",le="+Inf"} 1' in text
+    assert 'rag_requests_total{path="/api/query"} 1' in text
+    assert "rag_answer_cache_size 3" in text
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.core.processors import EmbeddingManager
+from src.database import migrations
+from src.database.migrations import (
+    add_missing_columns, backfill_chunk_positions, migrate_json_embeddings, run_data_migrations, tag_embedding_dtypes
+)
+from src.database.models import DocumentChunk, SchemaMigration
+
+# Tables as the first release created them
+OLD_SCHEMA = [
+    "CREATE TABLE documents (id INTEGER PRIMARY KEY, content VARCHAR, doc_metadata VARCHAR, created_at DATETIME)",
+    "CREATE TABLE document_chunks (id INTEGER PRIMARY KEY, document_id INTEGER REFERENCES documents(id), "
+    "content VARCHAR, embedding VARCHAR)"
+]
+PAGES = [["অনুপম কলকাতায় থাকে।", "মামা গহনা পরীক্ষা করেন।"], ["কল্যাণী বিয়েতে রাজি হয় না।", "অনুপম কলকাতায় থাকে।"]]
+
+class FakeProcessor:
+    parsed = 0
+
+    def iter_pdf_chunks(self, file_path, workers=None):
+        FakeProcessor.parsed += 1
+        for page, texts in enumerate(PAGES):
+            yield [
+                {"content": text, "metadata": {"page": page, "chunk_id": i, "source": file_path, "total_chunks": len(texts)}}
+                for i, text in enumerate(texts)
+            ]
+
+def _old_database(tmp_path, pdf_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            for statement in OLD_SCHEMA:
+                await conn.execute(text(statement))
+            await conn.execute(
+                text("INSERT INTO documents (id, content, doc_metadata) VALUES (1, :path, '{}')"), {"path": pdf_path}
+            )
+            for chunk_id, content in enumerate([text for page in PAGES for text in page], start=1):
+                await conn.execute(
+                    text("INSERT INTO document_chunks VALUES (:id, 1, :content, :embedding)"),
+                    {"id": chunk_id, "content": content, "embedding": json.dumps([float(chunk_id), 0.0])}
+                )
+
+    asyncio.run(create())
+    return engine
+
+def test_old_schema_is_upgraded_and_positions_backfilled(tmp_path):
+    """Test that added columns are created and older chunks get their page and position back."""
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"%PDF")
+    engine = _old_database(tmp_path, str(pdf))
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def scenario():
+        async with session_factory() as session:
+            added = await add_missing_columns(session)
+            again = await add_missing_columns(session)
+            backfilled = await backfill_chunk_positions(session, FakeProcessor())
+            rows = (await session.execute(
+                select(DocumentChunk.id, DocumentChunk.page, DocumentChunk.chunk_index).order_by(DocumentChunk.id)
+            )).all()
+        await engine.dispose()
+        return added, again, backfilled, rows
+
+    added, again, backfilled, rows = asyncio.run(scenario())
+    assert "document_chunks.page" in added and "documents.content_hash" in added
+    assert again == []
+    assert backfilled == 4
+    # The repeated chunk text is matched in reading order
+    assert [tuple(row) for row in rows] == [(1, 0, 0), (2, 0, 1), (3, 1, 0), (4, 1, 1)]
+
+def test_backfill_skips_documents_whose_pdf_is_gone(tmp_path):
+    """Test that chunks of a missing PDF keep NULL positions."""
+    engine = _old_database(tmp_path, str(tmp_path / "missing.pdf"))
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def scenario():
+        async with session_factory() as session:
+            await add_missing_columns(session)
+            backfilled = await backfill_chunk_positions(session, FakeProcessor())
+            pages = (await session.execute(select(DocumentChunk.page))).scalars().all()
+        await engine.dispose()
+        return backfilled, pages
+
+    backfilled, pages = asyncio.run(scenario())
+    assert backfilled == 0
+    assert pages == [None] * 4
+
+def test_json_and_untagged_embeddings_are_migrated(tmp_path):
+    """Test that JSON embeddings become tagged blobs and untagged blobs get the dtype they were written in."""
+    engine = _old_database(tmp_path, str(tmp_path / "book.pdf"))
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    # A blob written as float16 before the dtype byte existed
+    legacy = np.asarray([4.0, 0.5], dtype=np.float16).tobytes()
+
+    async def scenario():
+        async with session_factory() as session:
+            await add_missing_columns(session)
+            await session.execute(text("UPDATE document_chunks SET embedding = :blob WHERE id = 4"), {"blob": legacy})
+            await session.commit()
+            migrated = await migrate_json_embeddings(session)
+            tagged = await tag_embedding_dtypes(session, "float16")
+            again = await tag_embedding_dtypes(session, "float16")
+            rows = (await session.execute(
+                select(DocumentChunk.embedding, func.typeof(DocumentChunk.embedding)).order_by(DocumentChunk.id)
+            )).all()
+        await engine.dispose()
+        return migrated, tagged, again, rows
+
+    migrated, tagged, again, rows = asyncio.run(scenario())
+    assert (migrated, tagged, again) == (3, 1, 0)
+    assert all(storage == "blob" for _, storage in rows)
+    embeddings = [EmbeddingManager.deserialize_embedding(blob, "float32") for blob, _ in rows]
+    assert [embedding.tolist() for embedding in embeddings] == [[1.0, 0.0], [2.0, 0.0], [3.0, 0.0], [4.0, 0.5]]
+    assert embeddings[3].dtype == np.float16
+
+def test_data_migrations_run_once_per_database(tmp_path, monkeypatch):
+    """Test that a restart skips the recorded full-table migrations unless forced."""
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"%PDF")
+    engine = _old_database(tmp_path, str(pdf))
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(migrations, "DocumentProcessor", FakeProcessor)
+    monkeypatch.setattr(FakeProcessor, "parsed", 0)
+
+    async def scenario():
+        async with session_factory() as session:
+            await add_missing_columns(session)
+            first = await run_data_migrations(session)
+            parsed = FakeProcessor.parsed
+            restart = await run_data_migrations(session)
+            forced = await run_data_migrations(session, force=True)
+            recorded = (await session.execute(
+                select(SchemaMigration.name, SchemaMigration.rows).order_by(SchemaMigration.name)
+            )).all()
+        await engine.dispose()
+        return first, parsed, restart, forced, recorded
+
+    first, parsed, restart, forced, recorded = asyncio.run(scenario())
+    assert first == {"json_embeddings": 4, "embedding_dtypes": 0, "chunk_positions": 4}
+    assert parsed == 1
+    assert restart == {}
+    assert forced == {"json_embeddings": 0, "embedding_dtypes": 0, "chunk_positions": 0}
+    assert [tuple(row) for row in recorded] == [("chunk_positions", 0), ("embedding_dtypes", 0), ("json_embeddings", 0)]
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from src.core import config
+from src.core.processors import EmbeddingManager
+
+def test_embedding_blobs_record_their_dtype(monkeypatch):
+    """Test that stored embeddings read back with the dtype they were written in, whatever EMBEDDING_DTYPE is now."""
+    embedding = np.linspace(-1, 1, 768).astype(np.float32)
+    as_float32 = EmbeddingManager.serialize_embedding(embedding)
+    as_float16 = EmbeddingManager.serialize_embedding(embedding, "float16")
+    assert len(as_float32) == 768 * 4 + 1 and len(as_float16) == 768 * 2 + 1
+
+    monkeypatch.setattr(config, "EMBEDDING_DTYPE", "float16")
+    restored = EmbeddingManager.deserialize_embedding(as_float32)
+    assert restored.dtype == np.float32 and np.array_equal(restored, embedding)
+    restored = EmbeddingManager.deserialize_embedding(as_float16)
+    assert restored.dtype == np.float16 and np.allclose(restored, embedding, atol=1e-3)
+
+def test_untagged_and_json_embeddings_are_still_read():
+    """Test that blobs written before the dtype byte, and JSON text, still deserialize."""
+    embedding = np.arange(4, dtype=np.float32)
+    assert np.array_equal(EmbeddingManager.deserialize_embedding(embedding.tobytes(), "float32"), embedding)
+    assert np.array_equal(EmbeddingManager.deserialize_embedding(embedding.astype(np.float16).tobytes(), "float16"), embedding)
+    assert np.array_equal(EmbeddingManager.deserialize_embedding("[0.0, 1.0, 2.0, 3.0]"), embedding)
+
+def test_malformed_embeddings_are_rejected():
+    """Test that a blob whose length does not fit its dtype raises instead of decoding garbage."""
+    with pytest.raises(ValueError):
+        EmbeddingManager.deserialize_embedding(b"\0" * 6, "float32")
+    with pytest.raises(ValueError):
+        EmbeddingManager.deserialize_embedding(b"\0" * 6 + b"f")
+    with pytest.raises(ValueError):
+        EmbeddingManager.deserialize_embedding(b"\0" * 8 + b"x")
+    with pytest.raises(ValueError):
+        EmbeddingManager.serialize_embedding(np.zeros(4), "int8")
@@ -0,0 +1,33 @@
+import numpy as np
+from src.core.quantization import ScalarQuantizer, QuantizedVectorIndex
+from src.core.vector_index import VectorIndex
+
+def test_scalar_quantizer_scores_match_decoded_vectors():
+    """Test that int8 scoring equals dot products with the dequantized vectors."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(100, 16)).astype(np.float32)
+    quantizer = ScalarQuantizer.fit(vectors)
+    codes = quantizer.encode(vectors)
+    query = rng.normal(size=16).astype(np.float32)
+
+    assert codes.dtype == np.int8
+    assert np.abs(quantizer.decode(codes) - vectors).max() <= quantizer.scale.max()
+    assert np.allclose(quantizer.scores(codes, query), quantizer.decode(codes) @ query, atol=1e-3)
+
+def test_quantized_index_reranks_with_full_precision(tmp_path):
+    """Test that re-ranked results carry exact cosine scores and match exact search."""
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(500, 32)).astype(np.float32)
+    exact = VectorIndex()
+    exact.add(list(range(500)), embeddings)
+    index = QuantizedVectorIndex(str(tmp_path / "vectors"), rerank_candidates=50)
+    index.add(list(range(100)), embeddings[:100])
+    index.add(list(range(100, 500)), embeddings[100:])
+
+    queries = rng.normal(size=(5, 32))
+    ids, scores = index.search_many(queries, k=5)
+    for row, query in enumerate(queries):
+        exact_ids, exact_scores = exact.search(query, k=5)
+        assert ids[row].tolist() == exact_ids.tolist()
+        assert np.allclose(scores[row], exact_scores, atol=1e-5)
+    assert index.memory_stats()["int8_bytes"] * 4 == index.memory_stats()["float32_bytes"]
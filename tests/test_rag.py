@@ -0,0 +1,176 @@
+import asyncio
+import numpy as np
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.core.cache import AnswerCache, EmbeddingCache
+from src.core.embedders import HashEmbedder
+from src.core.ingest import IngestPipeline
+from src.core.lexical_index import BM25Index
+from src.core.processors import EmbeddingManager
+from src.core.rag import PageFilterUnavailable, RAGSystem, RetrievalFilter
+from src.core.sentence_index import SentenceIndex
+from src.core.vector_index import VectorIndex
+from src.database.models import Base, Document, DocumentChunk
+
+CHUNKS = [
+    "শম্ভুনাথ সেন কল্যাণীর বাবা। তিনি কানপুরে থাকেন।",
+    "অনুপম কলকাতায় থাকে। তার বয়স সাতাশ।",
+    "মামা বিয়ের সব ঠিক করেন। তিনি গহনা পরীক্ষা করেন।",
+    "কল্যাণী মেয়েদের পড়ায়। সে আর বিয়ে করেনি।",
+    "ট্রেন কানপুর স্টেশনে থামে। অনুপম কল্যাণীকে দেখে।"
+]
+# The second query ranks differently with BM25 re-ranking than by cosine alone; the last has no BM25 match
+QUERIES = ["কল্যাণীর বাবা কে?", "অনুপম কল্যাণী", "মামা কী পরীক্ষা করেন?", "How old is Anupam?"]
+
+def test_batch_and_single_queries_rank_alike(tmp_path):
+    """Test that /api/query/batch ranks chunks exactly as single queries do."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rag.db'}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    embedding_manager = EmbeddingManager(model=HashEmbedder(), cache=EmbeddingCache(0))
+    indexes = {"vector_index": VectorIndex(), "sentence_index": SentenceIndex(), "lexical_index": BM25Index()}
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as session:
+            document = Document(filename="test.pdf")
+            session.add(document)
+            await session.commit()
+            await IngestPipeline(session, embedding_manager, **indexes).run(
+                document.id, [{"content": text} for text in CHUNKS]
+            )
+            rag_system = RAGSystem(
+                session, embedding_manager=embedding_manager, answer_cache=AnswerCache(0, 0, 2.0), **indexes
+            )
+            single = [[chunk.id for chunk in (await rag_system.retrieve(query, 2)).chunks] for query in QUERIES]
+            batch = await rag_system.process_queries(QUERIES, n_results=2, store_history=False)
+            dense = indexes["vector_index"].search(embedding_manager.get_embeddings([QUERIES[1]])[0], 2)[0].tolist()
+        await engine.dispose()
+        return single, [result["source_chunk_ids"] for result in batch], dense
+
+    single, batch, dense = asyncio.run(scenario())
+    assert batch == single
+    assert all(len(ids) == 2 for ids in batch)
+    assert batch[1] == [5, 2] and dense == [5, 4]
+
+def test_page_range_filter(tmp_path):
+    """Test that a 1-based page range only returns chunks from those pages, and older unpaged chunks are refused."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rag.db'}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    embedding_manager = EmbeddingManager(model=HashEmbedder(), cache=EmbeddingCache(0))
+    indexes = {"vector_index": VectorIndex(), "sentence_index": SentenceIndex(), "lexical_index": BM25Index()}
+    # Two chunks per page: pages 1, 1, 2, 2, 3
+    chunks = [{"content": text, "metadata": {"page": i // 2, "chunk_id": i % 2}} for i, text in enumerate(CHUNKS)]
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as session:
+            document = Document(filename="test.pdf")
+            session.add(document)
+            await session.commit()
+            await IngestPipeline(session, embedding_manager, **indexes).run(document.id, chunks)
+            rag_system = RAGSystem(
+                session, embedding_manager=embedding_manager, answer_cache=AnswerCache(0, 0, 2.0), **indexes
+            )
+            page_two = await rag_system.retrieve("অনুপম কল্যাণী", 5, filters=RetrievalFilter(page_from=2, page_to=2))
+            from_two = await rag_system.retrieve("অনুপম কল্যাণী", 5, filters=RetrievalFilter([document.id], page_from=2))
+            other_document = await rag_system.retrieve("অনুপম", 5, filters=RetrievalFilter([99], page_from=1))
+
+            # A chunk stored before pages were recorded
+            await session.execute(insert(DocumentChunk).values(document_id=document.id + 1, content="পুরনো", embedding=b""))
+            await session.commit()
+            with pytest.raises(PageFilterUnavailable):
+                await rag_system.retrieve("অনুপম", 5, filters=RetrievalFilter([document.id + 1], page_from=1))
+            unaffected = await rag_system.retrieve("অনুপম", 5, filters=RetrievalFilter([document.id], page_to=1))
+        await engine.dispose()
+        return page_two, from_two, other_document, unaffected
+
+    page_two, from_two, other_document, unaffected = asyncio.run(scenario())
+    assert sorted(chunk.page for chunk in page_two.chunks) == [1, 1]
+    assert sorted(chunk.page for chunk in from_two.chunks) == [1, 1, 2]
+    assert other_document.chunks == []
+    assert sorted(chunk.page for chunk in unaffected.chunks) == [0, 0]
+
+class RecordingManager(EmbeddingManager):
+    """Hash-backend EmbeddingManager that records every text it is asked to encode."""
+
+    def __init__(self):
+        super().__init__(model=HashEmbedder(), cache=EmbeddingCache(0))
+        self.encoded = []
+
+    def get_embeddings(self, texts, batch_size=32):
+        self.encoded.extend(texts)
+        return super().get_embeddings(texts, batch_size)
+
+def test_answer_and_evaluation_embed_and_search_once(tmp_path):
+    """Test that a query is embedded once and searched once at the largest k, which evaluation reuses."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rag.db'}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    embedding_manager = RecordingManager()
+    indexes = {"vector_index": VectorIndex(), "sentence_index": SentenceIndex(), "lexical_index": BM25Index()}
+    searches = []
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as session:
+            document = Document(filename="test.pdf")
+            session.add(document)
+            await session.commit()
+            await IngestPipeline(session, embedding_manager, **indexes).run(
+                document.id, [{"content": text} for text in CHUNKS]
+            )
+            rag_system = RAGSystem(
+                session, embedding_manager=embedding_manager, answer_cache=AnswerCache(0, 0, 2.0), **indexes
+            )
+            search = rag_system._search
+            rag_system._search = lambda *args: searches.append(args[2]) or search(*args)
+            embedding_manager.encoded.clear()
+
+            response, retrieval = await rag_system.answer_query(QUERIES[0], n_results=5)
+            evaluation = await rag_system.evaluate_response(
+                QUERIES[0], response, retrieval.chunks, query_embedding=retrieval.query_embedding
+            )
+        await engine.dispose()
+        return response, retrieval, evaluation
+
+    response, retrieval, evaluation = asyncio.run(scenario())
+    assert searches == [5] and len(retrieval.chunks) == 5
+    # The query once for retrieval, the answer once for evaluation
+    assert embedding_manager.encoded == [QUERIES[0], response]
+    assert evaluation["relevance"] > 0.0 and evaluation["groundedness"] > 0.0
+
+def _score_per_chunk(embedding_manager, response_embedding, query_embedding, chunk_embeddings):
+    """evaluate_response's scoring as it was before it was vectorized: one cosine per chunk, NaNs skipped."""
+    scores = {"groundedness": [], "relevance": []}
+    for blob in chunk_embeddings:
+        chunk_embedding = embedding_manager.deserialize_embedding(blob)
+        for key, probe in (("groundedness", response_embedding), ("relevance", query_embedding)):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                similarity = embedding_manager.calculate_similarity(probe, chunk_embedding)
+            if not np.isnan(similarity):
+                scores[key].append(similarity)
+    return {key: float(np.mean(values)) if values else 0.0 for key, values in scores.items()}
+
+def test_vectorized_scoring_matches_the_per_chunk_loop():
+    """Test that _score_response equals the per-chunk cosine loop, including zero-norm chunks and probes."""
+    embedding_manager = EmbeddingManager(model=HashEmbedder(), cache=EmbeddingCache(0))
+    rag_system = RAGSystem(
+        None, embedding_manager=embedding_manager, answer_cache=AnswerCache(0, 0, 2.0),
+        vector_index=VectorIndex(), sentence_index=SentenceIndex(), lexical_index=BM25Index()
+    )
+    chunk_vectors = HashEmbedder().encode(CHUNKS)  # Unnormalized, as older stored embeddings may be
+    blobs = [embedding_manager.serialize_embedding(vector) for vector in chunk_vectors]
+    blobs.append(embedding_manager.serialize_embedding(np.zeros(chunk_vectors.shape[1])))
+    response, query = embedding_manager.get_embeddings(["অনুপম কলকাতায় থাকে।", QUERIES[1]])
+    zero = np.zeros_like(query)
+
+    for probes in [(response, query), (zero, query), (zero, zero)]:
+        for chunk_blobs in [blobs, blobs[-1:]]:
+            vectorized = rag_system._score_response(*probes, chunk_blobs)
+            expected = _score_per_chunk(embedding_manager, *probes, chunk_blobs)
+            assert vectorized == pytest.approx(expected, abs=1e-6)
+    assert rag_system._score_response(zero, query, blobs)["groundedness"] == 0.0
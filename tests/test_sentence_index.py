@@ -0,0 +1,27 @@
+from src.core.sentence_index import (
+    SentenceIndex, split_sentences, term_frequencies, serialize_tf, deserialize_tf
+)
+
+CHUNK = "অনুপম কলকাতায় থাকে। শম্ভুনাথ সেন কল্যাণীর বাবা। মামা বিয়ের সব ঠিক করেন।"
+
+def test_best_sentence_uses_indexed_chunk():
+    """Test that the sentence sharing the query's terms is selected."""
+    index = SentenceIndex()
+    sentences = split_sentences(CHUNK)
+    index.add(1, sentences, term_frequencies(sentences))
+
+    assert len(index) == 3
+    assert index.best_sentence("কল্যাণীর বাবা কে?", 1) == "শম্ভুনাথ সেন কল্যাণীর বাবা"
+
+def test_best_sentence_falls_back_to_chunk_text():
+    """Test that chunks missing from the index are vectorized on the fly."""
+    index = SentenceIndex()
+    assert index.best_sentence("মামা কী করেন?", 42) is None
+    assert index.best_sentence("মামা কী করেন?", 42, CHUNK) == "মামা বিয়ের সব ঠিক করেন"
+
+def test_tf_vector_round_trip():
+    """Test that persisted term-count rows decode to the original values."""
+    row = term_frequencies(["শম্ভুনাথ সেন কল্যাণীর বাবা"])[0]
+    indices, counts = deserialize_tf(serialize_tf(row))
+    assert indices.tolist() == row.indices.tolist()
+    assert counts.tolist() == row.data.tolist()
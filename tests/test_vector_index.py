@@ -0,0 +1,96 @@
+import numpy as np
+from src.core import vector_index
+from src.core.ann_index import IVFIndex
+from src.core.quantization import QuantizedVectorIndex
+from src.core.vector_index import VectorIndex
+
+def test_search_returns_top_k_in_order():
+    """Test that the index ranks chunks by cosine similarity."""
+    index = VectorIndex(initial_capacity=2)
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(10, 8)).astype(np.float32)
+    index.add(list(range(100, 110)), embeddings)
+
+    query = embeddings[3]
+    ids, scores = index.search(query, k=4)
+
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:4] + 100
+    assert len(index) == 10
+    assert ids.tolist() == expected.tolist()
+    assert ids[0] == 103
+    assert np.isclose(scores[0], 1.0, atol=1e-5)
+    assert np.all(np.diff(scores) <= 0)
+
+def test_search_on_empty_index():
+    """Test that an empty index returns no results."""
+    ids, scores = VectorIndex().search(np.ones(8), k=3)
+    assert len(ids) == 0
+    assert len(scores) == 0
+
+def test_search_many_matches_single_queries(monkeypatch):
+    """Test that batched search, scored in blocks of queries, ranks as one query at a time does."""
+    monkeypatch.setattr(vector_index, "SEARCH_BLOCK_SCORES", 100)  # Two queries per block
+    index = VectorIndex()
+    rng = np.random.default_rng(1)
+    index.add(list(range(50)), rng.normal(size=(50, 16)))
+    queries = rng.normal(size=(5, 16))
+
+    ids, scores = index.search_many(queries, k=7)
+    assert ids.shape == (5, 7)
+    for row, query in enumerate(queries):
+        single_ids, single_scores = index.search(query, k=7)
+        assert ids[row].tolist() == single_ids.tolist()
+        assert np.allclose(scores[row], single_scores, atol=1e-6)
+    assert index.search_many(queries, k=80)[0].shape == (5, 50)
+
+def test_search_within_document_partitions():
+    """Test that a document filter only scores that document's chunks."""
+    index = VectorIndex(initial_capacity=4)
+    rng = np.random.default_rng(2)
+    embeddings = rng.normal(size=(30, 8))
+    index.add(list(range(10)), embeddings[:10], [1] * 10)
+    index.add(list(range(10, 20)), embeddings[10:20], [2] * 10)
+    index.add(list(range(20, 30)), embeddings[20:], [1] * 10)
+
+    ids, _ = index.search(embeddings[15], k=5, document_ids=[1])
+    assert 15 not in ids.tolist()
+    assert all(chunk_id < 10 or chunk_id >= 20 for chunk_id in ids)
+    assert index.search(embeddings[15], k=1, document_ids=[2])[0].tolist() == [15]
+    assert len(index.search(embeddings[15], k=3, document_ids=[99])[0]) == 0
+
+def test_ivf_and_int8_search_within_document_partitions(tmp_path):
+    """Test that the IVF and int8 backends apply a document filter like the exact index."""
+    rng = np.random.default_rng(3)
+    embeddings = rng.normal(size=(600, 16)).astype(np.float32)
+    document_ids = [1 + i % 3 for i in range(600)]
+    exact = VectorIndex()
+    ivf = IVFIndex(n_lists=8, nprobe=8, min_train_size=200)
+    quantized = QuantizedVectorIndex(str(tmp_path / "vectors"), rerank_candidates=600)
+    for index in (exact, ivf, quantized):
+        for start in range(0, 600, 150):
+            index.add(list(range(start, start + 150)), embeddings[start:start + 150], document_ids[start:start + 150])
+
+    assert ivf.trained
+    for query in rng.normal(size=(5, 16)):
+        expected = exact.search(query, k=5, document_ids=[2, 3])[0].tolist()
+        assert all(document_ids[chunk_id] in (2, 3) for chunk_id in expected)
+        assert ivf.search(query, k=5, document_ids=[2, 3])[0].tolist() == expected
+        assert quantized.search(query, k=5, document_ids=[2, 3])[0].tolist() == expected
+    assert len(ivf.search(embeddings[0], k=3, document_ids=[99])[0]) == 0
+    assert len(quantized.search(embeddings[0], k=3, document_ids=[99])[0]) == 0
+
+def test_remove_compacts_rows():
+    """Test that removed chunks are no longer returned and the rest stay searchable."""
+    index = VectorIndex(initial_capacity=2)
+    rng = np.random.default_rng(2)
+    embeddings = rng.normal(size=(6, 8)).astype(np.float32)
+    index.add([1, 2, 3, 4, 5, 6], embeddings, [1, 1, 1, 2, 2, 2])
+
+    assert index.remove([2, 5, 99]) == 2
+    assert index.remove([99]) == 0
+    assert len(index) == 4
+    ids, _ = index.search(embeddings[1], k=6)
+    assert sorted(ids.tolist()) == [1, 3, 4, 6]
+    assert index.search(embeddings[3], k=1, document_ids=[2])[0].tolist() == [4]
+    assert np.isnan(index.score(embeddings[0], np.array([2]))[0])
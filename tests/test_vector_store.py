@@ -0,0 +1,52 @@
+import numpy as np
+from src.core.vector_index import VectorIndex
+from src.core.vector_store import MemmapVectorIndex
+
+def test_memmap_index_matches_in_memory_index(tmp_path):
+    """Test that the memory-mapped store ranks and scores like the in-memory index."""
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(40, 8)).astype(np.float32)
+    in_memory = VectorIndex()
+    store = MemmapVectorIndex(str(tmp_path / "vectors"))
+    for start in range(0, 40, 10):
+        in_memory.add(list(range(start, start + 10)), embeddings[start:start + 10])
+        store.add(list(range(start, start + 10)), embeddings[start:start + 10])
+
+    query = rng.normal(size=8)
+    assert len(store) == 40
+    assert store.search(query, k=5)[0].tolist() == in_memory.search(query, k=5)[0].tolist()
+    assert np.allclose(store.score(query, [3, 99, 17]), in_memory.score(query, [3, 99, 17]), equal_nan=True)
+
+def test_memmap_index_is_shared_between_instances(tmp_path):
+    """Test that a second worker sees appends and rebuilds without reloading."""
+    path = str(tmp_path / "vectors")
+    writer, reader = MemmapVectorIndex(path), MemmapVectorIndex(path)
+    rng = np.random.default_rng(1)
+    writer.add([1, 2, 3], rng.normal(size=(3, 4)))
+    assert len(reader) == 3
+    assert reader.search(rng.normal(size=4), k=3)[0].shape == (3,)
+
+    writer.rebuild([7, 8], rng.normal(size=(2, 4)), document_ids=[1, 2])
+    assert reader.search(rng.normal(size=4), k=3)[0].tolist() in ([7, 8], [8, 7])
+    assert reader.search(rng.normal(size=4), k=3, document_ids=[2])[0].tolist() == [8]
+
+def test_interrupted_append_is_detected_and_truncated(tmp_path):
+    """Test that orphan rows from a crashed append force a rebuild and are cut off by the next writer."""
+    path = str(tmp_path / "vectors")
+    rng = np.random.default_rng(2)
+    MemmapVectorIndex(path).add([1, 2, 3], rng.normal(size=(3, 4)), document_ids=[1, 1, 1])
+    # Crash after the vector and document rows were written, before the id
+    with open(path + ".f32", "ab") as f:
+        f.write(rng.normal(size=4).astype(np.float32).tobytes())
+    with open(path + ".docs", "ab") as f:
+        f.write(np.int64(1).tobytes())
+
+    store = MemmapVectorIndex(path)
+    assert len(store) == 3
+    assert not store._matches(3, 3, 6)
+
+    embedding = rng.normal(size=4)
+    store.add([4], [embedding], document_ids=[1])
+    assert store._matches(4, 4, 10)
+    ids, scores = store.search(embedding, k=1)
+    assert ids.tolist() == [4] and np.isclose(scores[0], 1.0)